@@ -0,0 +1,278 @@
+import argparse
+import csv
+import json
+import mmap
+import sys
+import numpy as np
+import BatchEvaluator
+from Board import DIRECTIONS
+from GameLog import LENGTH, MAGIC, O_FIRST, QUIT, RECORD, WINNER
+
+# Results in the arrays of a chunk, as in the result byte of a game log
+DRAW = 0
+X_WINS = 1
+O_WINS = 2
+
+
+class Chunk(object):
+
+    def __init__(self, geometry, moves, lengths, results, quits, firsts):
+        """
+        Games from a log with the same board size, as arrays with one row per game.
+
+        :param geometry:    (int, int, int), height, width and tiles in a row needed to win
+        :param moves:       numpy.ndarray, N x longest game of int8, columns played in order, padded with -1
+        :param lengths:     numpy.ndarray, N of int16, number of moves in each game
+        :param results:     numpy.ndarray, N of int8, DRAW, X_WINS or O_WINS
+        :param quits:       numpy.ndarray, N of bool, True if the game was won because the other player left
+        :param firsts:      numpy.ndarray, N of int8, BatchEvaluator.X or O, the tile that made the first move
+        """
+        self.geometry = geometry
+        self.moves = moves
+        self.lengths = lengths
+        self.results = results
+        self.quits = quits
+        self.firsts = firsts
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def subset(self, games):
+        """
+        :param games: numpy.ndarray, N of bool, the games to keep
+        :return: Chunk, with only the given games
+        """
+        return Chunk(self.geometry, self.moves[games], self.lengths[games], self.results[games], self.quits[games],
+                     self.firsts[games])
+
+    def winners_moved_first(self):
+        """
+        :return: numpy.ndarray, N of bool, True if the game was won by the tile that made the first move
+        """
+        return self.results == np.where(self.firsts == BatchEvaluator.X, X_WINS, O_WINS)
+
+    def boards(self):
+        """
+        Replay every game at once, one move number at a time, starting with the tile that moved first in each game.
+
+        :return: numpy.ndarray, N x height x width of BatchEvaluator.EMPTY, X or O, the board at the end of each game
+        """
+        height, width, _ = self.geometry
+        count = len(self)
+        boards = np.zeros((count, height, width), dtype=np.int8)
+        heights = np.zeros((count, width), dtype=np.int16)
+        games = np.arange(count)
+        tiles = (self.firsts, BatchEvaluator.X + BatchEvaluator.O - self.firsts)
+        for ply in range(self.moves.shape[1]):
+            cols = self.moves[:, ply].astype(np.intp)
+            playing = cols >= 0
+            index, cols = games[playing], cols[playing]
+            rows = height - 1 - heights[index, cols]
+            boards[index, rows, cols] = tiles[ply % 2][playing]
+            heights[index, cols] += 1
+        return boards
+
+
+def chunks(path, size=65536):
+    """
+    Read a game log in chunks of games with the same board size. Only the fixed part of each record is read in
+    Python; the moves of the whole chunk are unpacked from their 4 bits at once. The file is memory-mapped and
+    at most one chunk is held at a time, so logs of any size can be read.
+    A record cut short at the end of the file, e.g. by a crash, is skipped.
+
+    :param path: string, log file
+    :param size: int, most games in a chunk
+    :return: generator of Chunk
+    """
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) <= len(MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if buffer[:len(MAGIC)] != MAGIC:
+                raise ValueError("%s is not a game log..." % path)
+            offset = len(MAGIC)
+            end = len(buffer)
+            geometry = None
+            packed, counts, results = [], [], []
+            while offset + LENGTH.size <= end:
+                length, = LENGTH.unpack_from(buffer, offset)
+                if offset + LENGTH.size + length > end:
+                    break
+                _, height, width, connect, result, count, first, second = RECORD.unpack_from(
+                    buffer, offset + LENGTH.size)
+                if counts and (len(counts) == size or (height, width, connect) != geometry):
+                    yield make_chunk(geometry, packed, counts, results)
+                    packed, counts, results = [], [], []
+                geometry = (height, width, connect)
+                start = offset + LENGTH.size + RECORD.size + first + second
+                packed += [buffer[start:start + (count + 1) // 2]]
+                counts += [count]
+                results += [result]
+                offset += LENGTH.size + length
+            if counts:
+                yield make_chunk(geometry, packed, counts, results)
+
+
+def make_chunk(geometry, packed, counts, results):
+    """
+    :param geometry:    (int, int, int), height, width and tiles in a row needed to win
+    :param packed:      [bytes], moves of each game, two to a byte
+    :param counts:      [int], number of moves in each game
+    :param results:     [int], result byte of each game
+    :return: Chunk
+    """
+    data = np.frombuffer(b''.join(packed), dtype=np.uint8)
+    # One spare nibble at the end, so padding past the last move is never out of range
+    nibbles = np.full(len(data) * 2 + 1, -1, dtype=np.int8)
+    nibbles[0:-1:2] = data >> 4
+    nibbles[1::2] = data & 0x0f
+    lengths = np.array(counts, dtype=np.int16)
+    # Each game starts after the moves of the games before it, rounded up to whole bytes
+    starts = np.zeros(len(counts), dtype=np.intp)
+    np.cumsum((lengths[:-1] + 1) // 2 * 2, dtype=np.intp, out=starts[1:])
+    plies = np.arange(max(max(counts), 1))
+    index = np.minimum(starts[:, None] + plies[None, :], len(nibbles) - 1)
+    moves = np.where(plies[None, :] < lengths[:, None], nibbles[index], -1).astype(np.int8)
+    results = np.array(results, dtype=np.uint8)
+    firsts = np.where(results & O_FIRST, BatchEvaluator.O, BatchEvaluator.X).astype(np.int8)
+    return Chunk(geometry, moves, lengths, (results & WINNER).astype(np.int8), (results & QUIT) != 0, firsts)
+
+
+class Statistics(object):
+
+    def __init__(self, geometry):
+        """
+        Totals for games on one size of board, added to a chunk at a time.
+        Games won because the other player left are counted in the totals and game lengths, but not in the
+        openings, column usage or win directions, which are about how games are played out on the board.
+
+        :param geometry: (int, int, int), height, width and tiles in a row needed to win
+        """
+        height, width, connect = geometry
+        self.geometry = geometry
+        self.games = 0
+        self.quits = 0
+        # Games, wins for the tile that moved first, wins for the other tile and draws by the column of the first move
+        self.openings = np.zeros((width, 4), dtype=np.int64)
+        # Games by number of moves
+        self.lengths = np.zeros(height * width + 1, dtype=np.int64)
+        # Moves by move number and column
+        self.column_usage = np.zeros((height * width, width), dtype=np.int64)
+        # Wins with a line in each direction, for X then O, in the order of Board.DIRECTIONS
+        self.win_directions = np.zeros((2, len(DIRECTIONS)), dtype=np.int64)
+
+    def add(self, chunk):
+        """
+        :param chunk: Chunk, of games on this size of board
+        """
+        height, width, connect = self.geometry
+        self.games += len(chunk)
+        self.quits += int(chunk.quits.sum())
+        self.lengths += np.bincount(chunk.lengths, minlength=len(self.lengths))[:len(self.lengths)]
+        finished = ~chunk.quits
+        played = chunk.subset(finished)
+        if not len(played):
+            return
+        moves, results = played.moves, played.results
+        opened = moves[:, 0] >= 0
+        openings = moves[opened, 0].astype(np.intp)
+        first_won = played.winners_moved_first()[opened]
+        drawn = results[opened] == DRAW
+        self.openings[:, 0] += np.bincount(openings, minlength=width)
+        for column, games in ((1, first_won), (2, ~first_won & ~drawn), (3, drawn)):
+            self.openings[:, column] += np.bincount(openings[games], minlength=width)
+        made = moves >= 0
+        _, plies = np.nonzero(made)
+        cells = plies * width + moves[made]
+        self.column_usage[:moves.shape[1]] += np.bincount(cells, minlength=moves.shape[1] * width).reshape(-1, width)
+        boards = played.boards()
+        for tile, (value, result) in enumerate(((BatchEvaluator.X, X_WINS), (BatchEvaluator.O, O_WINS))):
+            won = boards[results == result]
+            if len(won):
+                self.win_directions[tile] += BatchEvaluator.win_directions(won, value, connect).sum(axis=0)
+
+    def board(self):
+        """
+        :return: string, e.g. '6x9x5', for the height, width and tiles in a row needed to win
+        """
+        return "%ix%ix%i" % self.geometry
+
+    def to_dict(self):
+        """
+        :return: {}, every statistic, as JSON types
+        """
+        lengths = np.nonzero(self.lengths)[0]
+        moves = int((self.lengths * np.arange(len(self.lengths))).sum())
+        openings = []
+        for column, (games, first_wins, second_wins, draws) in enumerate(self.openings.tolist()):
+            openings += [{'column':column, 'games':games, 'first_wins':first_wins, 'second_wins':second_wins,
+                          'draws':draws, 'first_win_rate':first_wins / games if games else None}]
+        longest = int(lengths[-1]) + 1 if len(lengths) else 0
+        return {
+            'games':self.games,
+            'quits':self.quits,
+            'average_length':moves / self.games if self.games else None,
+            'lengths':{int(length): int(self.lengths[length]) for length in lengths},
+            'openings':openings,
+            'column_usage':self.column_usage[:longest].tolist(),
+            'win_directions':{name: {'X':int(self.win_directions[0, direction]),
+                                     'O':int(self.win_directions[1, direction])}
+                              for direction, (name, _, _) in enumerate(DIRECTIONS)},
+        }
+
+    def rows(self):
+        """
+        :return: [(string, string, int or string, string, number)], table, board, key, field and value, for CSV
+        """
+        stats = self.to_dict()
+        board = self.board()
+        rows = [('summary', board, '', field, stats[field]) for field in ('games', 'quits', 'average_length')]
+        for opening in stats['openings']:
+            rows += [('openings', board, opening['column'], field, opening[field])
+                     for field in ('games', 'first_wins', 'second_wins', 'draws', 'first_win_rate')]
+        rows += [('lengths', board, length, 'games', games) for length, games in stats['lengths'].items()]
+        for ply, counts in enumerate(stats['column_usage']):
+            rows += [('column_usage', board, ply, column, count) for column, count in enumerate(counts)]
+        for name, counts in stats['win_directions'].items():
+            rows += [('win_directions', board, name, tile, count) for tile, count in counts.items()]
+        return rows
+
+
+def analyse(paths, size=65536):
+    """
+    Read game logs a chunk at a time and total up the statistics for each size of board.
+
+    :param paths:   [string], log files
+    :param size:    int, most games in a chunk
+    :return: {(int, int, int): Statistics}, by height, width and tiles in a row needed to win
+    """
+    totals = {}
+    for path in paths:
+        for chunk in chunks(path, size):
+            if chunk.geometry not in totals:
+                totals[chunk.geometry] = Statistics(chunk.geometry)
+            totals[chunk.geometry].add(chunk)
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Statistics about the games in Connect-5 game logs.")
+    parser.add_argument('paths', nargs='+', help="log files")
+    parser.add_argument('--format', choices=('json', 'csv'), default='json', help="output format")
+    parser.add_argument('--output', default=None, help="file to write the statistics to (default stdout)")
+    parser.add_argument('--chunk', type=int, default=65536, help="number of games to read at a time")
+    args = parser.parse_args()
+    totals = analyse(args.paths, args.chunk)
+    out = sys.stdout if args.output is None else open(args.output, 'w', newline='')
+    try:
+        if args.format == 'json':
+            json.dump({stats.board(): stats.to_dict() for stats in totals.values()}, out, indent=2)
+            out.write("\n")
+        else:
+            writer = csv.writer(out)
+            writer.writerow(('table', 'board', 'key', 'field', 'value'))
+            for stats in totals.values():
+                writer.writerows(stats.rows())
+    finally:
+        if out is not sys.stdout:
+            out.close()
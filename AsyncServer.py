@@ -0,0 +1,455 @@
+import asyncio
+import logging
+import threading
+import time
+import Codec
+import Framing
+import Metrics
+from Game import Game, PING, PONG, TYPES
+from GameLog import GameLog, check_name, check_width
+from Lobby import Lobby
+from Results import ResultsStore
+from Server import parse_args, setup
+from TokenBucket import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class Room(Game):
+
+    # Bytes a spectator can fall behind by before they are dropped
+    SPECTATOR_BUFFER = 64 * 1024
+
+    def __init__(self, number, first, second, height=6, width=9, connect=5, log=None, results=None):
+        """
+        A single game hosted by the AsyncServer.
+        Players are stored in the same way as the Server, but with an asyncio.StreamWriter in place of the socket.
+        The first player gets the 'X' tile and the second the 'O' tile.
+
+        :param number:  int, unique room number
+        :param first:   [], first players data
+        :param second:  [], second players data
+        :param height:  int, number of rows
+        :param width:   int, number of columns
+        :param connect: int, number of tiles in a row needed to win
+        :param log:     GameLog, where finished games are recorded (or None)
+        :param results: ResultsStore, where finished games are rated (or None)
+        """
+        Game.__init__(self, height, width, connect, log, results)
+        self.number = number
+        first[2] = 'X'
+        second[2] = 'O'
+        self.players = [first, second]
+        self.game_over = False
+        self.finished = False
+        self.spectators = []
+        self.dropped = 0
+
+    def write(self, frame, player):
+        """
+        Write a framed message to the given players stream, whose transport buffers it until it can be sent.
+
+        :param frame:   bytes
+        :param player:  int, 0 for player 1, 1 for player 2
+        """
+        self.players[player][0].write(frame)
+
+    def send_quit(self, player, name, quit, final, row=None, column=None, tile=None, draw=False):
+        """
+        Send the quitting message (see Game.send_quit). Once it has been sent the game in this room is finished.
+        """
+        self.finished = True
+        Game.send_quit(self, player, name, quit, final, row, column, tile, draw)
+
+    def send_both(self, msg, player, flag=None):
+        """
+        Send msg to both players and the spectators (see Game.send_both). Once a quitting message has been sent
+        the game in this room is finished.
+        """
+        if msg['type'] == 'OVER':
+            self.finished = True
+        Game.send_both(self, msg, player, flag)
+
+    def start(self):
+        """
+        Tell the players the game is beginning. The first player makes the first move.
+        """
+        self.start_game()
+        self.send_handshake(player=0, wait=False, move=True)
+        self.send_handshake(player=1, wait=False, move=False)
+
+    def forfeit(self, data):
+        """
+        End the game because a player has left, making their opponent the winner.
+
+        :param data: [], data of the player who left
+        """
+        for player, other in enumerate(self.players):
+            if other is not data:
+                self.record_game(winner=other[2], quit=True)
+                msg = self.quit_msg(name=other[3], quit=True, final=False)
+                frames = {}
+                self.write(self.frame(msg, player, frames), player)
+                self.broadcast(msg, frames)
+        self.finished = True
+
+    def watch(self, data):
+        """
+        Add a spectator and send them the game so far: the players, the size of the board, the moves made and the
+        tile that made the first one.
+
+        :param data: [], the spectators data
+        """
+        msg = {'type':'WATCH', 'room':self.number, 'players':[player[3] for player in self.players],
+               'height':self.board.height, 'width':self.board.width, 'connect':self.board.connect,
+               'moves':self.moves, 'first':self.first}
+        data[0].write(Framing.pack(data[4].encode(msg)))
+        self.spectators += [data]
+
+    def unwatch(self, data):
+        """
+        Remove a spectator, if they are still watching.
+
+        :param data: [], the spectators data
+        """
+        if data in self.spectators:
+            self.spectators.remove(data)
+
+    def broadcast(self, msg, frames=None):
+        """
+        Send msg to every spectator. It is encoded once for each codec in use and the same bytes are written to
+        everyone using that codec.
+        Spectators who have not read what they were sent already are dropped, so they cannot hold up the players.
+        Once the game is over the spectators are let go, and can choose another game to watch.
+
+        :param msg:     {}
+        :param frames:  {}, frames of msg already made for the players, by codec (or None)
+        """
+        if frames is None:
+            frames = {}
+        for data in list(self.spectators):
+            writer = data[0]
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > self.SPECTATOR_BUFFER:
+                self.spectators.remove(data)
+                self.dropped += 1
+                writer.close()
+                continue
+            codec = data[4]
+            if codec not in frames:
+                frames[codec] = Framing.pack(codec.encode(msg))
+            writer.write(frames[codec])
+        if msg['type'] == 'OVER':
+            self.spectators = []
+
+
+class AsyncServer(object):
+
+    def __init__(self, host='127.0.0.1', port=80, height=6, width=9, connect=5, log=None, profiler=None,
+                 rate_limit=None, burst=100, heartbeat=None, idle_timeout=None, results=None):
+        """
+        Initialises servers attributes.
+        If a host or port is not given then host will be local and port will be 80 (0 picks a free port).
+        Every connection is handled by a coroutine. After saying HELLO players wait in the Lobby until they are
+        paired into their own Room, so one process can host many games at once. Players who want to play again
+        go back into the Lobby. Spectators say HELLO with 'spectate' set, and watch a game without playing.
+
+        :param host:    string, IP address
+        :param port:    int, port number
+        :param height:  int, number of rows
+        :param width:   int, number of columns
+        :param connect: int, number of tiles in a row needed to win
+        :param log:     GameLog, where every rooms finished games are recorded (or None)
+        :param profiler: Profiler, times each phase of handling the messages of every room (or None)
+        :param rate_limit: float, messages each connection may send a second on average (or None for no limit)
+        :param burst:   int, messages each connection may send at once
+        :param heartbeat: float, seconds between checks for quiet connections, which are sent a PING
+                        (or None to never check)
+        :param idle_timeout: float, seconds a connection may be quiet before it is dropped (or None to never drop it)
+        :param results: ResultsStore, where every rooms finished games are rated (or None)
+        """
+        # Rooms are made as players are paired, so a board too wide to log is refused before any are
+        if log is not None:
+            check_width(width)
+        self.host = host
+        self.port = port
+        self.geometry = (height, width, connect)
+        self.log = log
+        self.results = results
+        self.profiler = profiler
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.heartbeat = heartbeat
+        self.idle_timeout = idle_timeout
+        self.lobby = Lobby()
+        self.rooms = {}
+        self.seats = {}
+        self.watching = {}
+        self.writers = set()
+        # Each connections data and when it last sent anything, for the reaper
+        self.seen = {}
+        self.room_count = 0
+        self.server = None
+        self.loop = None
+        self.stopping = None
+        self.started = threading.Event()
+
+    def start(self):
+        """
+        Start 5 in a row server and serve until stop is called.
+        """
+        asyncio.run(self.serve())
+
+    def stop(self):
+        """
+        Stop the server. Can be called from any thread.
+        """
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stopping.set)
+
+    async def serve(self):
+        """
+        Start listening and keep accepting players until the server is stopped.
+        """
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        if await self.connect():
+            logger.info("Connect-5 server started!")
+            logger.info("Waiting for players to join...")
+            self.started.set()
+            reaper = asyncio.ensure_future(self.reap()) if self.heartbeat else None
+            await self.stopping.wait()
+            if reaper is not None:
+                reaper.cancel()
+            self.server.close()
+            for writer in list(self.writers):
+                writer.close()
+            await self.server.wait_closed()
+        else:
+            logger.error("Could not start server...")
+            self.started.set()
+
+    async def connect(self):
+        """
+        Bind the servers IP address and port number, and start listening.
+
+        :return: boolean, True if no errors occur, otherwise False
+        """
+        connected = False
+        try:
+            self.server = await asyncio.start_server(self.main, self.host, self.port, backlog=1024)
+            self.port = self.server.sockets[0].getsockname()[1]
+            connected = True
+        except OSError as exc:
+            logger.error("socket.error: %s", exc)
+        return connected
+
+    async def main(self, reader, writer):
+        """
+        The main loop that accepts and processes messages from a client.
+        Messages are handled by the lobby until the player is seated in a room, and by the room until its game
+        is finished.
+
+        :param reader:  asyncio.StreamReader, clients stream
+        :param writer:  asyncio.StreamWriter, clients stream
+        """
+        data = [writer, writer.get_extra_info('peername'), None]
+        bucket = TokenBucket(self.rate_limit, self.burst) if self.rate_limit else None
+        self.writers.add(writer)
+        seen = self.seen[writer] = [data, time.monotonic()]
+        Metrics.CONNECTIONS.inc()
+        Metrics.PLAYERS.inc()
+        try:
+            while True:
+                msg = await Framing.read_frame(reader)
+                if not msg:
+                    break
+                seen[1] = time.monotonic()
+                if bucket is not None and not bucket.allow():
+                    # Dropped before being decoded; the player is told the first time in a row
+                    Metrics.REJECTED.inc('rate')
+                    if bucket.streak == 1:
+                        self.send(Game.error_msg('rate', "Too many messages, slow down..."), data)
+                        await writer.drain()
+                    continue
+                room = self.seat(writer)
+                if room is None:
+                    if not self.process(msg, data):
+                        break
+                else:
+                    room.process(msg, room.players.index(data))
+                    if room.finished:
+                        self.rooms.pop(room.number, None)
+                    elif room.game_over:
+                        break
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.leave(data)
+
+    def seat(self, writer):
+        """
+        Get the room a player is playing in.
+
+        :param writer:  asyncio.StreamWriter, clients stream
+        :return: Room, or None if the player is not in a game
+        """
+        room = self.seats.get(writer)
+        if room is not None and room.finished:
+            del self.seats[writer]
+            room = None
+        return room
+
+    def process(self, msg, data):
+        """
+        Processes messages from a player who is not in a game.
+        'HELLO': The player is put in the lobby, or starts watching a game if 'spectate' is set. On their first
+                 HELLO their name is saved and a codec is agreed.
+        'OVER' : The player does not want to play again.
+        'PING' : Heartbeat, answered with a PONG message.
+        'PONG' : Answer to a heartbeat.
+
+        :param msg:     bytes, encoded message
+        :param data:    [], the players data
+        :return: boolean, False if the player should be disconnected
+        """
+        start = time.perf_counter()
+        kind = 'invalid'
+        try:
+            msg = Codec.decode(msg)
+            if msg['type'] in TYPES:
+                kind = msg['type']
+            if msg['type'] == 'HELLO':
+                if not msg['replay']:
+                    codec = Codec.negotiate(msg.get('codecs'))
+                    if msg.get('codecs'):
+                        self.send({'type':'HELLO', 'codec':codec.name}, data)
+                    data[3:] = [check_name(msg['name']), codec]
+                self.unwatch(data)
+                if msg.get('spectate'):
+                    self.lobby.remove(data)
+                    self.watch(data, msg.get('room'))
+                else:
+                    self.lobby.add(data)
+                    self.send({'type':'HELLO', 'wait':True, 'move':False}, data)
+                    self.pair()
+            elif msg['type'] == 'OVER' and not msg['quit']:
+                return False
+            elif msg['type'] == 'PING':
+                self.send(PONG, data)
+            elif msg['type'] == 'PONG':
+                pass
+            else:
+                logger.info("Player is not in a game, ignoring message: %s", msg)
+        except (ValueError, KeyError):
+            logger.warning("Received data is not in JSON or binary format...")
+            Metrics.MALFORMED.inc()
+            return False
+        finally:
+            Metrics.MESSAGES.inc(kind)
+            Metrics.PROCESS_SECONDS.observe(time.perf_counter() - start, kind)
+        return True
+
+    def pair(self):
+        """
+        Start a new room for every pair of players in the lobby.
+        """
+        for first, second in self.lobby.match():
+            self.room_count += 1
+            room = Room(self.room_count, first, second, *self.geometry, log=self.log, results=self.results)
+            if self.profiler is not None:
+                self.profiler.attach(room)
+            self.rooms[room.number] = room
+            self.seats[first[0]] = room
+            self.seats[second[0]] = room
+            room.start()
+
+    def watch(self, data, number=None):
+        """
+        Let a spectator watch the game in the given room, or the game started most recently.
+        If there is no such game they are sent a final quitting message.
+
+        :param data:    [], the spectators data
+        :param number:  int, room number (or None)
+        """
+        if number is None:
+            number = max(self.rooms, default=None)
+        room = self.rooms.get(number)
+        if room is None or room.finished:
+            self.send({'type':'OVER', 'name':"", 'quit':False, 'final':True, 'row':None, 'col':None, 'tile':None,
+                       'draw':False}, data)
+            return
+        self.watching[data[0]] = room
+        room.watch(data)
+
+    def unwatch(self, data):
+        """
+        Stop a spectator watching the game they were watching, if any.
+
+        :param data: [], the spectators data
+        """
+        room = self.watching.pop(data[0], None)
+        if room is not None:
+            room.unwatch(data)
+
+    def leave(self, data):
+        """
+        Close a players stream once their loop has finished.
+        If they were in the middle of a game their opponent wins.
+
+        :param data: [], the players data
+        """
+        writer = data[0]
+        writer.close()
+        self.writers.discard(writer)
+        self.seen.pop(writer, None)
+        Metrics.PLAYERS.dec()
+        self.lobby.remove(data)
+        self.unwatch(data)
+        room = self.seats.pop(writer, None)
+        if room is not None and not room.finished:
+            room.forfeit(data)
+            self.rooms.pop(room.number, None)
+
+    async def reap(self):
+        """
+        Every heartbeat, send a PING to each connection that has been quiet since the last one, and drop any that
+        has been quiet for longer than the idle timeout. A dropped player leaves as if they had disconnected, so
+        their opponent wins (see leave).
+        """
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            now = time.monotonic()
+            for writer, (data, last) in list(self.seen.items()):
+                idle = now - last
+                if writer.is_closing():
+                    continue
+                if self.idle_timeout is not None and idle >= self.idle_timeout:
+                    logger.warning("%s has not answered for %.0fs, dropping them", data[1], idle)
+                    Metrics.REAPED.inc()
+                    # Aborted rather than closed, as a dead peer will never take what is waiting to be sent
+                    writer.transport.abort()
+                elif idle >= self.heartbeat:
+                    self.send(PING, data)
+
+    @staticmethod
+    def send(msg, data):
+        """
+        Encode and frame msg before writing it to a players stream, using the players codec if one has been agreed.
+
+        :param msg:     {}
+        :param data:    [], the players data
+        """
+        codec = data[4] if len(data) > 4 else Codec.JSON
+        data[0].write(Framing.pack(codec.encode(msg)))
+
+
+if __name__ == "__main__":
+    args = parse_args("Connect-5 server hosting a game for every pair of players.")
+    profiler = setup(args)
+    log = GameLog(args.log) if args.log else None
+    results = ResultsStore(args.results) if args.results else None
+    s = AsyncServer(host=args.host, port=args.port, height=args.height, width=args.width, connect=args.connect,
+                    log=log, profiler=profiler, rate_limit=args.rate_limit, burst=args.burst,
+                    heartbeat=args.heartbeat or None, idle_timeout=args.idle_timeout or None, results=results)
+    s.start()
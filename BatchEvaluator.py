@@ -0,0 +1,89 @@
+import numpy as np
+from Board import DIRECTIONS
+
+# Cell values in a stacked array of boards
+EMPTY = 0
+X = 1
+O = 2
+VALUES = {None: EMPTY, 'X': X, 'O': O}
+
+# Status of each board returned by evaluate
+PLAYING = 0
+X_WINS = 1
+O_WINS = 2
+DRAW = 3
+
+
+def stack(boards):
+    """
+    Stack Board objects of the same size into one array.
+
+    :param boards: [Board]
+    :return: numpy.ndarray, N x height x width of EMPTY, X or O
+    """
+    rows = [[[VALUES[tile] for tile in row] for row in board.to_list()] for board in boards]
+    return np.array(rows, dtype=np.int8).reshape(len(boards), boards[0].height, boards[0].width)
+
+
+def win_directions(boards, value, connect=5):
+    """
+    Find which directions the given tile has enough in a row in, for every board at once.
+    For each direction the board is AND-ed with strided views of itself moved one cell along the line at a time,
+    so a cell survives only if the whole line starting there is the given tile.
+
+    :param boards:  numpy.ndarray, N x height x width of EMPTY, X or O
+    :param value:   int, X or O
+    :param connect: int, number of tiles in a row needed to win
+    :return: numpy.ndarray, N x 4 of bool, in the order of Board.DIRECTIONS
+    """
+    boards = np.asarray(boards)
+    count, height, width = boards.shape
+    tiles = boards == value
+    found = np.zeros((count, len(DIRECTIONS)), dtype=bool)
+    for direction, (name, d_row, d_col) in enumerate(DIRECTIONS):
+        # Range of starting cells whose whole line fits on the board
+        rows = height - (connect - 1) * abs(d_row)
+        cols = width - (connect - 1) * d_col
+        if rows <= 0 or cols <= 0:
+            continue
+        first_row = (connect - 1) if d_row < 0 else 0
+        lines = np.ones((count, rows, cols), dtype=bool)
+        for step in range(connect):
+            row = first_row + d_row * step
+            col = d_col * step
+            lines &= tiles[:, row:row + rows, col:col + cols]
+        found[:, direction] = lines.any(axis=(1, 2))
+    return found
+
+
+def wins(boards, value, connect=5):
+    """
+    Check every board and see if the given tile has enough in a row, like check_for_winner.
+
+    :param boards:  numpy.ndarray, N x height x width of EMPTY, X or O
+    :param value:   int, X or O
+    :param connect: int, number of tiles in a row needed to win
+    :return: numpy.ndarray, N of bool
+    """
+    return win_directions(boards, value, connect).any(axis=1)
+
+
+def evaluate(boards, connect=5):
+    """
+    Get the status of every board.
+    A board is a draw when it is full and neither tile has won. Boards where both tiles have a line cannot happen
+    in a real game, and are reported as X_WINS.
+
+    :param boards:  numpy.ndarray, N x height x width of EMPTY, X or O
+    :param connect: int, number of tiles in a row needed to win
+    :return: numpy.ndarray, N of PLAYING, X_WINS, O_WINS or DRAW
+    """
+    boards = np.asarray(boards)
+    x_wins = wins(boards, X, connect)
+    o_wins = wins(boards, O, connect)
+    full = (boards != EMPTY).all(axis=(1, 2))
+    status = np.full(boards.shape[0], PLAYING, dtype=np.int8)
+    status[full] = DRAW
+    status[o_wins] = O_WINS
+    status[x_wins] = X_WINS
+    return status
@@ -0,0 +1,308 @@
+import argparse
+import json
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import Codec
+import Framing
+from Board import Board
+from Server import Server
+
+# One message of each type, as the server and clients send them
+MESSAGES = {
+    'HELLO': {'type':'HELLO', 'wait':False, 'move':True, 'height':6, 'width':9, 'connect':5},
+    'MOVE': {'type':'MOVE', 'move':True, 'row':3, 'col':4, 'tile':'X'},
+    'OVER': {'type':'OVER', 'name':"James", 'quit':False, 'final':False, 'row':0, 'col':8, 'tile':'O', 'draw':False},
+}
+
+
+def measure(func, calls, repeat=5, warmup=1):
+    """
+    Time a function that makes the given number of calls to the code being measured.
+    The function is run warmup times first, then repeat times, and the time of each run is divided by calls.
+
+    :param func:    function, with no arguments
+    :param calls:   int, number of calls func makes each run
+    :param repeat:  int, number of timed runs
+    :param warmup:  int, number of untimed runs first
+    :return: {}, best, median and mean microseconds per call, and calls per second from the median
+    """
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times += [(time.perf_counter() - start) / calls * 1e6]
+    median = statistics.median(times)
+    return {'calls':calls, 'repeat':repeat, 'best_us':min(times), 'median_us':median,
+            'mean_us':statistics.mean(times), 'per_second':1e6 / median if median else 0.0}
+
+
+def random_games(count, seed=0):
+    """
+    Make random games, each a list of columns played until the board is full or someone wins.
+
+    :param count:   int, number of games
+    :param seed:    int
+    :return: [[int]]
+    """
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        board = Board()
+        moves = []
+        tile = 'X'
+        while not board.is_full():
+            col = rng.choice([col for col in range(board.width) if board.can_drop(col)])
+            row = board.drop(col, tile)
+            moves += [col]
+            if board.wins_at(row, col, tile):
+                break
+            tile = 'O' if tile == 'X' else 'X'
+        games += [moves]
+    return games
+
+
+def random_boards(count, seed=0):
+    """
+    Make boards with a random number of random moves played on them.
+
+    :param count:   int, number of boards
+    :param seed:    int
+    :return: [Board]
+    """
+    rng = random.Random(seed)
+    boards = []
+    for moves in random_games(count, seed):
+        board = Board()
+        for index, col in enumerate(moves[:rng.randint(0, len(moves))]):
+            board.drop(col, Board.TILES[index % 2])
+        boards += [board]
+    return boards
+
+
+def bench_update_board(repeat, games=200):
+    """
+    Play random games through Game.update_board, clearing the board between games.
+
+    :param repeat:  int, number of timed runs
+    :param games:   int, number of games each run
+    :return: {}, times per move
+    """
+    server = Server()
+    server.sock.close()
+    server.players = [[None, None, 'X'], [None, None, 'O']]
+    played = random_games(games)
+
+    def run():
+        for moves in played:
+            server.board.clear()
+            for index, col in enumerate(moves):
+                server.update_board(col, index % 2)
+    return measure(run, sum(len(moves) for moves in played), repeat)
+
+
+def bench_check_for_winner(repeat, boards=2000):
+    """
+    Check random positions with Game.check_for_winner for both tiles.
+
+    :param repeat:  int, number of timed runs
+    :param boards:  int, number of positions each run
+    :return: {}, times per check
+    """
+    server = Server()
+    server.sock.close()
+    positions = random_boards(boards)
+
+    def run():
+        for board in positions:
+            server.board = board
+            server.check_for_winner('X')
+            server.check_for_winner('O')
+    return measure(run, len(positions) * 2, repeat)
+
+
+def bench_codec(codec, msg, repeat, calls=20000):
+    """
+    Encode and decode the given message.
+
+    :param codec:   JsonCodec or BinaryCodec
+    :param msg:     {}
+    :param repeat:  int, number of timed runs
+    :param calls:   int, number of calls each run
+    :return: ({}, {}), times per encode and per decode
+    """
+    data = codec.encode(msg)
+
+    def encode():
+        for _ in range(calls):
+            codec.encode(msg)
+
+    def decode():
+        for _ in range(calls):
+            Codec.decode(data)
+    return measure(encode, calls, repeat), measure(decode, calls, repeat)
+
+
+def draw_moves(height=6, width=9, connect=5):
+    """
+    Find a game that fills the board without either player making a line, trying the lowest columns first.
+
+    :param height:  int, number of rows
+    :param width:   int, number of columns
+    :param connect: int, number of tiles in a row needed to win
+    :return: [int], columns played in order, starting with 'X'
+    """
+    board = Board(height, width, connect)
+    moves = []
+
+    def search():
+        if board.is_full():
+            return True
+        tile = Board.TILES[len(moves) % 2]
+        for col in range(width):
+            if board.can_drop(col):
+                row = board.drop(col, tile)
+                if not board.wins_at(row, col, tile):
+                    moves.append(col)
+                    if search():
+                        return True
+                    moves.pop()
+                board.undo(col)
+        return False
+    if not search():
+        raise ValueError("Every game on this board has a winner...")
+    return moves
+
+
+def percentile(times, fraction):
+    """
+    :param times:       [float], sorted
+    :param fraction:    float, 0 to 1
+    :return: float, the value below which the given fraction of times fall
+    """
+    return times[min(len(times) - 1, int(len(times) * fraction))]
+
+
+def bench_round_trip(codec, games):
+    """
+    Time MOVE messages sent to a real Server until the update for that move comes back.
+    The two players fill the board without making a line, then both ask to play again, for the given number of games.
+    The first game is a warmup and is not timed.
+
+    :param codec:   string, name of the codec to agree with the server
+    :param games:   int, number of timed games (54 moves each)
+    :return: {}, latency percentiles in microseconds
+    """
+    server = Server(port=0)
+    thread = threading.Thread(target=server.start, daemon=True)
+    running = threading.active_count()
+    times = []
+    players = []
+    thread.start()
+    while not server.port:
+        time.sleep(0.01)
+    for player in range(2):
+        sock = socket.create_connection((server.host, server.port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(10)
+        players += [(sock, Framing.FrameReader(sock))]
+    try:
+        # Handshakes: one for the first player on joining, then one each when the second joins
+        players[0][1].read()
+        for sock, reader in players:
+            reader.read()
+        for sock, reader in players:
+            sock.sendall(Framing.pack(Codec.JSON.encode({'type':'HELLO', 'name':"bench", 'replay':False,
+                                                           'codecs':[codec]})))
+            reader.read()
+        encoder = Codec.CODECS[codec]
+        moves = [Framing.pack(encoder.encode({'type':'MOVE', 'col':col})) for col in draw_moves()]
+        for game in range(games + 1):
+            # The players take turns, the first player first
+            for index, msg in enumerate(moves):
+                player = index % 2
+                sock, reader = players[player]
+                start = time.perf_counter()
+                sock.sendall(msg)
+                reader.read()
+                if game:
+                    times += [(time.perf_counter() - start) * 1e6]
+                players[1 - player][1].read()
+            # The last move was a draw, so both players ask to play again, and the first to ask moves first
+            for player in range(2):
+                players[player][0].sendall(Framing.pack(encoder.encode({'type':'HELLO', 'name':"bench",
+                                                                         'replay':True})))
+                players[player][1].read()
+            players[0][1].read()
+    finally:
+        for sock, reader in players:
+            sock.close()
+        # Wait for the servers threads to see the sockets close
+        deadline = time.monotonic() + 5
+        while threading.active_count() > running and time.monotonic() < deadline:
+            time.sleep(0.01)
+        server.sock.close()
+    times.sort()
+    return {'calls':len(times), 'p50_us':percentile(times, 0.5), 'p90_us':percentile(times, 0.9),
+            'p99_us':percentile(times, 0.99), 'min_us':times[0], 'max_us':times[-1],
+            'mean_us':statistics.mean(times)}
+
+
+def commit():
+    """
+    :return: string, the current git commit (or None if it is not known)
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(repeat=5, games=20):
+    """
+    Run every benchmark.
+
+    :param repeat:  int, number of timed runs of each micro benchmark
+    :param games:   int, number of games for the round trip benchmarks
+    :return: {}, results by benchmark name, with details of where they were run
+    """
+    results = {
+        'update_board': bench_update_board(repeat),
+        'check_for_winner': bench_check_for_winner(repeat),
+    }
+    for codec in (Codec.JSON, Codec.BINARY):
+        for name, msg in MESSAGES.items():
+            encode, decode = bench_codec(codec, msg, repeat)
+            results['%s_encode_%s' % (codec.name, name)] = encode
+            results['%s_decode_%s' % (codec.name, name)] = decode
+    for codec in Codec.CODECS:
+        results['round_trip_%s' % codec] = bench_round_trip(codec, games)
+    return {'commit':commit(), 'time':time.strftime('%Y-%m-%dT%H:%M:%S'), 'python':platform.python_version(),
+            'platform':platform.platform(), 'results':results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the board, codecs and server.")
+    parser.add_argument('--repeat', type=int, default=5, help="number of timed runs of each benchmark")
+    parser.add_argument('--games', type=int, default=20, help="number of games for the round trip benchmarks")
+    parser.add_argument('--output', default=None, help="file to write the JSON results to (default stdout)")
+    args = parser.parse_args()
+    report = run(args.repeat, args.games)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        for name, result in sorted(report['results'].items()):
+            if 'p50_us' in result:
+                print("%-28s p50 %9.1fus  p99 %9.1fus" % (name, result['p50_us'], result['p99_us']))
+            else:
+                print("%-28s %9.3fus  %12.0f/s" % (name, result['median_us'], result['per_second']))
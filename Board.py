@@ -0,0 +1,272 @@
+import random
+
+# Directions a line can run in, as (row step, column step), in the same order as the checks in check_for_winner
+DIRECTIONS = (('horizontal', 0, 1), ('vertical', 1, 0), ('rising diagonal', -1, 1), ('falling diagonal', 1, 1))
+
+
+class Geometry(object):
+
+    def __init__(self, height, width, connect):
+        """
+        Tables that only depend on the size of the board and the number of tiles needed in a row.
+        Building them walks every line on the board, so use get_geometry, which builds them once for each size.
+
+        :param height:  int, number of rows
+        :param width:   int, number of columns
+        :param connect: int, number of tiles in a row needed to win
+        """
+        if height < 1 or width < 1 or not 1 < connect <= max(height, width):
+            raise ValueError("Invalid board geometry: %ix%i connect-%i" % (height, width, connect))
+        self.height = height
+        self.width = width
+        self.connect = connect
+        # Shifts between neighbouring bits in each direction
+        self.shifts = (height + 1, 1, height + 2, height)
+        # Every winning line as (bitmask, direction), and the bitmasks of the lines through each cell
+        self.lines = []
+        self.cell_lines = [[[] for _ in range(width)] for _ in range(height)]
+        for row in range(height):
+            for col in range(width):
+                for direction, (name, d_row, d_col) in enumerate(DIRECTIONS):
+                    cells = [(row + d_row * i, col + d_col * i) for i in range(connect)]
+                    if not all(0 <= r < height and 0 <= c < width for r, c in cells):
+                        continue
+                    line = 0
+                    for r, c in cells:
+                        line |= self.bit(r, c)
+                    self.lines += [(line, direction)]
+                    for r, c in cells:
+                        self.cell_lines[r][c] += [line]
+        # Random Zobrist keys for each tile in each bit of the bitboard, and the key of the same cell mirrored
+        # left to right, so a board can keep the hash of its mirror image as well as its own.
+        # The generator is seeded so every board of this size hashes the same way.
+        rng = random.Random("%ix%i" % (height, width))
+        bits = width * (height + 1)
+        self.base = rng.getrandbits(64)
+        self.side = rng.getrandbits(64)
+        self.zobrist = {}
+        self.mirror_zobrist = {}
+        for tile in ('X', 'O'):
+            keys = [rng.getrandbits(64) for _ in range(bits)]
+            self.zobrist[tile] = keys
+            self.mirror_zobrist[tile] = [keys[(width - 1 - index // (height + 1)) * (height + 1) + index % (height + 1)]
+                                         for index in range(bits)]
+
+    def bit(self, row, column):
+        """
+        Get the bit for the given cell. Row 0 is the top of the board.
+
+        :param row:     int, 0 to height-1
+        :param column:  int, 0 to width-1
+        :return: int, single bit mask
+        """
+        return 1 << (column * (self.height + 1) + self.height - 1 - row)
+
+
+GEOMETRIES = {}
+
+
+def get_geometry(height, width, connect):
+    """
+    Get the tables for the given board size, building them the first time each size is used.
+
+    :param height:  int, number of rows
+    :param width:   int, number of columns
+    :param connect: int, number of tiles in a row needed to win
+    :return: Geometry
+    """
+    key = (height, width, connect)
+    if key not in GEOMETRIES:
+        GEOMETRIES[key] = Geometry(height, width, connect)
+    return GEOMETRIES[key]
+
+
+class Board(object):
+
+    TILES = ('X', 'O')
+
+    def __init__(self, height=6, width=9, connect=5):
+        """
+        Initialises the game board.
+        The board is stored as one bitboard (int) per tile plus the number of tiles in each column.
+        Each column uses height+1 bits, counted from the bottom row upwards; the extra padding bit
+        stops lines from wrapping over into the next column.
+
+        :param height:  int, number of rows
+        :param width:   int, number of columns
+        :param connect: int, number of tiles in a row needed to win
+        """
+        self.geometry = get_geometry(height, width, connect)
+        self.height = height
+        self.width = width
+        self.connect = connect
+        self.masks = {'X': 0, 'O': 0}
+        self.heights = [0] * width
+        self.shifts = self.geometry.shifts
+        # Zobrist hashes of the board and of its mirror image, kept up to date by every change to the board
+        self.hash = self.geometry.base
+        self.mirror_hash = self.geometry.base
+
+    def bit(self, row, column):
+        """
+        Get the bit for the given cell. Row 0 is the top of the board.
+
+        :param row:     int, 0 to height-1
+        :param column:  int, 0 to width-1
+        :return: int, single bit mask
+        """
+        return self.geometry.bit(row, column)
+
+    def get(self, row, column):
+        """
+        Get the tile in the given cell.
+
+        :param row:     int, 0 to height-1
+        :param column:  int, 0 to width-1
+        :return: string, 'X' or 'O' (or None if empty)
+        """
+        bit = self.bit(row, column)
+        for tile in self.TILES:
+            if self.masks[tile] & bit:
+                return tile
+        return None
+
+    def set(self, row, column, tile):
+        """
+        Put a tile in the given cell without applying gravity, e.g. when mirroring the servers board.
+
+        :param row:     int, 0 to height-1
+        :param column:  int, 0 to width-1
+        :param tile:    string, 'X' or 'O'
+        """
+        bit = self.bit(row, column)
+        index = bit.bit_length() - 1
+        for other in self.TILES:
+            if self.masks[other] & bit:
+                self.masks[other] &= ~bit
+                self.toggle(index, other)
+        self.masks[tile] |= bit
+        self.toggle(index, tile)
+        self.heights[column] = max(self.heights[column], self.height - row)
+
+    def can_drop(self, column):
+        """
+        Check if a tile can be put in the given column.
+
+        :param column: int, 0 to width-1
+        :return: boolean, True if the column is not full
+        """
+        return self.heights[column] < self.height
+
+    def drop(self, column, tile):
+        """
+        Puts the given tile in the given column at the lowest possible row.
+
+        :param column:  int, 0 to width-1
+        :param tile:    string, 'X' or 'O'
+        :return: row, 0 to height-1 (or None if the column is full)
+        """
+        filled = self.heights[column]
+        if filled >= self.height:
+            return None
+        index = column * (self.height + 1) + filled
+        self.masks[tile] |= 1 << index
+        self.heights[column] = filled + 1
+        self.hash ^= self.geometry.zobrist[tile][index]
+        self.mirror_hash ^= self.geometry.mirror_zobrist[tile][index]
+        return self.height - 1 - filled
+
+    def undo(self, column):
+        """
+        Take the top tile out of the given column, e.g. when searching ahead.
+
+        :param column: int, 0 to width-1
+        """
+        filled = self.heights[column] - 1
+        index = column * (self.height + 1) + filled
+        bit = 1 << index
+        for tile in self.TILES:
+            if self.masks[tile] & bit:
+                self.masks[tile] &= ~bit
+                self.toggle(index, tile)
+        self.heights[column] = filled
+
+    def toggle(self, index, tile):
+        """
+        Add or remove a tile from both hashes.
+
+        :param index:   int, bit index of the cell
+        :param tile:    string, 'X' or 'O'
+        """
+        self.hash ^= self.geometry.zobrist[tile][index]
+        self.mirror_hash ^= self.geometry.mirror_zobrist[tile][index]
+
+    def copy(self):
+        """
+        Get a copy of the board that can be changed without changing this one.
+
+        :return: Board
+        """
+        board = Board(self.height, self.width, self.connect)
+        board.masks = dict(self.masks)
+        board.heights = list(self.heights)
+        board.hash = self.hash
+        board.mirror_hash = self.mirror_hash
+        return board
+
+    def has_won(self, tile):
+        """
+        Check the board and see if the given tile has enough in a row to win.
+
+        :param tile: string, 'X' or 'O'
+        :return: boolean, True if enough in a row, False otherwise
+        """
+        mask = self.masks[tile]
+        for shift in self.shifts:
+            line = mask
+            for step in range(1, self.connect):
+                line &= mask >> (shift * step)
+            if line:
+                return True
+        return False
+
+    def wins_at(self, row, column, tile):
+        """
+        Check if the tile in the given cell is part of a winning line.
+        Only the lines through the cell are checked, so this is all that needs checking after a move.
+
+        :param row:     int, 0 to height-1
+        :param column:  int, 0 to width-1
+        :param tile:    string, 'X' or 'O'
+        :return: boolean, True if enough in a row, False otherwise
+        """
+        mask = self.masks[tile]
+        for line in self.geometry.cell_lines[row][column]:
+            if mask & line == line:
+                return True
+        return False
+
+    def is_full(self):
+        """
+        Check if every column is full.
+
+        :return: boolean, True if no more tiles can be put on the board
+        """
+        return sum(self.heights) == self.height * self.width
+
+    def clear(self):
+        """
+        Remove every tile from the board.
+        """
+        self.masks = {'X': 0, 'O': 0}
+        self.heights = [0] * self.width
+        self.hash = self.geometry.base
+        self.mirror_hash = self.geometry.base
+
+    def to_list(self):
+        """
+        Get the board as a height x width matrix (list of lists) of 'X', 'O' or None.
+
+        :return: [[]]
+        """
+        return [[self.get(row, col) for col in range(self.width)] for row in range(self.height)]
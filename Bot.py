@@ -0,0 +1,67 @@
+import argparse
+from Client import Client
+from Search import Search
+from TranspositionTable import TranspositionTable
+
+
+class Bot(Client):
+
+    def __init__(self, host='127.0.0.1', port=80, name="Bot", time_limit=1.0, games=1, table_size=16 * 1024 * 1024):
+        """
+        Computer player that joins a server through the normal protocol, like a Client, but picks its own moves
+        with a Search instead of asking the user.
+
+        :param host:        string, IP address
+        :param port:        int, port number
+        :param name:        string, name sent to the server
+        :param time_limit:  float, seconds to think about each move
+        :param games:       int, number of games to play before quitting
+        :param table_size:  int, bytes of memory for the transposition table, kept from one move to the next
+        """
+        Client.__init__(self, host, port)
+        self.name = name
+        self.time_limit = time_limit
+        self.games = games
+        self.table = TranspositionTable(table_size)
+
+    def choose_move(self):
+        """
+        Search for the best move on a copy of the board.
+        The bot only knows its tile once a move has been made; with an empty board it must be the first player, 'X'.
+
+        :return: int, column to place tile
+        """
+        tile = self.tile or 'X'
+        return Search(self.board.copy(), self.time_limit, table=self.table).best_move(tile)
+
+    def try_again(self, msg=None):
+        """
+        Play again until enough games have been played. Never retries a failed connection.
+
+        :param msg: string, question that would be asked of the user
+        :return: boolean, True to play again
+        """
+        if msg is None:
+            return False
+        self.games -= 1
+        return self.games > 0
+
+    def print_board(self):
+        """
+        Bots have no one to show the board to.
+        """
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Connect-5 computer player.")
+    parser.add_argument('host', nargs='?', default='127.0.0.1', help="IP address of the server")
+    parser.add_argument('port', nargs='?', type=int, default=80, help="port number of the server")
+    parser.add_argument('--name', default="Bot", help="name to play under")
+    parser.add_argument('--time', type=float, default=1.0, help="seconds to think about each move")
+    parser.add_argument('--games', type=int, default=1, help="number of games to play")
+    parser.add_argument('--table', type=int, default=16, help="megabytes of memory for the transposition table")
+    args = parser.parse_args()
+    b = Bot(host=args.host, port=args.port, name=args.name, time_limit=args.time, games=args.games,
+            table_size=args.table * 1024 * 1024)
+    b.start()
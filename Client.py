@@ -1,41 +1,50 @@
 import socket
-import json
 import sys
+import Codec
+import Framing
+from Board import Board
 
 
 class Client(object):
 
 
-    def __init__(self, host='127.0.0.1', port=80):
+    def __init__(self, host='127.0.0.1', port=80, spectate=False):
         """
         Initialises clients attributes.
         If a socket, host or port is not given then a new socket will be created, host will be local and port will be 80.
-        Game board is represented as a 6x9 matrix (list of lists).
+        Game board is represented as a 6x9 bitboard (see Board).
 
-        :param sock: socket.socket, or None
-        :param host: string, IP address
-        :param port: int, port number
+        :param sock:        socket.socket, or None
+        :param host:        string, IP address
+        :param port:        int, port number
+        :param spectate:    boolean, True to watch a game instead of playing
         """
         height = 6
         width = 9
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.reader = Framing.FrameReader(self.sock)
+        self.codec = Codec.JSON
         self.host = host
         self.port = port
         self.game_over = True
-        self.board = [[None] * width for _ in range(height)]
+        self.board = Board(height, width)
         self.name = None
+        self.tile = None
         self.move = None
         self.stop = False
         self.replay = True
+        self.spectate = spectate
 
     def start(self):
         """
-        Starts client-side of the game. User must enter their name and the client attempts to join server.
+        Starts client-side of the game. User must enter their name (unless it is already set) and the client
+        attempts to join server.
         If a connection cannot be made the user can try again. If not the client will close.
         After a game has ended the users can decide if they want to play again or not.
         """
         print("Connect-5 client started")
-        self.name = input("Please enter your name: ")
+        if self.name is None:
+            self.name = input("Please enter your name: ")
         while not self.stop:
             print("Connecting to server...")
             if self.connect():
@@ -44,7 +53,11 @@ class Client(object):
                 while self.replay:
                     self.game()
                     if not self.stop:
-                        if self.try_again("Would you like to play again? (y/n)"):
+                        if self.spectate:
+                            question = "Would you like to watch another game? (y/n)"
+                        else:
+                            question = "Would you like to play again? (y/n)"
+                        if self.try_again(question):
                             self.send_handshake(replay=True)
                         else:
                             self.send_quit()
@@ -65,76 +78,129 @@ class Client(object):
         while not self.game_over:
             self.print_board()
             if self.move:
-                col = None
-                while not self.check_move(col):
-                    col = input("It's your turn, please enter a column between 1-9 (or 0 to quit): ")
-                    try:
-                        col = int(col) - 1
-                    except ValueError:
-                        print("Please enter a number...")
+                col = self.choose_move()
                 self.send_move(col)
                 self.receive()
+            elif self.spectate:
+                print("Waiting for the next move...")
+                self.receive()
             else:
                 print("Waiting for opponent to make their move...")
                 self.receive()
         self.print_board()
 
+    def choose_move(self):
+        """
+        Ask the user for their move until a valid one is entered.
+
+        :return: int, column to place tile (-1 to quit game)
+        """
+        col = None
+        while not self.check_move(col):
+            col = input("It's your turn, please enter a column between 1-%i (or 0 to quit): " % self.board.width)
+            try:
+                col = int(col) - 1
+            except ValueError:
+                print("Please enter a number...")
+                col = None
+        return col
+
     def process(self, msg):
         """
-        Processes message received from server. Message must be in JSON format or an exception is raised.
-        There are three message types;
-        'HELLO': Tells the client if they have to wait for a second player, and when to make their first move.
+        Processes message received from server. Message must be in JSON or binary format (see Codec) or an
+        exception is raised.
+        There are six message types;
+        'HELLO': Tells the client if they have to wait for a second player, when to make their first move and
+                 the size of the board, or which codec the server has picked.
+        'WATCH': Tells a spectator who is playing and the moves made so far.
         'MOVE' : Updates the clients board and if it is the clients turn to make a move or not.
         'OVER' : Lets the client know the game is over and who the winner is.
+        'ERROR': Tells the client the server refused a message, e.g. a move into a full column.
+        'PING' : Checks the client is still there, and is answered with a PONG message.
 
-        :param msg: JSON file
+        :param msg: bytes or string, encoded message
         """
         try:
-            msg = json.loads(msg)
+            msg = Codec.decode(msg)
             if msg['type'] == 'HELLO':
-                if msg['wait']:
-                    print("Waiting for opponent to respond...")
+                # A new game starts on a new board, of the size the server is using
+                if msg.get('height'):
+                    self.board = Board(msg['height'], msg['width'], msg['connect'])
+                    self.tile = None
+                if 'codec' in msg:
+                    self.codec = Codec.CODECS.get(msg['codec'], Codec.JSON)
+                    self.receive()
+                elif msg['wait']:
+                    self.show("Waiting for opponent to respond...")
                     self.receive()
                 else:
-                    print("Game is beginning!")
+                    self.show("Game is beginning!")
                     if msg['move']:
-                        print("You are making the first move.")
+                        self.show("You are making the first move.")
                         self.move = True
                     else:
-                        print("Your opponent is making their move.")
+                        self.show("Your opponent is making their move.")
                         self.move = False
                         self.receive()
+            elif msg['type'] == 'WATCH':
+                self.board = Board(msg['height'], msg['width'], msg['connect'])
+                # 'O' moves first when 'X' was the second to ask to play again
+                tiles = Board.TILES if msg.get('first', 'X') == 'X' else Board.TILES[::-1]
+                for index, col in enumerate(msg['moves']):
+                    self.board.drop(col, tiles[index % 2])
+                self.move = False
+                self.show("Watching %s (X) against %s (O)" % tuple(msg['players']))
             elif msg['type'] == 'MOVE':
                 row = int(msg['row'])
                 col = int(msg['col'])
-                self.board[row][col] = msg['tile']
+                self.board.set(row, col, msg['tile'])
                 self.move = msg['move']
+                # The tile just placed is ours if it is now the opponents move
+                if self.move:
+                    self.tile = 'O' if msg['tile'] == 'X' else 'X'
+                else:
+                    self.tile = msg['tile']
             elif msg['type'] == 'OVER':
                 winner = msg['name']
                 if msg['final']:
                     self.stop = True
                     self.replay = False
-                    print("Unable to play again, your opponent has left.")
+                    if self.spectate:
+                        self.show("There is no game to watch.")
+                    else:
+                        self.show("Unable to play again, your opponent has left.")
                 else:
                     if msg['quit']:
                         if winner == self.name:
-                            print("Your opponent has quit!")
+                            self.show("Your opponent has quit!")
                     else:
                         row = int(msg['row'])
                         col = int(msg['col'])
-                        self.board[row][col] = msg['tile']
-                    print("Game over!")
-                    print("%s is the winner!" % winner)
+                        self.board.set(row, col, msg['tile'])
+                    self.show("Game over!")
+                    if msg.get('draw'):
+                        self.show("It's a draw!")
+                    else:
+                        self.show("%s is the winner!" % winner)
                 self.game_over = True
+            elif msg['type'] == 'ERROR':
+                self.show("The server refused that: %s" % msg['message'])
+                # A move that was not allowed can be made again
+                if msg['code'] in ('column', 'full'):
+                    self.move = True
+            elif msg['type'] == 'PING':
+                self.send({'type':'PONG'})
+                # Whatever the client was waiting for is still to come
+                self.receive()
             else:
-                print("JSON held no data...")
+                self.show("JSON held no data...")
         except ValueError:
             raise ValueError
 
     def check_move(self, move):
         """
-        Check input from user. Must be an int between 0 and 9 entered.
-        0 means the user wants to quit; 1-9 is the column a tile is to be placed in.
+        Check input from user. Must be an int between 0 and the board width entered.
+        0 means the user wants to quit; 1 upwards is the column a tile is to be placed in.
         User must confirm if they wish to quit.
 
         :param move: int, column to place tile (0 to quit game)
@@ -142,18 +208,18 @@ class Client(object):
         """
         accept = False
         if move is not None:
-            if move < -1 or move > 8:
-                print("Enter a number between 0-9...")
+            if move < -1 or move >= self.board.width:
+                self.show("Enter a number between 0-%i..." % self.board.width)
             elif move == -1:
                 confirm = ""
                 while confirm != "y" and confirm != "n":
                     confirm = input("Are you sure you want to quit? (y/n)")
                 if confirm  == "y":
                     accept = True
-            elif self.board[0][move] is None:
+            elif self.board.can_drop(move):
                 accept = True
             else:
-                print("Column %i is full..." % move)
+                self.show("Column %i is full..." % move)
         return accept
 
     @staticmethod
@@ -174,6 +240,14 @@ class Client(object):
             return True
         return False
 
+    def show(self, text):
+        """
+        Show a message to the user.
+
+        :param text: string
+        """
+        print(text)
+
     def connect(self):
         """
         Connect to given server using host IP address and port number.
@@ -193,22 +267,24 @@ class Client(object):
         """
         Receives message and updates client accordingly.
         """
-        msg = self.sock.recv(1024).decode()
+        msg = self.reader.read()
         self.process(msg)
 
     def send(self, msg):
         """
-        Turn msg into JSON and encode before sending to server.
+        Encode msg with the agreed codec and frame it before sending to server.
 
         :param msg: {}
         """
-        self.sock.send(json.dumps(msg).encode())
+        self.sock.sendall(Framing.pack(self.codec.encode(msg)))
 
     def send_handshake(self, replay=False):
         """
-        Send initial message to server with users name.
+        Send initial message to server with users name, the codecs the client supports and whether they are
+        watching or playing.
         """
-        msg = {'type':'HELLO', 'name':self.name, 'replay':replay}
+        msg = {'type':'HELLO', 'name':self.name, 'replay':replay, 'codecs':Codec.PREFERENCE,
+               'spectate':self.spectate}
         self.send(msg)
 
     def send_quit(self):
@@ -235,26 +311,36 @@ class Client(object):
         """
         Prints game board.
         """
-        for row in range(6):
+        for row in range(self.board.height):
             print("")
-            for col in range(9):
-                if self.board[row][col] is None:
+            for col in range(self.board.width):
+                tile = self.board.get(row, col)
+                if tile is None:
                     print("[ ]", end="")
                 else:
-                    print("[%s]" % self.board[row][col], end="")
+                    print("[%s]" % tile, end="")
         print("")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) == 1:
-        c = Client()
+    spectate = '--watch' in sys.argv
+    # The terminal client needs a selectable standard input and a terminal that understands ANSI escapes
+    simple = '--simple' in sys.argv or sys.platform == 'win32' or not sys.stdout.isatty()
+    args = [arg for arg in sys.argv if arg not in ('--watch', '--simple')]
+    if simple:
+        client_class = Client
+    else:
+        # Imported here, as the terminal client is built on this module
+        from TerminalClient import TerminalClient
+        client_class = TerminalClient
+    if len(args) == 1:
+        c = client_class(spectate=spectate)
         c.start()
-    elif len(sys.argv) == 2:
-        c = Client(host=sys.argv[1])
+    elif len(args) == 2:
+        c = client_class(host=args[1], spectate=spectate)
         c.start()
-    elif len(sys.argv) == 3:
-        c = Client(host=sys.argv[1], port=int(sys.argv[2]))
+    elif len(args) == 3:
+        c = client_class(host=args[1], port=int(args[2]), spectate=spectate)
         c.start()
     else:
         print("Too many arguments provided.")
-
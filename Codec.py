@@ -0,0 +1,189 @@
+import json
+import struct
+
+
+class JsonCodec(object):
+
+    name = 'json'
+
+    @staticmethod
+    def encode(msg):
+        """
+        Turn msg into JSON and encode it.
+
+        :param msg: {}
+        :return: bytes
+        """
+        return json.dumps(msg).encode()
+
+    @staticmethod
+    def decode(payload):
+        """
+        Decode a JSON message.
+
+        :param payload: bytes
+        :return: {}
+        """
+        return json.loads(payload.decode())
+
+    @staticmethod
+    def set_flag(payload, key):
+        """
+        Turn on a flag that is False in an encoded message, without encoding the message again.
+        The flag must be the first key with that name in the message, as in the messages the servers send.
+
+        :param payload: bytes, encoded message
+        :param key:     string, e.g. 'move'
+        :return: bytes
+        """
+        old = ('"%s": false' % key).encode()
+        if old not in payload:
+            raise ValueError("Message has no %s flag to set..." % key)
+        return payload.replace(old, ('"%s": true' % key).encode(), 1)
+
+
+class BinaryCodec(object):
+    """
+    Fixed layout encoding of the HELLO, MOVE and OVER messages.
+    Every message starts with a type byte and a flags byte. HELLO then has a byte each for the board height, width
+    and tiles in a row needed to win (0 for None). MOVE and OVER have a signed byte each for the row and column
+    (-1 for None). HELLO and OVER end with the UTF-8 name. A MOVE is 4 bytes.
+    Any other message type is sent as JSON, which decode tells apart by its leading '{'.
+    """
+
+    name = 'binary'
+    TYPES = {'HELLO': 1, 'MOVE': 2, 'OVER': 3}
+    NAMES = {1: 'HELLO', 2: 'MOVE', 3: 'OVER'}
+    HEADER = struct.Struct('!BB')
+    HELLO = struct.Struct('!BBBBB')
+    GEOMETRY = ('height', 'width', 'connect')
+    CELL = struct.Struct('!BBbb')
+    # Flag bits for each message type
+    HELLO_FLAGS = ('wait', 'move', 'replay', 'spectate')
+    MOVE_FLAGS = ('move',)
+    OVER_FLAGS = ('quit', 'final', 'draw')
+    FLAGS = {1: HELLO_FLAGS, 2: MOVE_FLAGS, 3: OVER_FLAGS}
+    TILE_X = 0x40
+    TILE_O = 0x80
+
+    def encode(self, msg):
+        """
+        Encode msg using the fixed layout for its type.
+
+        :param msg: {}
+        :return: bytes
+        """
+        kind = self.TYPES.get(msg['type'])
+        if kind is None:
+            return JsonCodec.encode(msg)
+        if kind == 1:
+            flags = self.pack_flags(msg, self.HELLO_FLAGS)
+            geometry = [msg.get(key) or 0 for key in self.GEOMETRY]
+            return self.HELLO.pack(kind, flags, *geometry) + (msg.get('name') or "").encode()
+        if kind == 2:
+            flags = self.pack_flags(msg, self.MOVE_FLAGS) | self.pack_tile(msg)
+            return self.CELL.pack(kind, flags, self.pack_int(msg, 'row'), self.pack_int(msg, 'col'))
+        flags = self.pack_flags(msg, self.OVER_FLAGS) | self.pack_tile(msg)
+        return self.CELL.pack(kind, flags, self.pack_int(msg, 'row'), self.pack_int(msg, 'col')) \
+            + (msg.get('name') or "").encode()
+
+    def decode(self, payload):
+        """
+        Decode a message in the fixed layout.
+
+        :param payload: bytes
+        :return: {}
+        """
+        try:
+            kind, flags = self.HEADER.unpack_from(payload)
+            msg = {'type': self.NAMES[kind]}
+            if kind == 1:
+                geometry = self.HELLO.unpack_from(payload)[2:]
+                msg.update(self.unpack_flags(flags, self.HELLO_FLAGS))
+                msg.update((key, value or None) for key, value in zip(self.GEOMETRY, geometry))
+                msg['name'] = payload[self.HELLO.size:].decode()
+            else:
+                kind, flags, row, column = self.CELL.unpack_from(payload)
+                msg['row'] = None if row < 0 else row
+                msg['col'] = None if column < 0 else column
+                msg['tile'] = 'X' if flags & self.TILE_X else 'O' if flags & self.TILE_O else None
+                if kind == 2:
+                    msg.update(self.unpack_flags(flags, self.MOVE_FLAGS))
+                else:
+                    msg.update(self.unpack_flags(flags, self.OVER_FLAGS))
+                    msg['name'] = payload[self.CELL.size:].decode()
+        except (struct.error, KeyError):
+            raise ValueError("Received data is not a valid binary message...")
+        return msg
+
+    def set_flag(self, payload, key):
+        """
+        Turn on a flag that is False in an encoded message, without encoding the message again.
+
+        :param payload: bytes, encoded message
+        :param key:     string, e.g. 'move'
+        :return: bytes
+        """
+        if payload[:1] == b'{':
+            return JsonCodec.set_flag(payload, key)
+        names = self.FLAGS.get(payload[0], ())
+        if key not in names:
+            raise ValueError("Message has no %s flag to set..." % key)
+        return payload[:1] + bytes([payload[1] | 1 << names.index(key)]) + payload[2:]
+
+    @staticmethod
+    def pack_flags(msg, names):
+        flags = 0
+        for bit, name in enumerate(names):
+            if msg.get(name):
+                flags |= 1 << bit
+        return flags
+
+    @staticmethod
+    def unpack_flags(flags, names):
+        return {name: bool(flags & (1 << bit)) for bit, name in enumerate(names)}
+
+    def pack_tile(self, msg):
+        return {'X': self.TILE_X, 'O': self.TILE_O}.get(msg.get('tile'), 0)
+
+    @staticmethod
+    def pack_int(msg, key):
+        value = msg.get(key)
+        return -1 if value is None else int(value)
+
+
+JSON = JsonCodec()
+BINARY = BinaryCodec()
+# Supported codecs, most preferred first
+CODECS = {BINARY.name: BINARY, JSON.name: JSON}
+PREFERENCE = [BINARY.name, JSON.name]
+
+
+def decode(payload):
+    """
+    Decode a message from either codec. JSON messages always start with '{', so no state is needed to tell them apart.
+
+    :param payload: bytes or string
+    :return: {}
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    if not payload:
+        raise ValueError("Received no data...")
+    if payload[:1] == b'{':
+        return JSON.decode(payload)
+    return BINARY.decode(payload)
+
+
+def negotiate(offered):
+    """
+    Choose the codec to use with a client from the names it offered. Clients that offer nothing get JSON.
+
+    :param offered: [string] (or None)
+    :return: JsonCodec or BinaryCodec
+    """
+    if offered:
+        for name in PREFERENCE:
+            if name in offered:
+                return CODECS[name]
+    return JSON
@@ -0,0 +1,106 @@
+import asyncio
+import struct
+
+# Every frame is a 2 byte big-endian payload length followed by the payload
+HEADER = struct.Struct('!H')
+MAX_SIZE = 0xFFFF
+
+
+def pack(payload):
+    """
+    Put the length prefix in front of the payload.
+
+    :param payload: bytes, at most MAX_SIZE long
+    :return: bytes, the frame
+    """
+    if len(payload) > MAX_SIZE:
+        raise ValueError("Frame is too large...")
+    return HEADER.pack(len(payload)) + payload
+
+
+def send_frames(sock, frames):
+    """
+    Send every frame, writing them together with a single vectored write where the platform has one. Like
+    socket.sendall it carries on until everything has been sent, however little each write takes.
+
+    :param sock:    socket.socket, blocking or with a timeout
+    :param frames:  [bytes]
+    """
+    if len(frames) == 1 or not hasattr(sock, 'sendmsg'):
+        sock.sendall(b''.join(frames))
+        return
+    views = [memoryview(frame) for frame in frames]
+    while views:
+        sent = sock.sendmsg(views)
+        while views and sent >= len(views[0]):
+            sent -= len(views[0])
+            views.pop(0)
+        if sent:
+            views[0] = views[0][sent:]
+
+
+async def read_frame(reader):
+    """
+    Read one frame from an asyncio stream.
+
+    :param reader: asyncio.StreamReader
+    :return: bytes, the payload (or b'' if the stream has closed)
+    """
+    try:
+        header = await reader.readexactly(HEADER.size)
+        return await reader.readexactly(HEADER.unpack(header)[0])
+    except asyncio.IncompleteReadError:
+        return b''
+
+
+class FrameReader(object):
+
+    def __init__(self, sock):
+        """
+        Buffered reader that splits the bytes received from a socket back into frames.
+        One recv may hold several frames, or only part of one, so anything left over is kept for the next read.
+
+        :param sock: socket.socket
+        """
+        self.sock = sock
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """
+        Add received bytes to the buffer.
+
+        :param data: bytes
+        """
+        self.buffer += data
+
+    def next_frame(self):
+        """
+        Take the next complete frame out of the buffer.
+
+        :return: bytes, the payload (or None if a whole frame has not been received yet)
+        """
+        if len(self.buffer) < HEADER.size:
+            return None
+        end = HEADER.size + HEADER.unpack_from(self.buffer)[0]
+        if len(self.buffer) < end:
+            return None
+        payload = bytes(self.buffer[HEADER.size:end])
+        del self.buffer[:end]
+        return payload
+
+    def read(self):
+        """
+        Block until the next frame has been received.
+        If the socket has a timeout and nothing arrives in time socket.timeout is raised, and whatever has been
+        received so far is kept for the next read.
+
+        :return: bytes, the payload (or b'' if the socket has closed)
+        """
+        payload = self.next_frame()
+        while payload is None:
+            data = self.sock.recv(4096)
+            if not data:
+                return b''
+            self.feed(data)
+            payload = self.next_frame()
+        return payload
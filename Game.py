@@ -0,0 +1,527 @@
+import logging
+import struct
+import time
+import Codec
+import Framing
+import Metrics
+from Board import Board
+from GameLog import GameRecord, check_name, check_width
+
+logger = logging.getLogger(__name__)
+
+# Heartbeats, sent to players who have been quiet for a while to check they are still there
+PING = {'type':'PING'}
+PONG = {'type':'PONG'}
+# Message types players may send; anything else is counted as 'invalid', so players cannot add metric labels
+TYPES = ('HELLO', 'MOVE', 'OVER', 'PING', 'PONG')
+
+
+class Game(object):
+
+    def __init__(self, height=6, width=9, connect=5, log=None, results=None):
+        """
+        Initialises the game state shared by every kind of server.
+        Game board is represented as a bitboard (see Board), 6x9 with 5 in a row to win unless told otherwise.
+        Writing messages depends on how the players are connected, so subclasses must implement write.
+
+        :param height:  int, number of rows
+        :param width:   int, number of columns
+        :param connect: int, number of tiles in a row needed to win
+        :param log:     GameLog, where finished games are recorded (or None)
+        :param results: ResultsStore, where finished games are rated (or None)
+        """
+        if log is not None:
+            check_width(width)
+        self.players = []
+        self.game_over = True
+        self.replay = False
+        self.board = Board(height, width, connect)
+        self.moves = []
+        self.log = log
+        self.results = results
+        self.playing = False
+        self.last_move = None
+        # The player whose move it is (or None if no game is being played)
+        self.turn = None
+        # The tile that made the first move of the game being played
+        self.first = 'X'
+
+    def client_setup(self, player, clientsocket, address):
+        """
+        Saves clients data, assigns 'X' tile if first player and 'O' if second player.
+        Initial handshake messages are sent out to the clients.
+
+        :param player:          int, 0 for the first player, 1 for the second
+        :param clientsocket:    socket.socket, clients socket object
+        :param address:         string, clients address
+        """
+        if player == 0:
+            self.players += [[clientsocket, address, 'X']]
+            logger.info("Player one has joined!")
+            self.send_handshake(player=player, wait=True, move=False)
+            self.game_over = False
+        else:
+            self.players += [[clientsocket, address, 'O']]
+            logger.info("Player two has joined!")
+            self.start_game()
+            self.send_handshake(player=player, wait=False, move=False)
+            self.send_handshake(player=not player, wait=False, move=True)
+
+    def start_game(self, first=0):
+        """
+        Count a new game as started.
+
+        :param first: int, the player who makes the first move
+        """
+        self.turn = first
+        self.first = self.players[first][2]
+        self.playing = True
+        self.last_move = time.perf_counter()
+        Metrics.GAMES_STARTED.inc()
+        Metrics.ACTIVE_GAMES.inc()
+
+    def process(self, msg, player):
+        """
+        Processes messages received from the clients (see handle), counting them and timing how long each takes.
+
+        :param msg:     bytes, encoded message
+        :param player:  int, 0 for first player, 1 for second
+        :return: string, the message type (or 'invalid' if it could not be decoded or is not one of TYPES)
+        """
+        start = time.perf_counter()
+        kind = self.handle(msg, player) or 'invalid'
+        self.flush()
+        Metrics.MESSAGES.inc(kind)
+        Metrics.PROCESS_SECONDS.observe(time.perf_counter() - start, kind)
+        return kind
+
+    def handle(self, msg, player):
+        """
+        Handles messages received from the clients. Messages must be in JSON or binary format (see Codec).
+        There are five message types;
+        'HELLO': The initial handshake message
+        'MOVE' : Update to the game board, refused with an ERROR message if it is not allowed (see validate_move)
+        'OVER' : Quitting message
+        'PING' : Heartbeat, answered with a PONG message
+        'PONG' : Answer to a heartbeat from the server, which only shows the player is still there
+        Any other type is answered with an ERROR message.
+
+        :param msg:     bytes, encoded message
+        :param player:  int, 0 for first player, 1 for second
+        :return: string, the message type (or None if it could not be decoded or is not one of TYPES)
+        """
+        logger.debug("Player: %s Message: %r", player, msg)
+        try:
+            msg = self.decode(msg)
+            if msg['type'] == 'HELLO':
+                if msg['replay']:
+                    # If the other player has not left yet
+                    if len(self.players) == 2:
+                        # If the other player said they want to play again already
+                        if self.replay:
+                            # Both players want to play again, so the game starts on an empty board
+                            self.board.clear()
+                            self.moves = []
+                            self.start_game(first=1 - player)
+                            # Tell player to wait for other player to make move
+                            self.send_handshake(player=player, wait=False, move=False)
+                            # Tell other player to make their move
+                            self.send_handshake(player=not player, wait=False, move=True)
+                            self.replay = False
+                        # If the other player has not responded yet
+                        else:
+                            # Set before replying, as the other player may answer as soon as the reply is sent
+                            self.game_over = False
+                            self.replay = True
+                            # Tell player to wait for other players reply
+                            self.send_handshake(player=player, wait=True, move=False)
+                    # The other player has left
+                    else:
+                        # Tell player to quit
+                        self.send_quit(player=0, name="", quit=False, final=True)
+                        self.remove_player(0)
+                else:
+                    # Clients that offer codecs are told which one the server picked, before it is used
+                    codec = Codec.negotiate(msg.get('codecs'))
+                    if msg.get('codecs'):
+                        self.send_codec(player=player, codec=codec)
+                    self.players[player] += [check_name(msg['name']), codec]
+            elif msg['type'] == 'MOVE':
+                column = self.validate_move(msg.get('col'), player)
+                # Moves that are not allowed are refused without touching the board, and the player can try again
+                if column is None:
+                    return msg['type']
+                self.turn = 1 - player
+                row = self.update_board(column, player)
+                now = time.perf_counter()
+                if self.last_move is not None:
+                    Metrics.MOVE_INTERVAL_SECONDS.observe(now - self.last_move)
+                self.last_move = now
+                tile = self.players[player][2]
+                # If a winner has been found
+                if self.check_for_winner_at(row, column, tile):
+                    self.record_game(winner=tile)
+                    name = self.players[player][3]
+                    self.send_both(self.quit_msg(name=name, quit=False, final=False, row=row, column=column,
+                                                 tile=tile), player)
+                # If the board is full the game is a draw
+                elif self.check_for_draw():
+                    self.record_game(winner=None)
+                    self.send_both(self.quit_msg(name="", quit=False, final=False, row=row, column=column, tile=tile,
+                                                 draw=True), player)
+                # Otherwise update clients on new piece and which players move it is
+                else:
+                    self.send_both(self.update_msg(move=False, row=row, column=column, tile=tile), player, flag='move')
+            elif msg['type'] == 'OVER':
+                # If player has quit
+                if msg['quit']:
+                    # Only a game in progress can be forfeited; between games a quit changes nothing
+                    if self.playing:
+                        # Advise players that game is over
+                        self.record_game(winner=self.players[not player][2], quit=True)
+                        name = self.players[not player][3]
+                        self.send_both(self.quit_msg(name=name, quit=True, final=False), player)
+                # If player does not want to play again
+                else:
+                    self.remove_player(player)
+                    if self.replay:
+                        self.send_quit(player=0, name="", quit=False, final=True)
+                        self.remove_player(0)
+                    self.game_over = True
+            elif msg['type'] == 'PING':
+                self.send(PONG, player)
+            elif msg['type'] == 'PONG':
+                pass
+            else:
+                Metrics.REJECTED.inc('type')
+                self.send_error(player, 'type', "Unknown message type...")
+                return None
+        except (ValueError, KeyError):
+            logger.warning("Received data is not in JSON or binary format...")
+            Metrics.MALFORMED.inc()
+            self.game_over = True
+            return None
+        return msg['type']
+
+    def validate_move(self, column, player):
+        """
+        Check a move against the turn order, the width of the board and the number of tiles already in the column,
+        and tell the player why if it is not allowed.
+
+        :param column:  int, 0 to width-1, as sent by the player
+        :param player:  int, 0 or 1
+        :return: int, the column (or None if the move is not allowed)
+        """
+        if self.turn != player:
+            code, text = 'turn', "It is not your turn..."
+        elif not isinstance(column, int) or isinstance(column, bool) or not 0 <= column < self.board.width:
+            code, text = 'column', "Column must be from 0 to %i..." % (self.board.width - 1)
+        elif not self.board.can_drop(column):
+            code, text = 'full', "Column %i is full..." % column
+        else:
+            return column
+        logger.info("Refused move from player %s: %s", player, text)
+        Metrics.REJECTED.inc(code)
+        self.send_error(player, code, text)
+        return None
+
+    def allow(self, bucket, player):
+        """
+        Check a message against the players rate limit. Messages over the limit are dropped before being decoded,
+        and the player is told the first time in a row it happens.
+
+        :param bucket:  TokenBucket, the players rate limit (or None if there is no limit)
+        :param player:  int, 0 or 1
+        :return: boolean, True if the message should be processed
+        """
+        if bucket is None or bucket.allow():
+            return True
+        Metrics.REJECTED.inc('rate')
+        if bucket.streak == 1:
+            self.send_error(player, 'rate', "Too many messages, slow down...")
+        return False
+
+    def update_board(self, column, player):
+        """
+        Puts the given players tile in the given column at the lowest possible row.
+        The row is then returned to send to the clients.
+
+        :param column: int, 0 to width-1
+        :param player: int, 0 or 1
+        :return: row, 0 to height-1
+        """
+        row = self.board.drop(column, self.players[player][2])
+        if row is None:
+            logger.warning("Row is full...")
+        else:
+            self.moves += [column]
+        return row
+
+    def record_game(self, winner, quit=False):
+        """
+        Count the game that has just finished, add it to the log and results store if there are any and start a new
+        list of moves.
+        The first player to join always has the 'X' tile, so the names are logged in the order the players joined,
+        along with the tile that moved first.
+
+        :param winner:  string, 'X' or 'O' (or None for a draw)
+        :param quit:    boolean, True if the game was won because the other player left
+        """
+        self.turn = None
+        if self.playing:
+            self.playing = False
+            Metrics.ACTIVE_GAMES.dec()
+            Metrics.GAMES_FINISHED.inc('quit' if quit else 'draw' if winner is None else 'win')
+        if self.log is not None or self.results is not None:
+            names = [data[3] if len(data) > 3 else "" for data in self.players]
+            record = GameRecord(names, self.moves, winner, quit, height=self.board.height, width=self.board.width,
+                                connect=self.board.connect, first=self.first)
+            if self.log is not None:
+                try:
+                    self.log.append(record)
+                except (struct.error, ValueError):
+                    # Losing a record must not stop the players being told the game is over
+                    logger.error("Game could not be logged...", exc_info=True)
+            if self.results is not None:
+                self.results.append(record)
+        self.moves = []
+
+    def remove_player(self, index):
+        """
+        Close clients socket and remove players data. Anything still queued for them is written first.
+
+        :param index: int, 0 for first player, 1 for second player
+        """
+        if len(self.players) == 1:
+            index = 0
+        self.flush()
+        sock = self.players[index][0]
+        sock.close()
+        self.players.pop(index)
+
+    def check_for_winner(self, tile):
+        """
+        Check the board and see if the given tile has enough in a row to win.
+
+        :param tile: string, 'X' or 'O'
+        :return: boolean, True if enough in a row, False otherwise
+        """
+        return self.board.has_won(tile)
+
+    def check_for_winner_at(self, row, column, tile):
+        """
+        Check if the tile just placed at the given row and column has made enough in a row to win.
+        Gives the same answer as check_for_winner after each move, but only checks the lines through the cell.
+
+        :param row:     int, 0 to height-1 (or None if the move was not made)
+        :param column:  int, 0 to width-1
+        :param tile:    string, 'X' or 'O'
+        :return: boolean, True if enough in a row, False otherwise
+        """
+        if row is None:
+            return False
+        return self.board.wins_at(row, column, tile)
+
+    def check_for_draw(self):
+        """
+        Check if the board is full, meaning the game ends in a draw.
+
+        :return: boolean, True if no more moves can be made
+        """
+        return self.board.is_full()
+
+    def decode(self, msg):
+        """
+        Decode a message from either player, whichever codec it was encoded with.
+
+        :param msg: bytes
+        :return: {}
+        """
+        return Codec.decode(msg)
+
+    def codec(self, player):
+        """
+        :param player:  int, 0 for player 1, 1 for player 2
+        :return: JsonCodec or BinaryCodec, the codec agreed with the given player, or JSON if none has been agreed yet
+        """
+        data = self.players[player]
+        if len(data) > 4:
+            return data[4]
+        return Codec.JSON
+
+    def encode(self, msg, player):
+        """
+        Encode msg with the codec agreed with the given player.
+
+        :param msg:     {}
+        :param player:  int, 0 for player 1, 1 for player 2
+        :return: bytes
+        """
+        return self.codec(player).encode(msg)
+
+    def frame(self, msg, player, frames):
+        """
+        Encode and frame msg for the given player, unless it has been already for someone using the same codec.
+
+        :param msg:     {}
+        :param player:  int, 0 for player 1, 1 for player 2
+        :param frames:  {}, frames of msg made so far, by codec
+        :return: bytes
+        """
+        codec = self.codec(player)
+        frame = frames.get(codec)
+        if frame is None:
+            frame = frames[codec] = Framing.pack(self.encode(msg, player))
+        return frame
+
+    def send(self, msg, player):
+        """
+        Encode and frame msg before writing it to the given player.
+
+        :param msg:     {}
+        :param player:  int, 0 for player 1, 1 for player 2
+        """
+        self.write(Framing.pack(self.encode(msg, player)), player)
+
+    def send_both(self, msg, player, flag=None):
+        """
+        Send msg to the given player, their opponent and everyone watching, encoding and framing it once for each
+        codec in use rather than once for each of them.
+
+        :param msg:     {}
+        :param player:  int, 0 or 1, the player whose message caused it
+        :param flag:    string, flag that is False in msg and True for the opponent, e.g. 'move', which is set in
+                        the encoded message rather than encoding it again (or None to send msg as it is)
+        """
+        codec = self.codec(player)
+        payload = self.encode(msg, player)
+        frame = Framing.pack(payload)
+        frames = {codec: frame}
+        self.write(frame, player)
+        other = 1 - player
+        if other < len(self.players):
+            other_codec = self.codec(other)
+            if other_codec is not codec:
+                payload = self.encode(msg, other)
+                frame = frames[other_codec] = Framing.pack(payload)
+            if flag is not None:
+                frame = Framing.pack(other_codec.set_flag(payload, flag))
+            self.write(frame, other)
+        self.broadcast(msg, frames)
+
+    def write(self, frame, player):
+        """
+        Write a framed message to the given player, or queue it to be written by flush.
+
+        :param frame:   bytes
+        :param player:  int, 0 for player 1, 1 for player 2
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Write out anything write has queued. Called once each message has been handled, so the replies to it are
+        written together. Only servers that queue what they write need to do anything.
+        """
+        pass
+
+    def broadcast(self, msg, frames=None):
+        """
+        Send msg to everyone watching the game. Only servers that let spectators join need to do anything.
+
+        :param msg:     {}
+        :param frames:  {}, frames of msg already made, by codec (or None)
+        """
+        pass
+
+    def send_handshake(self, player, wait, move):
+        """
+        Creates and sends handshake message to the given player. The size of the board and number of tiles in
+        a row needed to win are included.
+
+        :param player:  int, 0 or 1
+        :param wait:    boolean, True if the player must wait for another player
+        :param move:    boolean, True if its the players turn next
+        """
+        msg = {'type':'HELLO', 'wait':wait, 'move':move, 'height':self.board.height, 'width':self.board.width,
+               'connect':self.board.connect}
+        self.send(msg, player)
+
+    def send_codec(self, player, codec):
+        """
+        Creates and sends the message telling the given player which codec the server will use.
+
+        :param player:  int, 0 or 1
+        :param codec:   JsonCodec or BinaryCodec
+        """
+        msg = {'type':'HELLO', 'codec':codec.name}
+        self.send(msg, player)
+
+    def send_update(self, player, move, row, column, tile):
+        """
+        Creates and sends update message to the given player.
+
+        :param player:  int, 0 or 1
+        :param move:    boolean, True if its the players turn
+        :param row:     int, 0 to height-1
+        :param column:  int, 0 to width-1
+        :param tile:    string, 'X' or 'O'
+        """
+        self.send(self.update_msg(move, row, column, tile), player)
+
+    @staticmethod
+    def update_msg(move, row, column, tile):
+        """
+        Creates an update message.
+
+        :param move:    boolean, True if its the receivers turn
+        :param row:     int, 0 to height-1
+        :param column:  int, 0 to width-1
+        :param tile:    string, 'X' or 'O'
+        :return: {}
+        """
+        return {'type':'MOVE', 'move':move, 'row':row, 'col':column, 'tile':tile}
+
+    def send_error(self, player, code, text):
+        """
+        Creates and sends an error message to the given player.
+
+        :param player:  int, 0 or 1
+        :param code:    string, what was wrong, e.g. 'turn', 'column', 'full' or 'rate'
+        :param text:    string, description for the user
+        """
+        self.send(self.error_msg(code, text), player)
+
+    @staticmethod
+    def error_msg(code, text):
+        """
+        Creates an error message (see send_error).
+
+        :return: {}
+        """
+        return {'type':'ERROR', 'code':code, 'message':text}
+
+    def send_quit(self, player, name, quit, final, row=None, column=None, tile=None, draw=False):
+        """
+        Creates and sends quitting message to the given player.
+
+        :param player:  int, 0 or 1
+        :param name:    string, winning players name
+        :param quit:    boolean, True if the game was quit by a player mid game
+        :param final:   boolean, True if this is the final message to the client
+        :param row:     int, 0 to height-1 (or None)
+        :param column:  int, 0 to width-1 (or None)
+        :param tile:    string, 'X' or 'O' (or None)
+        :param draw:    boolean, True if the game ended with a full board
+        """
+        self.send(self.quit_msg(name, quit, final, row, column, tile, draw), player)
+
+    @staticmethod
+    def quit_msg(name, quit, final, row=None, column=None, tile=None, draw=False):
+        """
+        Creates a quitting message (see send_quit).
+
+        :return: {}
+        """
+        return {'type':'OVER', 'name':name, 'quit':quit, 'final':final, 'row':row, 'col':column, 'tile':tile,
+                'draw':draw}
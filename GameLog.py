@@ -0,0 +1,282 @@
+import argparse
+import atexit
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+# Written once at the start of every log file
+MAGIC = b'C5LOG\x01'
+# Length of the record that follows
+LENGTH = struct.Struct('!H')
+# Timestamp, height, width, tiles in a row needed to win, result, number of moves and the length of each name
+RECORD = struct.Struct('!dBBBBHBB')
+# Result byte: 0 for a draw or the winning tile, with QUIT set if the game was won because the other player left
+# and O_FIRST set if 'O' made the first move, as it does when 'X' is the second to ask to play again
+RESULTS = {None: 0, 'X': 1, 'O': 2}
+WINNERS = {0: None, 1: 'X', 2: 'O'}
+WINNER = 0x03
+O_FIRST = 0x40
+QUIT = 0x80
+# Moves are packed into 4 bits each, so only boards this wide can be logged
+MAX_WIDTH = 16
+# Name lengths are a byte each, so longer names are cut short
+MAX_NAME = 255
+
+
+class GameRecord(object):
+
+    def __init__(self, players, moves, winner, quit=False, timestamp=None, height=6, width=9, connect=5, first='X'):
+        """
+        A finished game. The first player to join always plays the 'X' tile, but either tile can make the first move.
+
+        :param players:     (string, string), names of the 'X' and 'O' players
+        :param moves:       [int], columns played in order, starting with the first tile
+        :param winner:      string, 'X' or 'O' (or None for a draw)
+        :param quit:        boolean, True if the game was won because the other player left
+        :param timestamp:   float, time the game finished (or None for now)
+        :param height:      int, number of rows
+        :param width:       int, number of columns, at most 16 so each move fits in 4 bits
+        :param connect:     int, number of tiles in a row needed to win
+        :param first:       string, 'X' or 'O', the tile that made the first move
+        """
+        self.players = tuple(players)
+        self.moves = list(moves)
+        self.winner = winner
+        self.quit = quit
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.height = height
+        self.width = width
+        self.connect = connect
+        self.first = first
+
+    def __eq__(self, other):
+        return isinstance(other, GameRecord) and self.__dict__ == other.__dict__
+
+    def __repr__(self):
+        return "GameRecord(%r, %r, %r, quit=%r, first=%r)" % (self.players, self.moves, self.winner, self.quit,
+                                                               self.first)
+
+    def tiles(self):
+        """
+        :return: [string], the tile that made each move
+        """
+        second = 'O' if self.first == 'X' else 'X'
+        return [self.first if index % 2 == 0 else second for index in range(len(self.moves))]
+
+    def pack(self):
+        """
+        Encode the record with its length in front. Moves are packed two to a byte, first move in the high 4 bits.
+
+        :return: bytes
+        """
+        check_width(self.width)
+        names = [check_name(name).encode() for name in self.players]
+        result = RESULTS[self.winner] | (QUIT if self.quit else 0) | (O_FIRST if self.first == 'O' else 0)
+        body = RECORD.pack(self.timestamp, self.height, self.width, self.connect, result, len(self.moves),
+                           len(names[0]), len(names[1])) + names[0] + names[1] + pack_moves(self.moves)
+        return LENGTH.pack(len(body)) + body
+
+    @staticmethod
+    def unpack(buffer, offset=0):
+        """
+        Decode the record at the given offset.
+
+        :param buffer: bytes, or any buffer such as an mmap
+        :param offset: int, position of the records length
+        :return: (GameRecord, int), the record and the offset of the next one
+        """
+        length, = LENGTH.unpack_from(buffer, offset)
+        start = offset + LENGTH.size
+        timestamp, height, width, connect, result, count, first, second = RECORD.unpack_from(buffer, start)
+        start += RECORD.size
+        players = (bytes(buffer[start:start + first]).decode(),
+                   bytes(buffer[start + first:start + first + second]).decode())
+        start += first + second
+        moves = unpack_moves(buffer[start:start + (count + 1) // 2], count)
+        record = GameRecord(players, moves, WINNERS[result & WINNER], bool(result & QUIT), timestamp, height, width,
+                            connect, 'O' if result & O_FIRST else 'X')
+        return record, offset + LENGTH.size + length
+
+
+def check_width(width):
+    """
+    Refuse boards too wide to log, so servers can check before any game is played rather than when one ends.
+
+    :param width: int, number of columns
+    """
+    if width > MAX_WIDTH:
+        raise ValueError("Boards wider than %i columns cannot be logged..." % MAX_WIDTH)
+
+
+def create(path):
+    """
+    Create a log with its header, unless the file already exists. Only the process that creates the file writes
+    the header, so servers sharing a log cannot both write one.
+    An empty file that already exists is given the header too, so create it before starting processes that share it.
+
+    :param path: string, log file
+    """
+    try:
+        handle = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+    except FileExistsError:
+        if os.path.getsize(path) > 0:
+            return
+        handle = os.open(path, os.O_WRONLY | os.O_APPEND)
+    with open(handle, 'wb') as f:
+        f.write(MAGIC)
+
+
+def check_name(name):
+    """
+    Cut names short to what can be logged, so servers can shorten them when players join rather than when a game
+    ends.
+
+    :param name: string, player name
+    :return: string, at most MAX_NAME bytes long in UTF-8, without splitting a character
+    """
+    return str(name).encode('utf-8', 'replace')[:MAX_NAME].decode('utf-8', 'ignore')
+
+
+def pack_moves(moves):
+    """
+    :param moves: [int], columns 0 to 15
+    :return: bytes, two moves to a byte
+    """
+    packed = bytearray((len(moves) + 1) // 2)
+    for index, col in enumerate(moves):
+        packed[index // 2] |= col << 4 if index % 2 == 0 else col
+    return bytes(packed)
+
+
+def unpack_moves(packed, count):
+    """
+    :param packed:  bytes, two moves to a byte
+    :param count:   int, number of moves
+    :return: [int]
+    """
+    moves = []
+    for byte in packed:
+        moves += [byte >> 4, byte & 0x0f]
+    return moves[:count]
+
+
+class GameLog(object):
+
+    def __init__(self, path, batch=256):
+        """
+        Append-only file of finished games.
+        Records are handed to a writer thread, which writes everything waiting in one go, so the game loop never
+        waits for the disk. Anything still waiting is written when the log is closed, or when the process exits.
+
+        :param path:    string, file to append to, created if it does not exist
+        :param batch:   int, most records written at a time
+        """
+        self.path = path
+        self.batch = batch
+        create(path)
+        self.file = open(path, 'ab')
+        self.queue = queue.Queue()
+        self.written = 0
+        self.thread = threading.Thread(target=self.write, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def append(self, record):
+        """
+        Add a record to the log without waiting for it to be written.
+
+        :param record: GameRecord
+        """
+        self.queue.put(record.pack())
+
+    def write(self):
+        """
+        Writer threads loop: wait for records, then write every one waiting (up to the batch size) at once.
+        """
+        while True:
+            data = self.queue.get()
+            if data is None:
+                self.queue.task_done()
+                break
+            chunks = [data]
+            done = False
+            while len(chunks) < self.batch:
+                try:
+                    data = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if data is None:
+                    done = True
+                    break
+                chunks += [data]
+            self.file.write(b''.join(chunks))
+            self.file.flush()
+            self.written += len(chunks)
+            for _ in range(len(chunks) + done):
+                self.queue.task_done()
+            if done:
+                break
+
+    def flush(self):
+        """
+        Wait until every record appended so far has been written.
+        """
+        self.queue.join()
+
+    def close(self):
+        """
+        Write any records still waiting and close the file.
+        """
+        if self.file.closed:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        atexit.unregister(self.close)
+
+
+def records(path):
+    """
+    Iterate over the records in a log file. The file is memory-mapped, so only the parts being read are loaded.
+    A record cut short at the end of the file, e.g. by a crash, is skipped.
+
+    :param path: string, log file
+    :return: generator of GameRecord
+    """
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) <= len(MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if buffer[:len(MAGIC)] != MAGIC:
+                raise ValueError("%s is not a game log..." % path)
+            offset = len(MAGIC)
+            size = len(buffer)
+            while offset + LENGTH.size <= size:
+                length, = LENGTH.unpack_from(buffer, offset)
+                if offset + LENGTH.size + length > size:
+                    break
+                record, offset = GameRecord.unpack(buffer, offset)
+                yield record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise a Connect-5 game log.")
+    parser.add_argument('path', help="log file")
+    parser.add_argument('--list', action='store_true', help="print every game")
+    args = parser.parse_args()
+    totals = {'X': 0, 'O': 0, None: 0}
+    games = quits = moves = 0
+    for record in records(args.path):
+        games += 1
+        moves += len(record.moves)
+        quits += record.quit
+        totals[record.winner] += 1
+        if args.list:
+            print(time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.timestamp)), record)
+    print("%i games, %i won by X, %i won by O, %i draws, %i won by the other player leaving" %
+          (games, totals['X'], totals['O'], totals[None], quits))
+    if games:
+        print("Average game length: %.1f moves" % (moves / games))
@@ -0,0 +1,69 @@
+import collections
+import time
+
+
+class Lobby(object):
+
+    def __init__(self):
+        """
+        Queue of players waiting for an opponent.
+        Players are paired in the order they joined, and the time each one waited is recorded.
+        """
+        self.queue = collections.deque()
+        self.matched = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def add(self, data):
+        """
+        Put a player at the back of the queue.
+
+        :param data: [], the players data
+        """
+        self.queue.append((data, time.monotonic()))
+
+    def remove(self, data):
+        """
+        Take a player out of the queue, e.g. if they disconnect while waiting.
+
+        :param data: [], the players data
+        :return: boolean, True if the player was waiting
+        """
+        for entry in self.queue:
+            if entry[0] is data:
+                self.queue.remove(entry)
+                return True
+        return False
+
+    def match(self):
+        """
+        Pair up waiting players, oldest first.
+
+        :return: [([], [])], pairs of players data
+        """
+        pairs = []
+        now = time.monotonic()
+        while len(self.queue) >= 2:
+            first, first_joined = self.queue.popleft()
+            second, second_joined = self.queue.popleft()
+            for joined in (first_joined, second_joined):
+                self.total_wait += now - joined
+                self.max_wait = max(self.max_wait, now - joined)
+            self.matched += 2
+            pairs += [(first, second)]
+        return pairs
+
+    def depth(self):
+        """
+        :return: int, number of players waiting
+        """
+        return len(self.queue)
+
+    def stats(self):
+        """
+        Get the queue depth and time-to-match statistics.
+
+        :return: {}
+        """
+        average = self.total_wait / self.matched if self.matched else 0.0
+        return {'depth':self.depth(), 'matched':self.matched, 'average_wait':average, 'max_wait':self.max_wait}
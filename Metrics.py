@@ -0,0 +1,209 @@
+import bisect
+import http.server
+import threading
+
+
+class Metric(object):
+
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        """
+        A value for each combination of label values, shown in the Prometheus text format.
+
+        :param name:    string, metric name
+        :param help:    string, description of the metric
+        :param labels:  (string), label names
+        """
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def label_text(self, values, extra=()):
+        """
+        :param values:  (string), label values, in the order of the label names
+        :param extra:   ((string, string)), more label names and values
+        :return: string, e.g. '{type="MOVE"}', or '' if there are no labels
+        """
+        pairs = list(zip(self.labels, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{%s}" % ",".join('%s="%s"' % (name, escape(value)) for name, value in pairs)
+
+    def render(self):
+        """
+        :return: [string], lines in the Prometheus text format
+        """
+        lines = ["# HELP %s %s" % (self.name, self.help), "# TYPE %s %s" % (self.name, self.kind)]
+        with self.lock:
+            for values, value in sorted(self.values.items()):
+                lines += self.render_value(values, value)
+        return lines
+
+    def render_value(self, values, value):
+        return ["%s%s %s" % (self.name, self.label_text(values), format_number(value))]
+
+
+class Counter(Metric):
+
+    kind = 'counter'
+
+    def inc(self, *values, amount=1):
+        """
+        :param values: label values
+        :param amount: number to add
+        """
+        with self.lock:
+            self.values[values] = self.values.get(values, 0) + amount
+
+    def get(self, *values):
+        return self.values.get(values, 0)
+
+
+class Gauge(Counter):
+
+    kind = 'gauge'
+
+    def dec(self, *values, amount=1):
+        """
+        :param values: label values
+        :param amount: number to take away
+        """
+        self.inc(*values, amount=-amount)
+
+    def set(self, value, *values):
+        """
+        :param value:   number
+        :param values:  label values
+        """
+        with self.lock:
+            self.values[values] = value
+
+
+class Histogram(Metric):
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, buckets, labels=()):
+        """
+        Counts of observations no bigger than each bucket, with their sum and count.
+
+        :param name:    string, metric name
+        :param help:    string, description of the metric
+        :param buckets: (float), upper bounds of the buckets, in order
+        :param labels:  (string), label names
+        """
+        Metric.__init__(self, name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, amount, *values):
+        """
+        :param amount:  float, observed value
+        :param values:  label values
+        """
+        with self.lock:
+            counts = self.values.get(values)
+            if counts is None:
+                # One count per bucket plus one for '+Inf', then the sum
+                counts = self.values[values] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect.bisect_left(self.buckets, amount)] += 1
+            counts[-1] += amount
+
+    def get(self, *values):
+        """
+        :return: (int, float), number and sum of observations
+        """
+        counts = self.values.get(values)
+        if counts is None:
+            return 0, 0.0
+        return sum(counts[:-1]), counts[-1]
+
+    def render_value(self, values, counts):
+        lines = []
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            total += count
+            le = bound if bound == '+Inf' else format_number(bound)
+            lines += ["%s_bucket%s %i" % (self.name, self.label_text(values, [('le', le)]), total)]
+        lines += ["%s_sum%s %s" % (self.name, self.label_text(values), format_number(counts[-1])),
+                  "%s_count%s %i" % (self.name, self.label_text(values), total)]
+        return lines
+
+
+def escape(value):
+    """
+    :param value: label value
+    :return: string, with backslashes, double quotes and new lines escaped as the Prometheus text format needs
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_number(value):
+    """
+    :param value: int or float
+    :return: string, without a trailing '.0' for whole numbers
+    """
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return repr(value)
+
+
+def render():
+    """
+    :return: string, every metric in the Prometheus text format
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port, host='127.0.0.1'):
+    """
+    Serve the metrics over HTTP from a background thread.
+
+    :param port: int, port number (0 picks a free port)
+    :param host: string, IP address, local only unless told otherwise
+    :return: http.server.ThreadingHTTPServer, whose server_address has the port in use
+    """
+    server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+REGISTRY = []
+
+CONNECTIONS = Counter('connect5_connections_total', "Connections accepted.")
+GAMES_STARTED = Counter('connect5_games_started_total', "Games started.")
+GAMES_FINISHED = Counter('connect5_games_finished_total', "Games finished, by result.", ['result'])
+MESSAGES = Counter('connect5_messages_total', "Messages received from players, by type.", ['type'])
+REJECTED = Counter('connect5_rejected_messages_total', "Messages refused, by reason.", ['reason'])
+REAPED = Counter('connect5_reaped_connections_total', "Connections dropped for not answering heartbeats.")
+MALFORMED = Counter('connect5_malformed_messages_total', "Messages that were not valid JSON or binary.")
+ACTIVE_GAMES = Gauge('connect5_active_games', "Games being played.")
+PLAYERS = Gauge('connect5_players', "Players connected.")
+PROCESS_SECONDS = Histogram('connect5_process_seconds', "Time taken to process a message, by type.",
+                            (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.1),
+                            ['type'])
+MOVE_INTERVAL_SECONDS = Histogram('connect5_move_interval_seconds', "Time between moves in a game.",
+                                  (0.01, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 300))
@@ -0,0 +1,260 @@
+import cProfile
+import functools
+import logging
+import select
+import signal
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Game methods timed as a phase of handling a message, and the phase they are counted under
+PHASES = (('decode', 'decode'), ('update_board', 'board'), ('check_for_winner_at', 'check'),
+          ('check_for_draw', 'check'), ('encode', 'encode'), ('send', 'send'), ('send_both', 'send'),
+          ('flush', 'send'), ('broadcast', 'broadcast'), ('record_game', 'log'))
+
+
+class Profiler(object):
+
+    def __init__(self, interval=10.0, slow=None, path=None):
+        """
+        Times each phase of handling a message: receiving it, decoding it, updating and checking the board,
+        encoding and sending the replies and logging the game. The time spent in a phase does not include the
+        phases it calls, e.g. 'send' does not include 'encode', and anything else is counted as 'other'.
+        Nothing is timed until a game is attached, so a server without a Profiler pays nothing for it.
+
+        :param interval:    float, seconds between breakdowns being logged (or None to never log them)
+        :param slow:        float, seconds a message may take before its trace is logged (or None)
+        :param path:        string, file cProfile stats are written to when capturing (see install)
+        """
+        self.interval = interval
+        self.slow = slow
+        self.path = path
+        self.lock = threading.RLock()
+        self.local = threading.local()
+        self.phases = {}
+        self.messages = 0
+        self.started = time.monotonic()
+        # cProfile is not thread safe, so messages are handled one at a time while capturing
+        self.capture_lock = threading.Lock()
+        self.capture = None
+        self.captured = 0
+        # Set by the SIGUSR1 handler, so capturing is started or stopped by the next message rather than in the handler
+        self.requested = False
+
+    def attach(self, game):
+        """
+        Time the phases of every message the game handles, by wrapping its methods.
+
+        :param game: Game
+        """
+        for method, phase in PHASES:
+            setattr(game, method, self.wrap(phase, getattr(game, method)))
+        game.process = self.wrap_process(game.process)
+
+    def wrap(self, phase, func):
+        """
+        :param phase:   string, name of the phase
+        :param func:    function
+        :return: function, func timed as the given phase
+        """
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            state = self.local
+            outer = getattr(state, 'inner', 0.0)
+            state.inner = 0.0
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.record(phase, elapsed - state.inner)
+                state.inner = outer + elapsed
+        return timed
+
+    def wrap_process(self, process):
+        """
+        :param process: function, Game.process
+        :return: function, process that traces each message, and captures it with cProfile when asked to
+        """
+        @functools.wraps(process)
+        def traced(msg, player):
+            state = self.local
+            state.trace = getattr(state, 'pending', [])
+            state.pending = []
+            state.inner = 0.0
+            self.check_request()
+            start = time.perf_counter()
+            if self.capture is None:
+                kind = process(msg, player)
+            else:
+                with self.capture_lock:
+                    kind = self.captured_call(process, msg, player)
+            elapsed = time.perf_counter() - start
+            self.record('other', elapsed - state.inner)
+            trace, state.trace = state.trace, None
+            self.finish(kind, msg, player, trace)
+            return kind
+        return traced
+
+    def captured_call(self, process, msg, player):
+        """
+        Call process with cProfile running, if capturing has not been stopped while waiting for the lock.
+        """
+        profile = self.capture
+        if profile is None:
+            return process(msg, player)
+        profile.enable()
+        try:
+            return process(msg, player)
+        finally:
+            profile.disable()
+            self.captured += 1
+
+    def read(self, reader):
+        """
+        Read the next frame, timing the 'recv' phase of the message.
+        Time spent waiting for the player to send anything is not counted, only the time taken to read the frame
+        once it starts arriving.
+
+        :param reader: Framing.FrameReader
+        :return: bytes, the payload (or b'' if the socket has closed)
+        """
+        if not reader.buffer and not select.select([reader.sock], [], [], reader.sock.gettimeout())[0]:
+            # Nothing arrived within the sockets timeout, as reader.read would have found
+            raise socket.timeout("timed out")
+        state = self.local
+        state.trace = []
+        start = time.perf_counter()
+        msg = reader.read()
+        self.record('recv', time.perf_counter() - start)
+        state.pending, state.trace = state.trace, None
+        return msg
+
+    def record(self, phase, seconds):
+        """
+        Add the time spent in a phase to the totals, and to the trace of the message being handled.
+
+        :param phase:   string
+        :param seconds: float
+        """
+        trace = getattr(self.local, 'trace', None)
+        if trace is not None:
+            trace += [(phase, seconds)]
+        with self.lock:
+            totals = self.phases.get(phase)
+            if totals is None:
+                self.phases[phase] = [1, seconds, seconds]
+            else:
+                totals[0] += 1
+                totals[1] += seconds
+                if seconds > totals[2]:
+                    totals[2] = seconds
+
+    def finish(self, kind, msg, player, trace):
+        """
+        Log the trace of a message that took too long, and the breakdown if it is due.
+
+        :param kind:    string, message type
+        :param msg:     bytes, encoded message
+        :param player:  int, 0 or 1
+        :param trace:   [(string, float)], each phase in the order it finished
+        """
+        total = sum(seconds for phase, seconds in trace)
+        if self.slow is not None and total >= self.slow:
+            logger.warning("Slow %s message from player %s took %.3fms: %s; message %r", kind, player, total * 1000,
+                           format_trace(trace), msg)
+        result = None
+        with self.lock:
+            self.messages += 1
+            if self.interval is not None and time.monotonic() - self.started >= self.interval:
+                result = self.breakdown(reset=True)
+        if result is not None:
+            self.report(result)
+
+    def breakdown(self, reset=False):
+        """
+        :param reset:   boolean, True to start new totals
+        :return: {}, number of messages, seconds covered and count, total, mean and max seconds by phase
+        """
+        with self.lock:
+            now = time.monotonic()
+            result = {'messages':self.messages, 'seconds':now - self.started, 'phases':{
+                phase: {'count':count, 'total':total, 'mean':total / count, 'max':most}
+                for phase, (count, total, most) in self.phases.items()}}
+            if reset:
+                self.phases = {}
+                self.messages = 0
+                self.started = now
+        return result
+
+    def report(self, result=None):
+        """
+        Log where the time went since the last report, and start new totals.
+
+        :param result: {}, breakdown to log (or None to take one now)
+        """
+        if result is None:
+            result = self.breakdown(reset=True)
+        phases = sorted(result['phases'].items(), key=lambda item: -item[1]['total'])
+        total = sum(times['total'] for phase, times in phases)
+        lines = ["%i messages in %.1fs, %.3fms handling them" % (result['messages'], result['seconds'],
+                                                                 total * 1000),
+                 "%-10s %9s %11s %10s %10s %6s" % ('phase', 'count', 'total_ms', 'mean_us', 'max_us', 'share')]
+        for phase, times in phases:
+            lines += ["%-10s %9i %11.3f %10.1f %10.1f %5.1f%%" % (
+                phase, times['count'], times['total'] * 1000, times['mean'] * 1e6, times['max'] * 1e6,
+                times['total'] / total * 100 if total else 0.0)]
+        logger.info("Profile breakdown:\n%s", "\n".join(lines))
+
+    def request_capture(self, *args):
+        """
+        SIGUSR1 handler: ask for capturing to be started or stopped when the next message is handled.
+        Signals interrupt the main thread wherever it is, possibly holding capture_lock, so nothing else is done here.
+        """
+        self.requested = True
+
+    def check_request(self):
+        """
+        Start or stop capturing if it has been asked for since the last message.
+        """
+        with self.lock:
+            requested, self.requested = self.requested, False
+        if requested:
+            self.toggle_capture()
+
+    def toggle_capture(self):
+        """
+        Start capturing cProfile stats of every message handled, or stop and write them to the file.
+        """
+        if self.capture is None:
+            self.captured = 0
+            self.capture = cProfile.Profile()
+            logger.info("Capturing cProfile stats...")
+            return
+        with self.capture_lock:
+            profile, self.capture = self.capture, None
+        profile.dump_stats(self.path)
+        logger.info("Wrote cProfile stats for %i messages to %s (view with 'python -m pstats %s')", self.captured,
+                    self.path, self.path)
+
+    def install(self):
+        """
+        Capture cProfile stats on demand: the first SIGUSR1 starts capturing and the next writes them to the file,
+        each from the next message handled after it arrives.
+
+        :return: boolean, True if the signal handler was installed (there is no SIGUSR1 on Windows)
+        """
+        if self.path is None or not hasattr(signal, 'SIGUSR1'):
+            return False
+        signal.signal(signal.SIGUSR1, self.request_capture)
+        return True
+
+
+def format_trace(trace):
+    """
+    :param trace: [(string, float)], phases and seconds
+    :return: string, e.g. 'recv 0.012ms > decode 0.004ms > ...'
+    """
+    return " > ".join("%s %.3fms" % (phase, seconds * 1000) for phase, seconds in trace)
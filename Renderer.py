@@ -0,0 +1,118 @@
+# ANSI escape sequences
+CLEAR = "\x1b[2J"
+CLEAR_LINE = "\x1b[2K"
+SAVE = "\x1b7"
+RESTORE = "\x1b8"
+
+
+def move_to(row, column):
+    """
+    :param row:     int, terminal row, from 1
+    :param column:  int, terminal column, from 1
+    :return: string, escape sequence moving the cursor there
+    """
+    return "\x1b[%i;%iH" % (row, column)
+
+
+class BoardRenderer(object):
+
+    # Number of status lines kept under the board
+    STATUS_LINES = 3
+
+    def __init__(self, out):
+        """
+        Draws the board at the top of the terminal, with status lines and a prompt under it.
+        The board is drawn in full once, and after that only the cells that have changed are redrawn, by moving
+        the cursor to them, so a move costs a few bytes of output instead of the whole board.
+
+        :param out: file, terminal to write to, e.g. sys.stdout
+        """
+        self.out = out
+        self.cells = None
+        self.status = []
+        self.written = 0
+
+    def write(self, text):
+        """
+        :param text: string, written and flushed in one go
+        """
+        self.out.write(text)
+        self.out.flush()
+        self.written += len(text)
+
+    def render(self, board):
+        """
+        :param board:   Board
+        :return: string, output that brings the terminal up to date with the board
+        """
+        cells = board.to_list()
+        if self.cells is None or len(cells) != len(self.cells) or len(cells[0]) != len(self.cells[0]):
+            self.cells = cells
+            return self.render_all()
+        output = []
+        for row, (old, new) in enumerate(zip(self.cells, cells)):
+            for col in range(len(new)):
+                if old[col] != new[col]:
+                    output += [move_to(row + 2, col * 3 + 2), new[col] or " "]
+        self.cells = cells
+        if not output:
+            return ""
+        # The cursor goes back to where the user is typing
+        return SAVE + "".join(output) + RESTORE
+
+    def render_all(self):
+        """
+        :return: string, output that clears the terminal and draws the whole board, status lines and prompt
+        """
+        width = len(self.cells[0])
+        output = [CLEAR, move_to(1, 1), "".join("%2i " % (col + 1) for col in range(width)).rstrip()]
+        for row, tiles in enumerate(self.cells):
+            output += [move_to(row + 2, 1), "".join("[%s]" % (tile or " ") for tile in tiles)]
+        for index, text in enumerate(self.status):
+            output += [move_to(self.status_row() + index, 1), text]
+        output += [move_to(self.prompt_row(), 1)]
+        return "".join(output)
+
+    def draw(self, board):
+        """
+        Bring the terminal up to date with the board.
+
+        :param board: Board
+        """
+        output = self.render(board)
+        if output:
+            self.write(output)
+
+    def status_row(self):
+        """
+        :return: int, terminal row of the first status line
+        """
+        return len(self.cells) + 3 if self.cells else 1
+
+    def prompt_row(self):
+        """
+        :return: int, terminal row of the prompt
+        """
+        return self.status_row() + self.STATUS_LINES + 1
+
+    def show(self, text):
+        """
+        Add a status line, scrolling the oldest one off if there are too many.
+
+        :param text: string
+        """
+        self.status = (self.status + [text])[-self.STATUS_LINES:]
+        output = [SAVE]
+        for index in range(self.STATUS_LINES):
+            text = self.status[index] if index < len(self.status) else ""
+            output += [move_to(self.status_row() + index, 1), CLEAR_LINE, text]
+        self.write("".join(output) + RESTORE)
+
+    def prompt(self, text):
+        """
+        Replace the prompt, leaving the cursor after it for the user to type.
+
+        :param text: string
+        """
+        row = self.prompt_row()
+        self.write(move_to(row, 1) + CLEAR_LINE + move_to(row + 1, 1) + CLEAR_LINE + move_to(row, 1) + text)
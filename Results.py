@@ -0,0 +1,279 @@
+import argparse
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rating every player starts with, and the most a rating can change after one game
+START_RATING = 1500.0
+K_FACTOR = 32.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    name TEXT PRIMARY KEY,
+    rating REAL NOT NULL,
+    games INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS players_rating ON players (rating DESC);
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    x TEXT NOT NULL,
+    o TEXT NOT NULL,
+    winner TEXT,
+    quit INTEGER NOT NULL,
+    moves INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    player TEXT NOT NULL,
+    game INTEGER NOT NULL,
+    opponent TEXT NOT NULL,
+    score REAL NOT NULL,
+    rating REAL NOT NULL,
+    change REAL NOT NULL,
+    PRIMARY KEY (player, game)
+) WITHOUT ROWID;
+"""
+
+
+def expected(rating, other):
+    """
+    :param rating:  float, players rating
+    :param other:   float, opponents rating
+    :return: float, the score the player is expected to get against the opponent, 0 to 1
+    """
+    return 1.0 / (1.0 + 10.0 ** ((other - rating) / 400.0))
+
+
+def elo(rating, other, score, k=K_FACTOR):
+    """
+    :param rating:  float, players rating
+    :param other:   float, opponents rating
+    :param score:   float, 1 for a win, 0.5 for a draw and 0 for a loss
+    :param k:       float, most the rating can change
+    :return: float, the players new rating
+    """
+    return rating + k * (score - expected(rating, other))
+
+
+class ResultsStore(object):
+
+    def __init__(self, path, batch=256, k=K_FACTOR, timeout=30.0):
+        """
+        SQLite database of finished games, with an Elo rating for every player name.
+        Games are handed to a writer thread, which stores everything waiting in one transaction, so the game loop
+        never waits for the disk. Games where a player has no name, or both players have the same name, are stored
+        but not rated. Anything still waiting is stored when the store is closed, or when the process exits.
+        Several processes can share a database, as each transaction reads the ratings it updates.
+
+        :param path:    string, database file, created if it does not exist
+        :param batch:   int, most games stored in a transaction
+        :param k:       float, most a rating can change after one game
+        :param timeout: float, seconds to wait for another process to finish writing
+        """
+        self.path = path
+        self.batch = batch
+        self.k = k
+        self.timeout = timeout
+        # Used for queries, from any thread; the writer thread has its own connection
+        self.connection = self.connect()
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.written = 0
+        self.thread = threading.Thread(target=self.write, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def connect(self):
+        """
+        :return: sqlite3.Connection, in autocommit mode so transactions are started explicitly
+        """
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+
+    def append(self, record):
+        """
+        Add a finished game to the store without waiting for it to be written.
+
+        :param record: GameRecord
+        """
+        self.queue.put(record)
+
+    def write(self):
+        """
+        Writer threads loop: wait for games, then store every one waiting (up to the batch size) at once.
+        """
+        connection = self.connect()
+        connection.execute("PRAGMA synchronous=NORMAL")
+        while True:
+            record = self.queue.get()
+            if record is None:
+                self.queue.task_done()
+                break
+            records = [record]
+            done = False
+            while len(records) < self.batch:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    done = True
+                    break
+                records += [record]
+            try:
+                self.store(connection, records)
+                self.written += len(records)
+            except sqlite3.Error as exc:
+                logger.error("Could not store %i games: %s", len(records), exc)
+            for _ in range(len(records) + done):
+                self.queue.task_done()
+            if done:
+                break
+        connection.close()
+
+    def store(self, connection, records):
+        """
+        Store games and update the players ratings in one transaction.
+        The transaction takes the write lock before reading the ratings, so other processes cannot change them
+        in between.
+
+        :param connection:  sqlite3.Connection
+        :param records:     [GameRecord]
+        """
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for record in records:
+                self.store_game(connection, record)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def store_game(self, connection, record):
+        """
+        Store one game, and rate it if both players have different names.
+
+        :param connection:  sqlite3.Connection, in a transaction
+        :param record:      GameRecord
+        """
+        first, second = record.players
+        game = connection.execute(
+            "INSERT INTO games (timestamp, x, o, winner, quit, moves) VALUES (?, ?, ?, ?, ?, ?)",
+            (record.timestamp, first, second, record.winner, int(record.quit), len(record.moves))).lastrowid
+        if not first or not second or first == second:
+            return
+        score = 0.5 if record.winner is None else 1.0 if record.winner == 'X' else 0.0
+        ratings = [self.rating(connection, name) for name in (first, second)]
+        for name, opponent, rating, other, points in ((first, second, ratings[0], ratings[1], score),
+                                                       (second, first, ratings[1], ratings[0], 1.0 - score)):
+            new = elo(rating, other, points, self.k)
+            connection.execute(
+                "INSERT INTO players (name, rating, games, wins, losses, draws) VALUES (?, ?, 1, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET rating = excluded.rating, games = games + 1, "
+                "wins = wins + excluded.wins, losses = losses + excluded.losses, draws = draws + excluded.draws",
+                (name, new, int(points == 1.0), int(points == 0.0), int(points == 0.5)))
+            connection.execute("INSERT INTO results (player, game, opponent, score, rating, change) "
+                               "VALUES (?, ?, ?, ?, ?, ?)", (name, game, opponent, points, new, new - rating))
+
+    @staticmethod
+    def rating(connection, name):
+        """
+        :param connection:  sqlite3.Connection
+        :param name:        string
+        :return: float, the players rating (or the starting rating if they have not been rated)
+        """
+        row = connection.execute("SELECT rating FROM players WHERE name = ?", (name,)).fetchone()
+        return START_RATING if row is None else row[0]
+
+    def flush(self):
+        """
+        Wait until every game appended so far has been stored.
+        """
+        self.queue.join()
+
+    def close(self):
+        """
+        Store any games still waiting and close the database.
+        """
+        if not self.thread.is_alive():
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.connection.close()
+        atexit.unregister(self.close)
+
+    def query(self, sql, parameters=()):
+        """
+        :param sql:         string
+        :param parameters:  tuple
+        :return: [tuple], every row
+        """
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def leaderboard(self, limit=10):
+        """
+        The highest rated players, read in order from the ratings index.
+
+        :param limit: int, number of players
+        :return: [(string, float, int, int, int, int)], name, rating, games, wins, losses and draws
+        """
+        return self.query(LEADERBOARD, (limit,))
+
+    def history(self, name, limit=20):
+        """
+        A players most recent games, read in order from the results primary key.
+
+        :param name:    string
+        :param limit:   int, number of games
+        :return: [(float, string, float, float, float)], time, opponent, score, rating after the game and change
+        """
+        return self.query(HISTORY, (name, limit))
+
+    def player(self, name):
+        """
+        :param name: string
+        :return: (string, float, int, int, int, int), name, rating, games, wins, losses and draws (or None)
+        """
+        rows = self.query("SELECT name, rating, games, wins, losses, draws FROM players WHERE name = ?", (name,))
+        return rows[0] if rows else None
+
+
+LEADERBOARD = "SELECT name, rating, games, wins, losses, draws FROM players ORDER BY rating DESC LIMIT ?"
+HISTORY = ("SELECT games.timestamp, results.opponent, results.score, results.rating, results.change FROM results "
+           "JOIN games ON games.id = results.game WHERE results.player = ? ORDER BY results.game DESC LIMIT ?")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the leaderboard, or a players games, from a results database.")
+    parser.add_argument('path', help="results database")
+    parser.add_argument('--top', type=int, default=10, help="number of players on the leaderboard")
+    parser.add_argument('--player', default=None, help="show this players most recent games instead")
+    parser.add_argument('--games', type=int, default=20, help="number of games to show for a player")
+    args = parser.parse_args()
+    store = ResultsStore(args.path)
+    if args.player is None:
+        print("%4s %-20s %7s %6s %5s %6s %5s" % ('rank', 'name', 'rating', 'games', 'wins', 'losses', 'draws'))
+        for rank, (name, rating, games, wins, losses, draws) in enumerate(store.leaderboard(args.top), 1):
+            print("%4i %-20s %7.1f %6i %5i %6i %5i" % (rank, name, rating, games, wins, losses, draws))
+    else:
+        row = store.player(args.player)
+        if row is None:
+            print("%s has not played a rated game." % args.player)
+        else:
+            print("%s: rating %.1f, %i games, %i wins, %i losses, %i draws" % row)
+            results = {1.0: 'won', 0.5: 'drew', 0.0: 'lost'}
+            for timestamp, opponent, score, rating, change in store.history(args.player, args.games):
+                print("%s %-4s against %-20s %7.1f (%+.1f)" % (
+                    time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)), results[score], opponent, rating,
+                    change))
+    store.close()
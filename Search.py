@@ -0,0 +1,191 @@
+import time
+from TranspositionTable import EXACT, LOWER, UPPER
+
+WIN = 1000000
+
+
+class TimeUp(Exception):
+    pass
+
+
+def other_tile(tile):
+    """
+    :param tile: string, 'X' or 'O'
+    :return: string, the opponents tile
+    """
+    return 'O' if tile == 'X' else 'X'
+
+
+class Search(object):
+
+    def __init__(self, board, time_limit=1.0, max_depth=None, table=None):
+        """
+        Negamax search with alpha-beta pruning and iterative deepening.
+        The board is changed with drop and undo while searching, so pass a copy if it is in use elsewhere.
+
+        :param board:       Board
+        :param time_limit:  float, seconds to search for
+        :param max_depth:   int, deepest search to try (or None to search until time is up or the board is full)
+        :param table:       TranspositionTable, results to reuse, which can be kept from one move to the next
+        """
+        self.board = board
+        self.table = table
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.deadline = None
+        self.nodes = 0
+        self.depth = 0
+        # Score for a line holding only one players tiles, by how many of their tiles it holds
+        self.weights = [0] + [4 ** count for count in range(board.connect)]
+        # Columns nearest the center are tried first, as they are in the most lines
+        center = (board.width - 1) / 2.0
+        self.order = sorted(range(board.width), key=lambda col: abs(col - center))
+
+    def best_move(self, tile):
+        """
+        Find the best column for the given tile to play, searching one move deeper each time until time is up.
+        The best move found at each depth is tried first at the next, which makes the cut-offs much better.
+
+        :param tile: string, 'X' or 'O'
+        :return: int, column (or None if the board is full)
+        """
+        self.deadline = time.monotonic() + self.time_limit
+        self.nodes = 0
+        if self.table is not None:
+            self.table.new_search()
+        moves = [col for col in self.order if self.board.can_drop(col)]
+        if not moves:
+            return None
+        best = moves[0]
+        remaining = self.board.height * self.board.width - sum(self.board.heights)
+        max_depth = remaining if self.max_depth is None else min(self.max_depth, remaining)
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self.root(tile, depth, moves)
+            except TimeUp:
+                break
+            best = move
+            self.depth = depth
+            moves.remove(move)
+            moves.insert(0, move)
+            # Stop once a forced win or loss has been found
+            if abs(score) >= WIN - depth:
+                break
+        return best
+
+    def root(self, tile, depth, moves):
+        """
+        Search every move from the current position to the given depth.
+
+        :param tile:    string, tile to play
+        :param depth:   int, number of moves to look ahead
+        :param moves:   [int], columns to try, in order
+        :return: (int, int), the best score and column
+        """
+        alpha = -WIN - 1
+        best = moves[0]
+        for col in moves:
+            score = -self.play(col, other_tile(tile), tile, depth, -WIN - 1, -alpha, 1)
+            if score > alpha:
+                alpha = score
+                best = col
+        return alpha, best
+
+    def play(self, col, tile, last, depth, alpha, beta, ply):
+        """
+        Drop the last players tile in the given column and score the position for the player to move next.
+
+        :param col:     int, column to play in
+        :param tile:    string, tile of the player to move after this one
+        :param last:    string, tile being dropped
+        :param depth:   int, number of moves left to look ahead, including this one
+        :param alpha:   int, score the player to move is already sure of
+        :param beta:    int, score the opponent is already sure of
+        :param ply:     int, number of moves from the root
+        :return: int, score for the player to move next
+        """
+        self.nodes += 1
+        if not self.nodes & 1023 and time.monotonic() > self.deadline:
+            raise TimeUp()
+        row = self.board.drop(col, last)
+        try:
+            if self.board.wins_at(row, col, last):
+                return -(WIN - ply)
+            if self.board.is_full():
+                return 0
+            if depth <= 1:
+                return self.evaluate(tile)
+            return self.negamax(tile, depth - 1, alpha, beta, ply + 1)
+        finally:
+            # Also puts the board back if the search runs out of time
+            self.board.undo(col)
+
+    def negamax(self, tile, depth, alpha, beta, ply):
+        """
+        Score the position for the given tile, assuming both players play their best moves.
+
+        :param tile:    string, tile to play
+        :param depth:   int, number of moves to look ahead
+        :param alpha:   int, score the player to move is already sure of
+        :param beta:    int, score the opponent is already sure of
+        :param ply:     int, number of moves from the root
+        :return: int, score
+        """
+        table = self.table
+        order = self.order
+        if table is not None:
+            found = table.probe(self.board, tile)
+            if found is not None:
+                score, kind, searched, move = found
+                if searched >= depth:
+                    # Win and loss scores are stored as distances from this position, not from the root
+                    if score > WIN // 2:
+                        score -= ply
+                    elif score < -WIN // 2:
+                        score += ply
+                    if kind == EXACT:
+                        return max(alpha, min(score, beta))
+                    if kind == LOWER and score >= beta:
+                        return beta
+                    if kind == UPPER and score <= alpha:
+                        return alpha
+                if move >= 0:
+                    order = [move] + [col for col in order if col != move]
+        best = -1
+        other = other_tile(tile)
+        for col in order:
+            if not self.board.can_drop(col):
+                continue
+            score = -self.play(col, other, tile, depth, -beta, -alpha, ply)
+            if score > alpha:
+                alpha = score
+                best = col
+                if alpha >= beta:
+                    break
+        if table is not None:
+            kind = LOWER if alpha >= beta else EXACT if best >= 0 else UPPER
+            score = alpha
+            if score > WIN // 2:
+                score += ply
+            elif score < -WIN // 2:
+                score -= ply
+            table.store(self.board, tile, score, kind, depth, best)
+        return alpha
+
+    def evaluate(self, tile):
+        """
+        Score the position for the given tile by the lines each player could still complete.
+
+        :param tile: string, tile to play
+        :return: int, score
+        """
+        mine = self.board.masks[tile]
+        theirs = self.board.masks[other_tile(tile)]
+        weights = self.weights
+        score = 0
+        for line, direction in self.board.geometry.lines:
+            if not line & theirs:
+                score += weights[(line & mine).bit_count()]
+            elif not line & mine:
+                score -= weights[(line & theirs).bit_count()]
+        return score
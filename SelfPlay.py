@@ -0,0 +1,234 @@
+import argparse
+import multiprocessing
+import random
+import time
+from Game import Game
+from Search import Search
+from TranspositionTable import TranspositionTable
+
+
+class RandomPolicy(object):
+
+    def __init__(self, seed=None):
+        """
+        Plays a random column that is not full.
+
+        :param seed: int, seed for the random moves (or None to seed from the system)
+        """
+        self.random = random.Random(seed)
+
+    def reset(self, seed):
+        """
+        Start a new run of games.
+
+        :param seed: int, seed for the random moves
+        """
+        self.random.seed(seed)
+
+    def choose(self, board, tile):
+        """
+        :param board:   Board
+        :param tile:    string, tile to play
+        :return: int, column to place tile
+        """
+        return self.random.choice([col for col in range(board.width) if board.can_drop(col)])
+
+
+class SearchPolicy(object):
+
+    def __init__(self, time_limit=0.1, max_depth=None, table_size=4 * 1024 * 1024):
+        """
+        Plays the move the Bot would, using a Search.
+        The transposition table is only made once the first move is chosen, so the policy is cheap to send to
+        other processes.
+
+        :param time_limit:  float, seconds to think about each move
+        :param max_depth:   int, deepest search to try (or None to search until time is up)
+        :param table_size:  int, bytes of memory for the transposition table (or 0 for none)
+        """
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table_size = table_size
+        self.table = None
+
+    def reset(self, seed):
+        """
+        Start a new run of games. The search does not use random numbers, so the seed is not needed.
+
+        :param seed: int
+        """
+        pass
+
+    def choose(self, board, tile):
+        """
+        :param board:   Board
+        :param tile:    string, tile to play
+        :return: int, column to place tile
+        """
+        if self.table is None and self.table_size:
+            self.table = TranspositionTable(self.table_size)
+        return Search(board.copy(), self.time_limit, self.max_depth, self.table).best_move(tile)
+
+
+POLICIES = {'random': RandomPolicy, 'bot': SearchPolicy}
+
+
+class SelfPlayGame(Game):
+
+    def __init__(self, first, second, height=6, width=9, connect=5):
+        """
+        A game between two policies with no sockets, using the same rules as the servers.
+
+        :param first:   policy making the first move, as 'X'
+        :param second:  policy making the second move, as 'O'
+        :param height:  int, number of rows
+        :param width:   int, number of columns
+        :param connect: int, number of tiles in a row needed to win
+        """
+        Game.__init__(self, height, width, connect)
+        self.policies = [first, second]
+        self.players = [[None, None, 'X', "first"], [None, None, 'O', "second"]]
+
+    def send(self, msg, player):
+        """
+        There is no one to send messages to.
+
+        :param msg:     {}
+        :param player:  int, 0 for player 1, 1 for player 2
+        """
+        pass
+
+    def write(self, frame, player):
+        """
+        There is no one to send messages to.
+
+        :param frame:   bytes
+        :param player:  int, 0 for player 1, 1 for player 2
+        """
+        pass
+
+    def play(self):
+        """
+        Play one game on an empty board. A policy that picks a full column loses the game.
+
+        :return: (int, int), winning player (or None for a draw) and number of moves made
+        """
+        self.board.clear()
+        self.moves = []
+        player = 0
+        moves = 0
+        while True:
+            tile = self.players[player][2]
+            column = self.policies[player].choose(self.board, tile)
+            row = self.update_board(column, player)
+            if row is None:
+                return 1 - player, moves
+            moves += 1
+            if self.check_for_winner_at(row, column, tile):
+                return player, moves
+            if self.check_for_draw():
+                return None, moves
+            player = 1 - player
+
+
+def play_games(task):
+    """
+    Play a batch of games, in this process.
+
+    :param task: (policy, policy, int, int, (int, int, int)), first and second policies, number of games, seed and
+                 board size
+    :return: {}, results of the games
+    """
+    first, second, games, seed, geometry = task
+    first.reset(seed)
+    second.reset(seed + 1)
+    game = SelfPlayGame(first, second, *geometry)
+    results = {'games':0, 'first_wins':0, 'second_wins':0, 'draws':0, 'moves':0}
+    for _ in range(games):
+        winner, moves = game.play()
+        results['games'] += 1
+        results['moves'] += moves
+        if winner is None:
+            results['draws'] += 1
+        elif winner == 0:
+            results['first_wins'] += 1
+        else:
+            results['second_wins'] += 1
+    return results
+
+
+def run(first, second, games, processes=None, batch=100, seed=0, height=6, width=9, connect=5):
+    """
+    Play many games between two policies, spread over a pool of processes in batches.
+
+    :param first:       policy making the first move
+    :param second:      policy making the second move
+    :param games:       int, number of games to play
+    :param processes:   int, number of processes (or None for one per CPU, or 1 to play in this process)
+    :param batch:       int, number of games each process plays at a time
+    :param seed:        int, seed for the random policies, so runs can be repeated
+    :param height:      int, number of rows
+    :param width:       int, number of columns
+    :param connect:     int, number of tiles in a row needed to win
+    :return: {}, totals with the games per second, average game length and first player win rate
+    """
+    tasks = []
+    for start in range(0, games, batch):
+        tasks += [(first, second, min(batch, games - start), seed + start * 2, (height, width, connect))]
+    totals = {'games':0, 'first_wins':0, 'second_wins':0, 'draws':0, 'moves':0}
+    began = time.monotonic()
+    if processes == 1:
+        batches = map(play_games, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes)
+        batches = pool.imap_unordered(play_games, tasks)
+    try:
+        for results in batches:
+            for key in totals:
+                totals[key] += results[key]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    seconds = time.monotonic() - began
+    totals['seconds'] = seconds
+    totals['games_per_second'] = totals['games'] / seconds if seconds else 0.0
+    totals['average_length'] = totals['moves'] / totals['games'] if totals['games'] else 0.0
+    totals['first_win_rate'] = totals['first_wins'] / totals['games'] if totals['games'] else 0.0
+    return totals
+
+
+def make_policy(name, args):
+    """
+    :param name: string, 'random' or 'bot'
+    :param args: argparse.Namespace, command line options
+    :return: policy
+    """
+    if name == 'bot':
+        return SearchPolicy(time_limit=args.time, max_depth=args.depth)
+    return RandomPolicy()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play Connect-5 games between computer players, without a server.")
+    parser.add_argument('--games', type=int, default=1000, help="number of games to play")
+    parser.add_argument('--first', choices=sorted(POLICIES), default='random', help="player making the first move")
+    parser.add_argument('--second', choices=sorted(POLICIES), default='random', help="player making the second move")
+    parser.add_argument('--processes', type=int, default=None, help="number of processes (default one per CPU)")
+    parser.add_argument('--batch', type=int, default=100, help="number of games each process plays at a time")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random players")
+    parser.add_argument('--time', type=float, default=0.1, help="seconds the bot thinks about each move")
+    parser.add_argument('--depth', type=int, default=None, help="deepest the bot searches")
+    parser.add_argument('--height', type=int, default=6, help="number of rows on the board")
+    parser.add_argument('--width', type=int, default=9, help="number of columns on the board")
+    parser.add_argument('--connect', type=int, default=5, help="number of tiles in a row needed to win")
+    args = parser.parse_args()
+    totals = run(make_policy(args.first, args), make_policy(args.second, args), args.games, args.processes,
+                 args.batch, args.seed, args.height, args.width, args.connect)
+    print("Played %i games in %.2f seconds (%.1f games per second)" % (totals['games'], totals['seconds'],
+                                                                      totals['games_per_second']))
+    print("First player won %i, second player won %i, %i draws" % (totals['first_wins'], totals['second_wins'],
+                                                                   totals['draws']))
+    print("Average game length: %.1f moves" % totals['average_length'])
+    print("First player win rate: %.3f" % totals['first_win_rate'])
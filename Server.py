@@ -1,30 +1,66 @@
+import argparse
+import functools
+import logging
+import os
 import socket
-import json
 import threading
-import sys
+import time
+import Codec
+import Framing
+import Metrics
+from Game import Game, PING
+from GameLog import GameLog, MAX_WIDTH
+from Profiler import Profiler
+from Results import ResultsStore
+from TokenBucket import TokenBucket
 
+logger = logging.getLogger(__name__)
 
-class Server(object):
+# Heartbeats are the same in every codec, so they are framed once
+PING_FRAME = Framing.pack(Codec.JSON.encode(PING))
 
-    def __init__(self, host='127.0.0.1', port=80):
+
+class Server(Game):
+
+    def __init__(self, host='127.0.0.1', port=80, height=6, width=9, connect=5, log=None, profiler=None,
+                 rate_limit=None, burst=100, heartbeat=None, idle_timeout=None, results=None):
         """
         Initialises servers attributes.
-        If a socket, host or port is not given then a new socket will be created, host will be local and port will be 80.
-        Game board is represented as a 6x9 matrix (list of lists).
+        If a socket, host or port is not given then a new socket will be created, host will be local and port will be 80
+        (0 picks a free port).
+        The server hosts a single game (see Game).
 
         :param sock:
         :param host:
         :param port:
+        :param height:  int, number of rows
+        :param width:   int, number of columns
+        :param connect: int, number of tiles in a row needed to win
+        :param log:     GameLog, where finished games are recorded (or None)
+        :param profiler: Profiler, times each phase of handling a message (or None)
+        :param rate_limit: float, messages each player may send a second on average (or None for no limit)
+        :param burst:   int, messages each player may send at once
+        :param heartbeat: float, seconds a player may be quiet before they are sent a PING (or None to wait forever)
+        :param idle_timeout: float, seconds a player may be quiet before they are dropped and lose the game (or None
+                        to never drop them), checked every heartbeat
+        :param results: ResultsStore, where finished games are rated (or None)
         """
-        height = 6
-        width = 9
-        self.sock = self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        Game.__init__(self, height, width, connect, log, results)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.host = host
         self.port = port
-        self.players = []
-        self.game_over = True
-        self.replay = False
-        self.board = [[None] * width for _ in range(height)]
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.heartbeat = heartbeat
+        self.idle_timeout = idle_timeout
+        # Each player is handled by their own thread, so messages are processed one at a time
+        self.lock = threading.Lock()
+        # Frames waiting to be written, by socket, while a message is being handled (see process)
+        self.outbox = {}
+        self.handling = False
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.attach(self)
 
     def start(self):
         """
@@ -32,182 +68,99 @@ class Server(object):
         Two connections will be accepted, and for each a thread will begin that accepts and processes messages.
         """
         if self.connect():
-            print("Connect-5 server started!")
-            print("Waiting for players to join...")
+            logger.info("Connect-5 server started!")
+            logger.info("Waiting for players to join...")
             for player in range(2):
                 clientsocket, address = self.sock.accept()
                 thread = threading.Thread(target=self.main, args=(player, clientsocket, address))
                 thread.start()
         else:
-            print("Could not start server...")
+            logger.error("Could not start server...")
 
     def main(self, player, clientsocket, address):
         """
         The main loop that accepts and processes messages from each client.
+        A player who disconnects, or is quiet for longer than the idle timeout, forfeits the game (see forfeit).
 
         :param player:          int, 0 for the first player, 1 for the second
         :param clientsocket:    socket.socket, clients socket object
         :param address:         string, clients address
         """
-        self.client_setup(player, clientsocket, address)
-        while not self.game_over:
-            msg = clientsocket.recv(1024).decode()
-            self.process(msg, player)
-
-    def client_setup(self, player, clientsocket, address):
-        """
-        Saves clients data, assigns 'X' tile if first player and 'O' if second player.
-        Initial handshake messages are sent out to the clients.
-
-        :param player:          int, 0 for the first player, 1 for the second
-        :param clientsocket:    socket.socket, clients socket object
-        :param address:         string, clients address
-        """
-        if player == 0:
-            self.players += [[clientsocket, address, 'X']]
-            print("Player one has joined!")
-            self.send_handshake(player=player, wait=True, move=False)
-            self.game_over = False
-        else:
-            self.players += [[clientsocket, address, 'O']]
-            print("Player two has joined!")
-            self.send_handshake(player=player, wait=False, move=False)
-            self.send_handshake(player=not player, wait=False, move=True)
-
-    def process(self, msg, player):
-        """
-        Processes messages received from the clients. Messages must be in JSON format.
-        There are three message types;
-        'HELLO': The initial handshake message
-        'MOVE' : Update to the game board
-        'OVER' : Quitting message
-
-        :param msg:     JSON file
-        :param player:  int, 0 for first player, 1 for second
-        """
-        print("Player: ", player, "Message: ", msg)
+        Metrics.CONNECTIONS.inc()
+        Metrics.PLAYERS.inc()
         try:
-            msg = json.loads(msg)
-            if msg['type'] == 'HELLO':
-                if msg['replay']:
-                    # If the other player has not left yet
-                    if len(self.players) == 2:
-                        # If the other player said they want to play again already
-                        if self.replay:
-                            # Tell player to wait for other player to make move
-                            self.send_handshake(player=player, wait=False, move=False)
-                            # Tell other player to make their move
-                            self.send_handshake(player=not player, wait=False, move=True)
-                            self.replay = False
-                        # If the other player has not responded yet
-                        else:
-                            # Tell player to wait for other players reply
-                            self.send_handshake(player=player, wait=True, move=False)
-                            self.game_over = False
-                            self.replay = True
-                    # The other player has left
+            clientsocket.settimeout(self.heartbeat)
+            with self.lock:
+                self.client_setup(player, clientsocket, address)
+            reader = Framing.FrameReader(clientsocket)
+            read = reader.read if self.profiler is None else functools.partial(self.profiler.read, reader)
+            bucket = TokenBucket(self.rate_limit, self.burst) if self.rate_limit else None
+            seen = time.monotonic()
+            while not self.game_over:
+                try:
+                    msg = read()
+                except socket.timeout:
+                    idle = time.monotonic() - seen
+                    if self.idle_timeout is None or idle < self.idle_timeout:
+                        if self.ping(clientsocket):
+                            continue
                     else:
-                        # Tell player to quit
-                        self.send_quit(player=0, name="", quit=False, final=True)
-                        self.remove_player(0)
-                else:
-                    self.players[player] += [msg['name']]
-            elif msg['type'] == 'MOVE':
-                column = int(msg['col'])
-                row = self.update_board(column, player)
-                tile = self.players[player][2]
-                # If a winner has been found
-                if self.check_for_winner(tile):
-                    name = self.players[player][3]
-                    self.send_quit(player=0, name=name, quit=False, final=False, row=row, column=column, tile=tile)
-                    self.send_quit(player=1, name=name, quit=False, final=False, row=row, column=column, tile=tile)
-                # Otherwise update clients on new piece and which players move it is
-                else:
-                    self.send_update(player=player, move=False, row=row, column=column, tile=tile)
-                    self.send_update(player=not player, move=True, row=row, column=column, tile=tile)
-            elif msg['type'] == 'OVER':
-                # If player has quit
-                if msg['quit']:
-                    # Advise players that game is over
-                    name = self.players[not player][3]
-                    self.send_quit(player=0, name=name, quit=True, final=False)
-                    self.send_quit(player=1, name=name, quit=True, final=False)
-                    #self.game_over = True
-                # If player does not want to play again
-                else:
-                    self.remove_player(player)
-                    if self.replay:
-                        self.send_quit(player=0, name="", quit=False, final=True)
-                        self.remove_player(0)
-                    self.game_over = True
-        except ValueError:
-            print("Received data is not in JSON format...")
-            self.game_over = True
+                        logger.warning("Player %i has not answered for %.0fs, dropping them", player + 1, idle)
+                        Metrics.REAPED.inc()
+                    msg = b''
+                except OSError:
+                    # The socket has been closed, e.g. after the other player left
+                    msg = b''
+                if not msg:
+                    # The player has gone, and the game with them
+                    self.forfeit(clientsocket)
+                    break
+                seen = time.monotonic()
+                if self.allow(bucket, player):
+                    with self.lock:
+                        self.process(msg, player)
+        finally:
+            clientsocket.close()
+            Metrics.PLAYERS.dec()
 
-    def update_board(self, column, player):
+    def ping(self, clientsocket):
         """
-        Puts the given players tile in the given column at the lowest possible row.
-        The row is then returned to send to the clients.
+        Send a heartbeat to a player who has been quiet, which they answer with a PONG.
 
-        :param column: int, 0 to 8
-        :param player: int, 0 or 1
-        :return: row, 0 to 5
+        :param clientsocket:    socket.socket
+        :return: boolean, False if the connection has broken
         """
-        if self.board[0][column] is None:
-            for row in range(6):
-                if row == 5:
-                    self.board[row][column] = self.players[player][2]
-                    return row
-                elif self.board[row+1][column] is not None:
-                    self.board[row][column] = self.players[player][2]
-                    return row
-        else:
-            print("Row is full...")
-
-    def remove_player(self, index):
-        """
-        Close clients socket and remove players data.
-
-        :param index: int, 0 for first player, 1 for second player
-        """
-        if len(self.players) == 1:
-            index = 0
-        sock = self.players[index][0]
-        sock.close()
-        self.players.pop(index)
+        try:
+            # Not while the other players thread may be writing to this player
+            with self.lock:
+                clientsocket.sendall(PING_FRAME)
+            return True
+        except OSError:
+            return False
 
-    def check_for_winner(self, tile):
+    def forfeit(self, clientsocket):
         """
-        Check the board and see if the given tile has 5 in a row.
+        Remove a player who has left or stopped answering. If they were in the middle of a game their opponent
+        wins, and if their opponent was waiting to play again they are told it will not happen.
 
-        :param tile: string, 'X' or 'O'
-        :return: boolean, True if 5 in a row, False otherwise
+        :param clientsocket: socket.socket, the socket of the player who left
         """
-        # Check horizontal
-        for row in range(6):
-            for col in range(9-4):
-                if self.board[row][col] == tile and self.board[row][col+1] == tile and self.board[row][col+2] == tile \
-                    and self.board[row][col+3] == tile and self.board[row][col+4] == tile:
-                    return True
-        # Check vertical
-        for row in range(6-4):
-            for col in range(9):
-                if self.board[row][col] == tile and self.board[row+1][col] == tile and self.board[row+2][col] == tile \
-                    and self.board[row+3][col] == tile and self.board[row+4][col] == tile:
-                    return True
-        # Check rising diagonal
-        for row in range(4, 6):
-            for col in range(9-4):
-                if self.board[row][col] == tile and self.board[row-1][col+1] == tile and self.board[row-2][col+2] == tile \
-                    and self.board[row-3][col+3] == tile and self.board[row-4][col+4] == tile:
-                    return True
-        # Check falling diagonal
-        for row in range(6-4):
-            for col in range(9-4):
-                if self.board[row][col] == tile and self.board[row+1][col+1] == tile and self.board[row+2][col+2] == tile \
-                    and self.board[row+3][col+3] == tile and self.board[row+4][col+4] == tile:
-                    return True
-        return False
+        with self.lock:
+            index = next((index for index, data in enumerate(self.players) if data[0] is clientsocket), None)
+            if index is None:
+                return
+            if len(self.players) == 2:
+                other = self.players[1 - index]
+                if self.playing:
+                    self.record_game(winner=other[2], quit=True)
+                    self.send_quit(player=1 - index, name=other[3] if len(other) > 3 else "", quit=True,
+                                   final=False)
+                elif self.replay:
+                    self.send_quit(player=1 - index, name="", quit=False, final=True)
+                    self.replay = False
+            self.remove_player(index)
+            if not self.players:
+                self.game_over = True
 
     def connect(self):
         """
@@ -219,69 +172,147 @@ class Server(object):
         try:
             self.sock.bind((self.host, self.port))
             self.sock.listen(2)
+            self.port = self.sock.getsockname()[1]
             connected = True
         except socket.error as exc:
-            print("socket.error: %s" % exc)
+            logger.error("socket.error: %s", exc)
         return connected
 
-    def send(self, msg, player):
+    def process(self, msg, player):
         """
-        Turn msg into JSON and encode before sending to the given player.
+        Process a message (see Game.process). The replies to it are queued, and written together once it has
+        been handled.
 
-        :param msg:     {}
-        :param player:  int, 0 for player 1, 1 for player 2
+        :param msg:     bytes, encoded message
+        :param player:  int, 0 for first player, 1 for second
+        :return: string, the message type (or 'invalid' if it could not be decoded)
         """
-        self.players[player][0].send(json.dumps(msg).encode())
+        self.handling = True
+        try:
+            return Game.process(self, msg, player)
+        finally:
+            self.handling = False
 
-    def send_handshake(self, player, wait, move):
+    def write(self, frame, player):
         """
-        Creates and sends handshake message to the given player.
+        Write a frame to the given player, or queue it to be written by flush while a message is being handled.
 
-        :param player:  int, 0 or 1
-        :param wait:    boolean, True if the player must wait for another player
-        :param move:    boolean, True if its the players turn next
+        :param frame:   bytes
+        :param player:  int, 0 for player 1, 1 for player 2
         """
-        msg = {'type':'HELLO', 'wait':wait, 'move':move}
-        self.send(msg, player)
+        sock = self.players[player][0]
+        frames = self.outbox.get(sock)
+        if frames is None:
+            self.outbox[sock] = [frame]
+        else:
+            frames.append(frame)
+        if not self.handling:
+            self.flush()
 
-    def send_update(self, player, move, row, column, tile):
+    def flush(self):
         """
-        Creates and sends update message to the given player.
-
-        :param player:  int, 0 or 1
-        :param move:    boolean, True if its the players turn
-        :param row:     int, 0 to 5
-        :param column:  int, 0 to 8
-        :param tile:    string, 'X' or 'O'
+        Write every players queued frames, with one vectored write each (see Framing.send_frames).
+        Writing blocks while a player is not reading, for up to the heartbeat. If a players frames cannot be
+        written their connection is shut down, so the players own thread sees them leave.
         """
-        msg = {'type':'MOVE', 'move':move, 'row':row, 'col':column, 'tile':tile}
-        self.send(msg, player)
+        outbox, self.outbox = self.outbox, {}
+        for sock, frames in outbox.items():
+            try:
+                if len(frames) == 1:
+                    sock.sendall(frames[0])
+                else:
+                    Framing.send_frames(sock, frames)
+            except OSError as exc:
+                logger.warning("Could not send to %s: %s", sock, exc)
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
 
-    def send_quit(self, player, name, quit, final, row=None, column=None, tile=None):
-        """
-        Creates and sends quitting message to the given player.
 
-        :param player:  int, 0 or 1
-        :param name:    string, winning players name
-        :param quit:    boolean, True if the game was quit by a player mid game
-        :param final:   boolean, True if this is the final message to the client
-        :param row:     int, 0 to 5 (or None)
-        :param column:  int, 0 to 8 (or None)
-        :param tile:    string, 'X' or 'O' (or None)
-        """
-        msg = {'type':'OVER', 'name':name, 'quit':quit, 'final':final, 'row':row, 'col':column, 'tile':tile}
-        self.send(msg, player)
+def parse_args(description, workers=False):
+    """
+    Parse the command line arguments shared by the servers.
+
+    :param description: string, description shown in the help
+    :param workers:     boolean, True to offer the '--workers' option
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('host', nargs='?', default='127.0.0.1', help="IP address to listen on")
+    parser.add_argument('port', nargs='?', type=int, default=80, help="port number to listen on")
+    parser.add_argument('--height', type=int, default=6, help="number of rows on the board")
+    parser.add_argument('--width', type=int, default=9, help="number of columns on the board")
+    parser.add_argument('--connect', type=int, default=5, help="number of tiles in a row needed to win")
+    parser.add_argument('--log', default=None, help="file to append finished games to")
+    parser.add_argument('--results', default=None,
+                        help="SQLite database to store results and player ratings in (see Results.py)")
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="least important messages to show (DEBUG shows every message received)")
+    parser.add_argument('--metrics-port', type=int, default=None, help="port to serve Prometheus metrics on")
+    parser.add_argument('--metrics-host', default='127.0.0.1', help="IP address to serve metrics on")
+    parser.add_argument('--profile', action='store_true', help="time each phase of handling a message")
+    parser.add_argument('--profile-interval', type=float, default=10.0,
+                        help="seconds between profile breakdowns being logged")
+    parser.add_argument('--slow-ms', type=float, default=50.0,
+                        help="log the trace of any message that takes longer than this when profiling")
+    parser.add_argument('--profile-file', default=None,
+                        help="file to write cProfile stats to, started and stopped by sending SIGUSR1")
+    parser.add_argument('--rate-limit', type=float, default=50.0,
+                        help="messages each player may send a second on average (0 for no limit)")
+    parser.add_argument('--burst', type=int, default=100, help="messages each player may send at once")
+    parser.add_argument('--heartbeat', type=float, default=15.0,
+                        help="seconds a player may be quiet before they are sent a PING (0 to never send one)")
+    parser.add_argument('--idle-timeout', type=float, default=0.0,
+                        help="seconds a player may be quiet before they are dropped and lose their game (default 0, "
+                             "never drop them, as the simple client cannot answer a PING while the user is typing)")
+    if workers:
+        parser.add_argument('--workers', type=int, default=0,
+                            help="number of worker processes hosting games (default one game in this process)")
+    args = parser.parse_args()
+    if args.log and args.width > MAX_WIDTH:
+        parser.error("--log can only be used with boards up to %i columns wide" % MAX_WIDTH)
+    if getattr(args, 'workers', 0) and args.profile_file:
+        # Games are played in the workers, so the supervisor would never have any messages to capture
+        parser.error("--profile-file cannot be used with --workers")
+    return args
+
+
+def setup(args, metrics=True):
+    """
+    Set up logging, start serving metrics and make a profiler, as asked for on the command line.
+
+    :param args:    argparse.Namespace, from parse_args
+    :param metrics: boolean, False if the metrics are served by worker processes instead
+    :return: Profiler (or None if not profiling)
+    """
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if metrics and args.metrics_port is not None:
+        server = Metrics.serve(args.metrics_port, args.metrics_host)
+        logger.info("Serving metrics on http://%s:%i/metrics", *server.server_address)
+    if not args.profile:
+        return None
+    profiler = Profiler(args.profile_interval, args.slow_ms / 1000, args.profile_file)
+    if profiler.install():
+        logger.info("Send SIGUSR1 to process %i to start and stop capturing cProfile stats", os.getpid())
+    return profiler
 
 
 if __name__ == "__main__":
-    if len(sys.argv) == 1:
-        s = Server()
-        s.start()
-    elif len(sys.argv) == 2:
-        s = Server(host=sys.argv[1])
-        s.start()
-    elif len(sys.argv) == 3:
-        s = Server(host=sys.argv[1], port=int(sys.argv[2]))
-        s.start()
+    args = parse_args("Connect-5 server hosting a single game, or a game for every pair of players with --workers.",
+                      workers=True)
+    profiler = setup(args, metrics=not args.workers)
+    if args.workers:
+        # Imported here, as the supervisor imports this module to host games in its workers
+        from Supervisor import Supervisor
+        s = Supervisor(host=args.host, port=args.port, workers=args.workers, height=args.height, width=args.width,
+                       connect=args.connect, log=args.log, profiler=profiler, metrics_port=args.metrics_port,
+                       metrics_host=args.metrics_host, rate_limit=args.rate_limit, burst=args.burst,
+                       heartbeat=args.heartbeat or None, idle_timeout=args.idle_timeout or None, results=args.results)
     else:
-        print("Too many arguments provided.")
+        log = GameLog(args.log) if args.log else None
+        results = ResultsStore(args.results) if args.results else None
+        s = Server(host=args.host, port=args.port, height=args.height, width=args.width, connect=args.connect,
+                   log=log, profiler=profiler, rate_limit=args.rate_limit, burst=args.burst,
+                   heartbeat=args.heartbeat or None, idle_timeout=args.idle_timeout or None, results=results)
+    s.start()
@@ -0,0 +1,284 @@
+import logging
+import multiprocessing
+import select
+import socket
+import threading
+import time
+import Metrics
+from GameLog import GameLog, check_width, create
+from Results import ResultsStore
+from Server import Server
+
+logger = logging.getLogger(__name__)
+
+
+class Supervisor(object):
+
+    def __init__(self, host='127.0.0.1', port=80, workers=2, height=6, width=9, connect=5, log=None, profiler=None,
+                 metrics_port=None, metrics_host='127.0.0.1', rate_limit=None, burst=100, heartbeat=None,
+                 idle_timeout=None, results=None):
+        """
+        Initialises the supervisors attributes.
+        The supervisor accepts every connection and pairs them in the order they arrive. Both players of a pair are
+        handed to the same worker process, which hosts their game (see Server), so each worker owns its own set of
+        games and runs on its own core. Pairs are handed to the workers in turn, and a worker that dies is
+        restarted; only the games it was hosting are lost.
+
+        :param host:            string, IP address
+        :param port:            int, port number (0 picks a free port)
+        :param workers:         int, number of worker processes
+        :param height:          int, number of rows
+        :param width:           int, number of columns
+        :param connect:         int, number of tiles in a row needed to win
+        :param log:             string, file every worker appends finished games to (or None)
+        :param profiler:        Profiler, copied into every worker to time its games (or None)
+        :param metrics_port:    int, port the first worker serves its metrics on, the next worker uses the next
+                                port and so on (or None)
+        :param metrics_host:    string, IP address to serve metrics on
+        :param rate_limit:      float, messages each player may send a second on average (or None for no limit)
+        :param burst:           int, messages each player may send at once
+        :param heartbeat:       float, seconds a player may be quiet before they are sent a PING (or None)
+        :param idle_timeout:    float, seconds a player may be quiet before they are dropped (or None)
+        :param results:         string, SQLite database every worker stores results and ratings in (or None)
+        """
+        if log:
+            check_width(width)
+            # The header is written here, before there are any workers to race to write it
+            create(log)
+        self.host = host
+        self.port = port
+        self.geometry = (height, width, connect)
+        self.limits = (rate_limit, burst, heartbeat, idle_timeout)
+        self.log = log
+        self.results = results
+        self.profiler = profiler
+        self.metrics_port = metrics_port
+        self.metrics_host = metrics_host
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.workers = [None] * workers
+        self.channels = [None] * workers
+        self.restarts = 0
+        self.turn = 0
+        # The first player of a pair, and the worker the pair was given to
+        self.waiting = None
+        self.waiting_worker = None
+        self.stopping = threading.Event()
+        self.started = threading.Event()
+
+    def start(self):
+        """
+        Start the workers, then accept connections and hand them out until stop is called.
+        """
+        if not self.connect():
+            logger.error("Could not start server...")
+            self.started.set()
+            return
+        for index in range(len(self.workers)):
+            self.start_worker(index)
+        logger.info("Connect-5 server started with %i workers!", len(self.workers))
+        logger.info("Waiting for players to join...")
+        self.started.set()
+        try:
+            while not self.stopping.is_set():
+                readable, _, _ = select.select([self.sock], [], [], 0.5)
+                if readable:
+                    clientsocket, address = self.sock.accept()
+                    self.hand_out(clientsocket)
+                self.check_workers()
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        """
+        Stop accepting connections and stop the workers. Can be called from any thread.
+        """
+        self.stopping.set()
+
+    def connect(self):
+        """
+        Bind the servers IP address and port number, and start listening.
+
+        :return: boolean, True if no errors occur, otherwise False
+        """
+        connected = False
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.sock.bind((self.host, self.port))
+            self.sock.listen(128)
+            self.port = self.sock.getsockname()[1]
+            connected = True
+        except socket.error as exc:
+            logger.error("socket.error: %s", exc)
+        return connected
+
+    def start_worker(self, index):
+        """
+        Start (or restart) the worker with the given index, with a new channel to send it connections on.
+
+        :param index: int
+        """
+        parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Sockets the worker gets a copy of but must not keep open, so that closing them here still closes them
+        inherited = [sock for sock in self.channels + [self.waiting, self.sock, parent] if sock is not None]
+        metrics_port = None if self.metrics_port is None else self.metrics_port + index
+        process = multiprocessing.Process(target=work, name="worker%i" % index, daemon=True,
+                                          args=(child, inherited, self.geometry, self.limits, self.log,
+                                                self.results, self.profiler, metrics_port, self.metrics_host))
+        process.start()
+        child.close()
+        self.workers[index] = process
+        self.channels[index] = parent
+        logger.info("Started worker %i (process %i)", index, process.pid)
+
+    def check_workers(self):
+        """
+        Restart any worker that has died.
+        """
+        for index, process in enumerate(self.workers):
+            if not process.is_alive():
+                logger.warning("Worker %i (process %i) exited with code %s, restarting it...", index, process.pid,
+                               process.exitcode)
+                process.join()
+                self.channels[index].close()
+                if self.waiting_worker == index:
+                    self.clear_waiting()
+                self.restarts += 1
+                self.start_worker(index)
+
+    def hand_out(self, clientsocket):
+        """
+        Hand a new connection to a worker. The first player of a pair goes to the next worker in turn, and the
+        second player joins them, unless the first has left in the meantime.
+
+        :param clientsocket: socket.socket
+        """
+        if self.waiting is not None and not is_open(self.waiting):
+            self.clear_waiting()
+        if self.waiting is None:
+            index = self.turn % len(self.workers)
+            self.turn += 1
+            if self.send(index, clientsocket, 0):
+                # Kept open to see if the player leaves before they are paired
+                self.waiting = clientsocket
+                self.waiting_worker = index
+            else:
+                clientsocket.close()
+        else:
+            self.send(self.waiting_worker, clientsocket, 1)
+            clientsocket.close()
+            self.clear_waiting()
+
+    def send(self, index, clientsocket, player):
+        """
+        Pass the connection to the given worker.
+
+        :param index:           int, worker index
+        :param clientsocket:    socket.socket
+        :param player:          int, 0 for the first player of a pair, 1 for the second
+        :return: boolean, True if it was passed on
+        """
+        try:
+            socket.send_fds(self.channels[index], [bytes([player])], [clientsocket.fileno()])
+            return True
+        except OSError as exc:
+            logger.warning("Could not pass connection to worker %i: %s", index, exc)
+            return False
+
+    def clear_waiting(self):
+        """
+        Forget the first player of a pair.
+        """
+        if self.waiting is not None:
+            self.waiting.close()
+        self.waiting = None
+        self.waiting_worker = None
+
+    def shutdown(self):
+        """
+        Close the listening socket and stop every worker.
+        """
+        self.clear_waiting()
+        self.sock.close()
+        for channel in self.channels:
+            if channel is not None:
+                channel.close()
+        for process in self.workers:
+            if process is not None:
+                process.terminate()
+                process.join()
+
+
+def is_open(sock):
+    """
+    :param sock: socket.socket, connected
+    :return: boolean, False if the other end has closed the connection
+    """
+    try:
+        return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) != b''
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+
+
+def work(channel, inherited, geometry, limits, log, results, profiler, metrics_port, metrics_host):
+    """
+    A worker process: receive connections from the supervisor and host a game (see Server) for each pair.
+
+    :param channel:         socket.socket, UNIX socket connections are received on
+    :param inherited:       [socket.socket], the supervisors sockets, which the worker closes
+    :param geometry:        (int, int, int), height, width and tiles in a row needed to win
+    :param limits:          (float, int, float, float), rate limit, burst, heartbeat and idle timeout for each
+                            player (see Server)
+    :param log:             string, file to append finished games to (or None)
+    :param results:         string, SQLite database to store results and ratings in (or None)
+    :param profiler:        Profiler (or None)
+    :param metrics_port:    int, port to serve metrics on (or None)
+    :param metrics_host:    string, IP address to serve metrics on
+    """
+    for sock in inherited:
+        sock.close()
+    if metrics_port is not None:
+        Metrics.serve(metrics_port, metrics_host)
+    # Each worker has its own writer thread, appending whole records to the shared file
+    log = GameLog(log) if log else None
+    # Each worker rates its own games, reading the ratings in the same transaction so they stay consistent
+    results = ResultsStore(results) if results else None
+    game = None
+    first = None
+    while True:
+        try:
+            msg, fds, _, _ = socket.recv_fds(channel, 1, 1)
+        except OSError:
+            break
+        if not msg:
+            # The supervisor has gone
+            break
+        clientsocket = socket.socket(fileno=fds[0])
+        try:
+            address = clientsocket.getpeername()
+        except OSError:
+            clientsocket.close()
+            continue
+        player = msg[0]
+        # The first players thread runs until they leave, in which case the second player starts a new game
+        if player == 0 or first is None or not first.is_alive():
+            height, width, connect = geometry
+            rate_limit, burst, heartbeat, idle_timeout = limits
+            game = Server(height=height, width=width, connect=connect, log=log, profiler=profiler,
+                          rate_limit=rate_limit, burst=burst, heartbeat=heartbeat, idle_timeout=idle_timeout,
+                          results=results)
+            game.sock.close()
+            player = 0
+        else:
+            # The second player must not join before the first has been set up
+            while not game.players and first.is_alive():
+                time.sleep(0.001)
+        thread = threading.Thread(target=game.main, args=(player, clientsocket, address), daemon=True)
+        thread.start()
+        if player == 0:
+            first = thread
+    if log is not None:
+        log.close()
+    if results is not None:
+        results.close()
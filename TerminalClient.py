@@ -0,0 +1,196 @@
+import os
+import selectors
+import sys
+from Client import Client
+from Renderer import BoardRenderer
+
+
+class TerminalClient(Client):
+
+    def __init__(self, host='127.0.0.1', port=80, spectate=False, stdin=None, out=None):
+        """
+        Client that waits for the server and the user at the same time with a selector, instead of asking for
+        input and then blocking on the server, so it can show the opponent quitting while the user is typing.
+        The board is drawn with ANSI escape sequences, redrawing only the cells that change (see BoardRenderer).
+        Standard input must be selectable, which it is not on Windows.
+
+        :param host:        string, IP address
+        :param port:        int, port number
+        :param spectate:    boolean, True to watch a game instead of playing
+        :param stdin:       file, where the users lines are read from (or None for sys.stdin)
+        :param out:         file, terminal to draw on (or None for sys.stdout)
+        """
+        Client.__init__(self, host, port, spectate)
+        self.stdin = sys.stdin if stdin is None else stdin
+        self.renderer = BoardRenderer(sys.stdout if out is None else out)
+        # What the next line the user enters answers: 'move', 'confirm' (quitting) or 'again' (playing again)
+        self.question = None
+        self.typed = b''
+
+    def start(self):
+        """
+        Starts client-side of the game. User must enter their name (unless it is already set) and the client
+        attempts to join server, then the event loop runs until the user is done.
+        """
+        self.show("Connect-5 client started")
+        if self.name is None:
+            self.name = input("Please enter your name: ")
+        while not self.stop:
+            self.show("Connecting to server...")
+            if self.connect():
+                self.show("Connected!")
+                self.send_handshake()
+                self.run()
+            else:
+                self.show("Could not connect to server...")
+                if not self.try_again():
+                    self.stop = True
+        self.sock.close()
+
+    def run(self):
+        """
+        Event loop: handle messages from the server and lines from the user as they arrive, until the client stops.
+        """
+        self.game_over = False
+        selector = selectors.DefaultSelector()
+        selector.register(self.sock, selectors.EVENT_READ, self.on_server)
+        selector.register(self.stdin, selectors.EVENT_READ, self.on_user)
+        try:
+            while not self.stop:
+                for key, _ in selector.select():
+                    key.data()
+                    if self.stop:
+                        break
+        finally:
+            selector.close()
+
+    def on_server(self):
+        """
+        Read whatever the server has sent and process every complete message.
+        """
+        data = self.sock.recv(4096)
+        if not data:
+            self.show("Lost connection to the server...")
+            self.stop = True
+            return
+        self.reader.feed(data)
+        msg = self.reader.next_frame()
+        while msg is not None and not self.stop:
+            self.process(msg)
+            msg = self.reader.next_frame()
+        self.renderer.draw(self.board)
+        self.ask()
+
+    def on_user(self):
+        """
+        Read what the user has typed and act on every line they have entered.
+        Standard input is read directly rather than through its buffer, which could hold lines the selector
+        does not know about.
+        """
+        data = os.read(self.stdin.fileno(), 4096)
+        if not data:
+            # Standard input has closed, so leave the game
+            if self.game_over:
+                self.send_quit()
+            else:
+                self.send_move(-1)
+            self.stop = True
+            return
+        self.typed += data
+        while b'\n' in self.typed and not self.stop:
+            line, self.typed = self.typed.split(b'\n', 1)
+            self.answer(line.decode(errors='replace').strip())
+
+    def ask(self):
+        """
+        Prompt the user for whatever they need to answer next.
+        """
+        if self.stop:
+            return
+        if self.game_over:
+            self.question = 'again'
+            if self.spectate:
+                self.renderer.prompt("Would you like to watch another game? (y/n) ")
+            else:
+                self.renderer.prompt("Would you like to play again? (y/n) ")
+        elif self.move and self.question != 'confirm':
+            self.question = 'move'
+            self.renderer.prompt("It's your turn, please enter a column between 1-%i (or 0 to quit): " %
+                                 self.board.width)
+        elif not self.move:
+            self.question = None
+            if self.spectate:
+                self.renderer.prompt("Waiting for the next move...")
+            else:
+                self.renderer.prompt("Waiting for opponent to make their move...")
+
+    def answer(self, line):
+        """
+        Act on a line entered by the user, depending on the question they were asked.
+
+        :param line: string
+        """
+        if self.question == 'again':
+            if line not in ('y', 'n'):
+                self.ask()
+                return
+            if line == 'y':
+                self.game_over = False
+                self.move = None
+                self.send_handshake(replay=True)
+                self.question = None
+                self.renderer.prompt("")
+            else:
+                self.send_quit()
+                self.replay = False
+                self.stop = True
+        elif self.question == 'confirm':
+            if line == 'y':
+                self.send_move(-1)
+                self.question = None
+                self.renderer.prompt("")
+            elif line == 'n':
+                self.question = None
+                self.ask()
+            else:
+                self.renderer.prompt("Are you sure you want to quit? (y/n) ")
+        elif self.question == 'move':
+            try:
+                col = int(line) - 1
+            except ValueError:
+                self.show("Please enter a number...")
+                self.ask()
+                return
+            if col == -1:
+                self.question = 'confirm'
+                self.renderer.prompt("Are you sure you want to quit? (y/n) ")
+            elif self.check_move(col):
+                self.move = False
+                self.ask()
+                self.send_move(col)
+            else:
+                self.ask()
+        else:
+            self.show("It's not your turn yet...")
+            self.ask()
+
+    def receive(self):
+        """
+        Messages are read by the event loop as they arrive, so there is never a message to wait for.
+        """
+        pass
+
+    def show(self, text):
+        """
+        Show a message in the status lines under the board.
+
+        :param text: string
+        """
+        self.renderer.show(text)
+
+    def print_board(self):
+        """
+        Bring the board on the terminal up to date.
+        """
+        self.renderer.draw(self.board)
+
@@ -0,0 +1,164 @@
+import csv
+import io
+import os
+import tempfile
+import unittest
+from Board import Board, DIRECTIONS
+from Benchmark import random_games
+from GameLog import GameLog, GameRecord
+from Server import Server
+try:
+    import numpy
+    import Analytics
+except ImportError:
+    numpy = None
+
+
+def has_line(board, tile, d_row, d_col, connect=5):
+    """
+    :return: boolean, True if the tile has enough in a row in the given direction
+    """
+    cells = board.to_list()
+    for row in range(board.height):
+        for col in range(board.width):
+            line = [(row + d_row * i, col + d_col * i) for i in range(connect)]
+            if all(0 <= r < board.height and 0 <= c < board.width and cells[r][c] == tile for r, c in line):
+                return True
+    return False
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class AnalyticsTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        os.remove(self.path)
+        self.records = []
+        for index, moves in enumerate(random_games(300, seed=4)):
+            # Some games are opened by 'O', as happens when 'X' is the second to ask to play again
+            record = GameRecord(("a", "b"), moves, None, quit=index % 10 == 3, first='O' if index % 3 == 1 else 'X')
+            board = Board()
+            for col, tile in zip(moves, record.tiles()):
+                row = board.drop(col, tile)
+            last = record.tiles()[-1]
+            record.winner = last if board.wins_at(row, moves[-1], last) else None
+            self.records += [record]
+        self.records += [GameRecord(("a", ""), [], 'X', quit=True),
+                         GameRecord(("a", "b"), [1, 2, 3], 'O', height=4, width=4, connect=3)]
+        log = GameLog(self.path)
+        for record in self.records:
+            log.append(record)
+        log.close()
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_chunks(self):
+        chunks = list(Analytics.chunks(self.path, size=64))
+        self.assertEqual([len(chunk) for chunk in chunks], [64, 64, 64, 64, 45, 1])
+        self.assertEqual(chunks[-1].geometry, (4, 4, 3))
+        games = [game for chunk in chunks[:-1] for game in zip(chunk.moves.tolist(), chunk.lengths.tolist(),
+                                                                 chunk.results.tolist(), chunk.quits.tolist(),
+                                                                 chunk.firsts.tolist())]
+        results = {None: Analytics.DRAW, 'X': Analytics.X_WINS, 'O': Analytics.O_WINS}
+        for record, (moves, length, result, quit, first) in zip(self.records, games):
+            self.assertEqual(moves[:length], record.moves)
+            self.assertTrue(all(col == -1 for col in moves[length:]))
+            self.assertEqual(result, results[record.winner])
+            self.assertEqual(quit, record.quit)
+            self.assertEqual(first, {'X': 1, 'O': 2}[record.first])
+
+    def test_boards(self):
+        chunk = next(Analytics.chunks(self.path, size=50))
+        boards = chunk.boards()
+        for record, board in zip(self.records, boards):
+            replayed = Board()
+            for col, tile in zip(record.moves, record.tiles()):
+                replayed.drop(col, tile)
+            expected = [[{None: 0, 'X': 1, 'O': 2}[tile] for tile in row] for row in replayed.to_list()]
+            self.assertEqual(board.tolist(), expected)
+
+    def test_statistics(self):
+        totals = Analytics.analyse([self.path], size=100)
+        self.assertEqual(sorted(totals), [(4, 4, 3), (6, 9, 5)])
+        stats = totals[(6, 9, 5)].to_dict()
+        # The same statistics, replaying every game through the server one move at a time
+        server = Server(port=0)
+        server.sock.close()
+        server.players = [[None, None, 'X'], [None, None, 'O']]
+        records = self.records[:-1]
+        openings = {}
+        directions = {name: {'X': 0, 'O': 0} for name, _, _ in DIRECTIONS}
+        usage = {}
+        for record in records:
+            if record.quit:
+                continue
+            server.board.clear()
+            for index, (col, tile) in enumerate(zip(record.moves, record.tiles())):
+                server.update_board(col, 0 if tile == 'X' else 1)
+                usage[(index, col)] = usage.get((index, col), 0) + 1
+            counts = openings.setdefault(record.moves[0], [0, 0, 0, 0])
+            counts[0] += 1
+            counts[3 if record.winner is None else 1 if record.winner == record.first else 2] += 1
+            if record.winner is not None:
+                for name, d_row, d_col in DIRECTIONS:
+                    directions[name][record.winner] += has_line(server.board, record.winner, d_row, d_col)
+        self.assertEqual(stats['games'], len(records))
+        self.assertEqual(stats['quits'], sum(record.quit for record in records))
+        self.assertAlmostEqual(stats['average_length'], sum(len(r.moves) for r in records) / len(records))
+        lengths = {}
+        for record in records:
+            lengths[len(record.moves)] = lengths.get(len(record.moves), 0) + 1
+        self.assertEqual(stats['lengths'], lengths)
+        for opening in stats['openings']:
+            counts = openings.get(opening['column'], [0, 0, 0, 0])
+            self.assertEqual([opening['games'], opening['first_wins'], opening['second_wins'], opening['draws']],
+                             counts)
+        for ply, row in enumerate(stats['column_usage']):
+            for col, count in enumerate(row):
+                self.assertEqual(count, usage.get((ply, col), 0))
+        self.assertEqual(stats['win_directions'], directions)
+        self.assertGreater(sum(counts['X'] + counts['O'] for counts in directions.values()), 0)
+
+    def test_o_first(self):
+        # 'O' opens the second game after 'X' is the second to ask to play again, and wins down column 0
+        log = GameLog(self.path + '.replay')
+        log.append(GameRecord(("a", "b"), [0, 1, 0, 1, 0, 1, 0, 1, 0], 'O', first='O'))
+        log.close()
+        try:
+            chunk, = Analytics.chunks(self.path + '.replay')
+            self.assertEqual(chunk.boards()[0, 1:, 0].tolist(), [Analytics.BatchEvaluator.O] * 5)
+            stats = Analytics.analyse([self.path + '.replay'])[(6, 9, 5)].to_dict()
+        finally:
+            os.remove(self.path + '.replay')
+        self.assertEqual(stats['openings'][0]['first_wins'], 1)
+        self.assertEqual(stats['openings'][0]['first_win_rate'], 1.0)
+        self.assertEqual(stats['win_directions']['vertical'], {'X': 0, 'O': 1})
+        self.assertEqual(sum(counts['X'] for counts in stats['win_directions'].values()), 0)
+
+    def test_rows(self):
+        stats = Analytics.analyse([self.path])[(4, 4, 3)]
+        rows = stats.rows()
+        self.assertIn(('summary', '4x4x3', '', 'games', 1), rows)
+        self.assertIn(('openings', '4x4x3', 1, 'second_wins', 1), rows)
+        self.assertIn(('column_usage', '4x4x3', 2, 3, 1), rows)
+        self.assertIn(('win_directions', '4x4x3', 'horizontal', 'O', 0), rows)
+        out = io.StringIO()
+        csv.writer(out).writerows(rows)
+        self.assertEqual(len(out.getvalue().splitlines()), len(rows))
+
+    def test_empty_log(self):
+        GameLog(self.path + '.empty').close()
+        try:
+            self.assertEqual(Analytics.analyse([self.path + '.empty']), {})
+        finally:
+            os.remove(self.path + '.empty')
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
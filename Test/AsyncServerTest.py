@@ -0,0 +1,365 @@
+import threading
+import time
+import unittest
+import Codec
+import Framing
+import Metrics
+from AsyncServer import AsyncServer, Room
+from Test.MockClient import MockClient
+
+
+class MockTransport(object):
+
+    def __init__(self, buffered):
+        self.buffered = buffered
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+
+class MockWriter(object):
+
+    def __init__(self, buffered):
+        self.transport = MockTransport(buffered)
+        self.frames = []
+        self.closed = False
+
+    def write(self, data):
+        self.frames += [data]
+
+    def is_closing(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+class AsyncServerTest(unittest.TestCase):
+
+    def test_init(self):
+        host = 'localhost'
+        port = 80
+        server = AsyncServer(host=host, port=port)
+        self.assertEqual(server.host, host)
+        self.assertEqual(server.port, port)
+        self.assertEqual(server.rooms, {})
+        self.assertEqual(server.lobby.depth(), 0)
+
+    def test_room(self):
+        first = [None, None, None, 'James']
+        second = [None, None, None, 'Anna']
+        room = Room(1, first, second)
+        self.assertEqual(room.players, [first, second])
+        self.assertEqual((first[2], second[2]), ('X', 'O'))
+        self.assertEqual(room.update_board(4, 1), 5)
+        self.assertEqual(room.board.get(5, 4), 'O')
+
+    def test_handshake(self):
+        server = self.start_server()
+        client1 = self.join(server, 'James')
+        self.assertEqual(server.lobby.depth(), 1)
+        client2 = self.join(server, 'Anna')
+        geometry = {'height':6, 'width':9, 'connect':5}
+        self.assertEqual(self.receive(client1), dict({'type':'HELLO', 'wait':False, 'move':True}, **geometry))
+        self.assertEqual(self.receive(client2), dict({'type':'HELLO', 'wait':False, 'move':False}, **geometry))
+        self.assertEqual(server.lobby.depth(), 0)
+        self.assertEqual(len(server.rooms), 1)
+        self.assertEqual(server.lobby.stats()['matched'], 2)
+        self.quit(server, [client1, client2])
+
+    def test_geometry(self):
+        server = self.start_server(height=10, width=15, connect=6)
+        client1 = self.join(server, 'James')
+        client2 = self.join(server, 'Anna')
+        msg = self.receive(client1)
+        self.assertEqual((msg['height'], msg['width'], msg['connect']), (10, 15, 6))
+        self.receive(client2)
+        self.send(client1, {'type':'MOVE', 'col':14})
+        msg = self.receive(client2)
+        self.assertEqual((msg['row'], msg['col']), (9, 14))
+        self.quit(server, [client1, client2])
+
+    def test_separate_rooms(self):
+        server = self.start_server()
+        clients = [self.join(server, str(i)) for i in range(4)]
+        for client in clients:
+            self.receive(client)
+        self.assertEqual(len(server.rooms), 2)
+        # The first player of the first room moves
+        self.send(clients[0], {'type':'MOVE', 'col':3})
+        self.assertEqual(self.receive(clients[0])['type'], 'MOVE')
+        room1, room2 = [server.rooms[number] for number in sorted(server.rooms)]
+        self.assertEqual(room1.board.get(5, 3), 'X')
+        self.assertEqual(room2.board.get(5, 3), None)
+        self.quit(server, clients)
+
+    def test_negotiate_binary(self):
+        server = self.start_server()
+        client1 = self.join(server, 'James', codecs=Codec.PREFERENCE)
+        client2 = self.join(server, 'Anna')
+        self.receive(client1)
+        self.receive(client2)
+        self.send(client1, {'type':'MOVE', 'col':6}, Codec.BINARY)
+        payload = client1.reader.read()
+        self.assertEqual(len(payload), 4)
+        msg = Codec.decode(payload)
+        self.assertEqual((msg['type'], msg['row'], msg['col'], msg['tile']), ('MOVE', 5, 6, 'X'))
+        # The other player never offered any codecs, so still gets JSON
+        payload = client2.reader.read()
+        self.assertEqual(Codec.decode(payload)['move'], True)
+        self.assertEqual(payload[:1], b'{')
+        self.quit(server, [client1, client2])
+
+    def test_play_again(self):
+        server = self.start_server()
+        client1 = self.join(server, 'James')
+        client2 = self.join(server, 'Anna')
+        self.receive(client1)
+        self.receive(client2)
+        self.send(client1, {'type':'MOVE', 'col':0})
+        self.receive(client1)
+        self.receive(client2)
+        self.send(client2, {'type':'OVER', 'quit':True})
+        self.assertEqual(self.receive(client1)['name'], 'James')
+        self.assertEqual(self.receive(client2)['quit'], True)
+        while server.rooms:
+            time.sleep(0.01)
+        # Both players go back in the lobby and are given a new room
+        for client in (client2, client1):
+            self.send(client, {'type':'HELLO', 'name':None, 'replay':True})
+            self.assertEqual(self.receive(client)['wait'], True)
+        self.assertEqual(self.receive(client2)['move'], True)
+        self.assertEqual(self.receive(client1)['move'], False)
+        room = list(server.rooms.values())[0]
+        self.assertEqual(room.board.get(5, 0), None)
+        self.assertEqual([data[3] for data in room.players], ['Anna', 'James'])
+        self.quit(server, [client1, client2])
+
+    def test_forfeit(self):
+        server = self.start_server()
+        client1 = self.join(server, 'James')
+        client2 = self.join(server, 'Anna')
+        self.receive(client1)
+        self.receive(client2)
+        client1.sock.close()
+        msg = self.receive(client2)
+        self.assertEqual((msg['type'], msg['name'], msg['quit']), ('OVER', 'Anna', True))
+        self.quit(server, [client2])
+
+    def test_leave_lobby(self):
+        server = self.start_server()
+        client1 = self.join(server, 'James')
+        client1.sock.close()
+        while server.lobby.depth() != 0:
+            time.sleep(0.01)
+        client2 = self.join(server, 'Anna')
+        self.assertEqual(server.lobby.depth(), 1)
+        self.quit(server, [client2])
+
+    def test_spectate(self):
+        server = self.start_server()
+        client1 = self.join(server, 'James')
+        client2 = self.join(server, 'Anna')
+        self.receive(client1)
+        self.receive(client2)
+        self.send(client1, {'type':'MOVE', 'col':4})
+        self.receive(client1)
+        self.receive(client2)
+        spectators = [self.watch(server, 'Zoe'), self.watch(server, 'Sam', codecs=Codec.PREFERENCE)]
+        for spectator in spectators:
+            msg = self.receive(spectator)
+            self.assertEqual(msg, {'type':'WATCH', 'room':1, 'players':['James', 'Anna'], 'height':6, 'width':9,
+                                   'connect':5, 'moves':[4], 'first':'X'})
+        room = server.rooms[1]
+        while len(room.spectators) != 2:
+            time.sleep(0.01)
+        self.send(client2, {'type':'MOVE', 'col':3})
+        for spectator in spectators:
+            msg = self.receive(spectator)
+            self.assertEqual((msg['type'], msg['move'], msg['row'], msg['col'], msg['tile']),
+                             ('MOVE', False, 5, 3, 'O'))
+        self.send(client1, {'type':'OVER', 'quit':True})
+        for spectator in spectators:
+            msg = self.receive(spectator)
+            self.assertEqual((msg['type'], msg['name'], msg['quit']), ('OVER', 'Anna', True))
+        while room.spectators:
+            time.sleep(0.01)
+        self.quit(server, [client1, client2] + spectators)
+
+    def test_spectate_no_game(self):
+        server = self.start_server()
+        spectator = self.watch(server, 'Zoe')
+        msg = self.receive(spectator)
+        self.assertEqual((msg['type'], msg['final']), ('OVER', True))
+        self.assertEqual(server.lobby.depth(), 0)
+        self.quit(server, [spectator])
+
+    def test_broadcast(self):
+        first = [None, None, None, 'James']
+        second = [None, None, None, 'Anna']
+        room = Room(1, first, second)
+        fast = [MockWriter(0), None, None, 'Zoe', Codec.BINARY]
+        slow = [MockWriter(Room.SPECTATOR_BUFFER + 1), None, None, 'Sam', Codec.BINARY]
+        other = [MockWriter(0), None, None, 'Max', Codec.JSON]
+        for data in (fast, slow, other):
+            room.watch(data)
+            data[0].frames = []
+        room.broadcast(room.update_msg(move=False, row=5, column=4, tile='X'))
+        self.assertEqual(room.spectators, [fast, other])
+        self.assertEqual(room.dropped, 1)
+        self.assertEqual(slow[0].closed, True)
+        self.assertEqual(Codec.decode(fast[0].frames[0][2:])['col'], 4)
+        self.assertEqual(other[0].frames[0][2:3], b'{')
+        room.broadcast(room.quit_msg(name='James', quit=False, final=False))
+        self.assertEqual(room.spectators, [])
+        self.assertEqual(len(fast[0].frames), 2)
+
+    def test_send_both(self):
+        first = [MockWriter(0), None, None, 'James', Codec.BINARY]
+        second = [MockWriter(0), None, None, 'Anna', Codec.BINARY]
+        spectator = [MockWriter(0), None, None, 'Zoe', Codec.BINARY]
+        room = Room(1, first, second)
+        room.start()
+        room.watch(spectator)
+        encoded = []
+        encode = room.encode
+        room.encode = lambda msg, player: encoded.append(msg) or encode(msg, player)
+        room.process(Codec.BINARY.encode({'type':'MOVE', 'col':4}), 0)
+        # The update is encoded once, and the opponent is told it is their move by setting the flag
+        self.assertEqual(len(encoded), 1)
+        self.assertEqual(Codec.decode(first[0].frames[-1][2:])['move'], False)
+        self.assertEqual(Codec.decode(second[0].frames[-1][2:])['move'], True)
+        self.assertEqual(spectator[0].frames[-1], first[0].frames[-1])
+        room.process(Codec.BINARY.encode({'type':'OVER', 'quit':True}), 1)
+        self.assertEqual(len(encoded), 2)
+        self.assertEqual(first[0].frames[-1], second[0].frames[-1])
+        self.assertEqual(Codec.decode(first[0].frames[-1][2:])['name'], 'James')
+        self.assertEqual(room.finished, True)
+
+    def test_validate_move(self):
+        first = [MockWriter(0), None, None, 'James', Codec.JSON]
+        second = [MockWriter(0), None, None, 'Anna', Codec.JSON]
+        room = Room(1, first, second, height=2)
+        room.start()
+        for data in (first, second):
+            data[0].frames = []
+        for player, col, code in [(1, 4, 'turn'), (0, 9, 'column'), (0, -1, 'column'), (0, '3', 'column'),
+                                  (0, None, 'column'), (0, True, 'column')]:
+            room.process(Codec.JSON.encode({'type':'MOVE', 'col':col}), player)
+            msg = Codec.decode(room.players[player][0].frames.pop()[2:])
+            self.assertEqual((msg['type'], msg['code']), ('ERROR', code))
+        self.assertEqual(room.moves, [])
+        for player in (0, 1):
+            room.process(Codec.JSON.encode({'type':'MOVE', 'col':4}), player)
+        room.process(Codec.JSON.encode({'type':'MOVE', 'col':4}), 0)
+        self.assertEqual(Codec.decode(first[0].frames.pop()[2:])['code'], 'full')
+        # The game carries on after a refused move
+        room.process(Codec.JSON.encode({'type':'MOVE', 'col':3}), 0)
+        self.assertEqual(room.moves, [4, 4, 3])
+        self.assertEqual(room.turn, 1)
+        room.process(Codec.JSON.encode({'type':'CHAT'}), 1)
+        self.assertEqual(Codec.decode(second[0].frames.pop()[2:])['code'], 'type')
+        self.assertEqual(room.game_over, False)
+
+    def test_rate_limit(self):
+        server = self.start_server(rate_limit=0.001, burst=3)
+        client = self.join(server, 'James')
+        for _ in range(4):
+            self.send(client, {'type':'OVER', 'quit':True})
+        self.assertEqual(self.receive(client), {'type':'ERROR', 'code':'rate',
+                                                'message':"Too many messages, slow down..."})
+        # Only the first message refused in a row is answered
+        client.sock.settimeout(0.2)
+        self.assertRaises(OSError, client.reader.read)
+        self.quit(server, [client])
+
+    def test_ping(self):
+        server = self.start_server()
+        client1 = self.join(server, 'James')
+        self.send(client1, {'type':'PING'})
+        self.assertEqual(self.receive(client1), {'type':'PONG'})
+        client2 = self.join(server, 'Anna')
+        self.receive(client1)
+        self.receive(client2)
+        self.send(client2, {'type':'PING'})
+        self.assertEqual(self.receive(client2), {'type':'PONG'})
+        self.quit(server, [client1, client2])
+
+    def test_heartbeat(self):
+        server = self.start_server(heartbeat=0.05)
+        client = self.join(server, 'James')
+        self.assertEqual(self.receive(client), {'type':'PING'})
+        self.quit(server, [client])
+
+    def test_reap(self):
+        reaped = Metrics.REAPED.get()
+        server = self.start_server(heartbeat=0.05, idle_timeout=0.2)
+        client1 = self.join(server, 'James')
+        client2 = self.join(server, 'Anna')
+        self.receive(client1)
+        self.receive(client2)
+        # Only the second player answers, so the first is dropped and loses
+        msg = self.answer_pings(client2)
+        self.assertEqual((msg['type'], msg['name'], msg['quit']), ('OVER', 'Anna', True))
+        self.assertEqual(len(server.seen), 1)
+        self.assertEqual(Metrics.REAPED.get(), reaped + 1)
+        self.quit(server, [client1, client2])
+
+        """-------------HELPER FUNCTIONS-------------------------"""
+
+    def answer_pings(self, client):
+        msg = self.receive(client)
+        while msg['type'] == 'PING':
+            self.send(client, {'type':'PONG'})
+            msg = self.receive(client)
+        return msg
+
+    def watch(self, server, name, codecs=None):
+        client = MockClient(port=server.port)
+        client.connect()
+        msg = {'type':'HELLO', 'name':name, 'replay':False, 'spectate':True}
+        if codecs is not None:
+            msg['codecs'] = codecs
+        self.send(client, msg)
+        if codecs is not None:
+            self.assertEqual(self.receive(client), {'type':'HELLO', 'codec':'binary'})
+        return client
+
+    def start_server(self, **kwargs):
+        server = AsyncServer(port=0, **kwargs)
+        thread = threading.Thread(target=server.start, daemon=True)
+        thread.start()
+        server.started.wait()
+        return server
+
+    def join(self, server, name, codecs=None):
+        client = MockClient(port=server.port)
+        client.connect()
+        msg = {'type':'HELLO', 'name':name, 'replay':False}
+        if codecs is not None:
+            msg['codecs'] = codecs
+        self.send(client, msg)
+        if codecs is not None:
+            self.assertEqual(self.receive(client), {'type':'HELLO', 'codec':'binary'})
+        msg = self.receive(client)
+        self.assertEqual((msg['type'], msg['wait'], msg['move']), ('HELLO', True, False))
+        return client
+
+    def send(self, client, msg, codec=Codec.JSON):
+        client.sock.sendall(Framing.pack(codec.encode(msg)))
+
+    def receive(self, client):
+        client.receive_messages(1)
+        return client.msg_queue.get()
+
+    def quit(self, server, clients):
+        for client in clients:
+            client.sock.close()
+        server.stop()
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import random
+import unittest
+from Board import Board
+from Server import Server
+try:
+    import numpy
+    import BatchEvaluator
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class BatchEvaluatorTest(unittest.TestCase):
+
+    def test_stack(self):
+        board = Board()
+        board.drop(2, 'X')
+        board.drop(2, 'O')
+        boards = BatchEvaluator.stack([board, Board()])
+        self.assertEqual(boards.shape, (2, 6, 9))
+        self.assertEqual(boards[0, 5, 2], BatchEvaluator.X)
+        self.assertEqual(boards[0, 4, 2], BatchEvaluator.O)
+        self.assertEqual(boards[1].sum(), 0)
+
+    def test_win_directions(self):
+        boards = numpy.zeros((4, 6, 9), dtype=numpy.int8)
+        for i in range(5):
+            boards[0, 3, 4 + i] = BatchEvaluator.X
+            boards[1, 5 - i, 8] = BatchEvaluator.X
+            boards[2, 4 - i, 4 + i] = BatchEvaluator.X
+            boards[3, 1 + i, 4 + i] = BatchEvaluator.X
+        found = BatchEvaluator.win_directions(boards, BatchEvaluator.X)
+        self.assertEqual(found.tolist(), numpy.eye(4, dtype=bool).tolist())
+        self.assertEqual(BatchEvaluator.wins(boards, BatchEvaluator.O).any(), False)
+
+    def test_evaluate(self):
+        boards = numpy.zeros((4, 6, 9), dtype=numpy.int8)
+        boards[1, 5, :5] = BatchEvaluator.X
+        boards[2, 0:5, 0] = BatchEvaluator.O
+        # A full board with no lines: columns in pairs of alternating tiles
+        for col in range(9):
+            for row in range(6):
+                boards[3, row, col] = BatchEvaluator.X if (row + col // 2) % 2 else BatchEvaluator.O
+        status = BatchEvaluator.evaluate(boards)
+        self.assertEqual(status.tolist(), [BatchEvaluator.PLAYING, BatchEvaluator.X_WINS, BatchEvaluator.O_WINS,
+                                           BatchEvaluator.DRAW])
+
+    def test_matches_check_for_winner(self):
+        rng = random.Random(8)
+        server = Server()
+        boards = []
+        for _ in range(500):
+            board = Board()
+            for col in range(9):
+                for _ in range(rng.randint(0, 6)):
+                    board.drop(col, rng.choice(Board.TILES))
+            boards += [board]
+        for tile, value in (('X', BatchEvaluator.X), ('O', BatchEvaluator.O)):
+            found = BatchEvaluator.wins(BatchEvaluator.stack(boards), value)
+            for board, won in zip(boards, found):
+                server.board = board
+                self.assertEqual(bool(won), server.check_for_winner(tile))
+        server.sock.close()
+
+    def test_other_geometry(self):
+        board = Board(10, 15, 6)
+        for i in range(6):
+            board.set(9 - i, 9 + i, 'O')
+        boards = BatchEvaluator.stack([board])
+        self.assertEqual(BatchEvaluator.wins(boards, BatchEvaluator.O, connect=6).tolist(), [True])
+        board.set(4, 14, 'X')
+        boards = BatchEvaluator.stack([board])
+        self.assertEqual(BatchEvaluator.wins(boards, BatchEvaluator.O, connect=6).tolist(), [False])
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
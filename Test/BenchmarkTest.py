@@ -0,0 +1,54 @@
+import json
+import unittest
+import Benchmark
+import Codec
+from Board import Board
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def test_measure(self):
+        calls = []
+        result = Benchmark.measure(lambda: calls.append(1), calls=10, repeat=3, warmup=2)
+        self.assertEqual(len(calls), 5)
+        self.assertEqual(result['calls'], 10)
+        self.assertEqual(result['repeat'], 3)
+        self.assertLessEqual(result['best_us'], result['median_us'])
+        self.assertGreater(result['per_second'], 0)
+
+    def test_random_games(self):
+        games = Benchmark.random_games(20, seed=3)
+        self.assertEqual(games, Benchmark.random_games(20, seed=3))
+        for moves in games:
+            board = Board()
+            for index, col in enumerate(moves):
+                self.assertTrue(board.can_drop(col))
+                row = board.drop(col, Board.TILES[index % 2])
+            self.assertTrue(board.is_full() or board.wins_at(row, col, Board.TILES[(len(moves) - 1) % 2]))
+
+    def test_percentile(self):
+        times = list(range(100))
+        self.assertEqual(Benchmark.percentile(times, 0.5), 50)
+        self.assertEqual(Benchmark.percentile(times, 0.99), 99)
+        self.assertEqual(Benchmark.percentile(times, 1.0), 99)
+
+    def test_micro_benchmarks(self):
+        self.assertEqual(Benchmark.bench_update_board(1, games=5)['repeat'], 1)
+        self.assertEqual(Benchmark.bench_check_for_winner(1, boards=5)['calls'], 10)
+        encode, decode = Benchmark.bench_codec(Codec.BINARY, Benchmark.MESSAGES['MOVE'], 1, calls=10)
+        self.assertEqual(encode['calls'], 10)
+        self.assertEqual(decode['calls'], 10)
+
+    def test_round_trip(self):
+        for codec in Codec.CODECS:
+            result = Benchmark.bench_round_trip(codec, 1)
+            self.assertEqual(result['calls'], 54)
+            self.assertLessEqual(result['p50_us'], result['p99_us'])
+            json.dumps(result)
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import random
+import unittest
+from Board import Board, get_geometry
+
+
+class BoardTest(unittest.TestCase):
+
+    def test_init(self):
+        board = Board()
+        self.assertEqual(board.height, 6)
+        self.assertEqual(board.width, 9)
+        self.assertEqual(board.heights, [0] * 9)
+        self.assertEqual(board.to_list(), [[None] * 9 for _ in range(6)])
+
+    def test_drop(self):
+        board = Board()
+        self.assertEqual(board.drop(3, 'X'), 5)
+        self.assertEqual(board.drop(3, 'O'), 4)
+        self.assertEqual(board.get(5, 3), 'X')
+        self.assertEqual(board.get(4, 3), 'O')
+        self.assertEqual(board.heights[3], 2)
+
+    def test_drop_full(self):
+        board = Board()
+        for row in range(6):
+            self.assertEqual(board.drop(0, 'X'), 5 - row)
+        self.assertEqual(board.can_drop(0), False)
+        self.assertEqual(board.drop(0, 'O'), None)
+
+    def test_set(self):
+        board = Board()
+        board.set(2, 4, 'O')
+        self.assertEqual(board.get(2, 4), 'O')
+        self.assertEqual(board.heights[4], 4)
+        board.set(2, 4, 'X')
+        self.assertEqual(board.get(2, 4), 'X')
+
+    def test_undo(self):
+        board = Board()
+        board.drop(3, 'X')
+        board.drop(3, 'O')
+        board.undo(3)
+        self.assertEqual(board.get(4, 3), None)
+        self.assertEqual(board.get(5, 3), 'X')
+        self.assertEqual(board.heights[3], 1)
+        board.undo(3)
+        self.assertEqual(board.masks, {'X': 0, 'O': 0})
+
+    def test_copy(self):
+        board = Board(10, 15, 6)
+        board.drop(3, 'X')
+        copy = board.copy()
+        copy.drop(3, 'O')
+        self.assertEqual(board.get(8, 3), None)
+        self.assertEqual(copy.get(8, 3), 'O')
+        self.assertEqual(copy.get(9, 3), 'X')
+        self.assertIs(copy.geometry, board.geometry)
+
+    def test_hash(self):
+        board = Board()
+        empty = board.hash
+        board.drop(3, 'X')
+        board.drop(5, 'O')
+        other = Board()
+        other.drop(5, 'O')
+        other.drop(3, 'X')
+        self.assertEqual(board.hash, other.hash)
+        self.assertNotEqual(board.hash, empty)
+        board.undo(5)
+        board.undo(3)
+        self.assertEqual(board.hash, empty)
+        self.assertEqual(board.mirror_hash, empty)
+        board.set(5, 3, 'O')
+        board.set(5, 3, 'X')
+        self.assertEqual(board.hash, Board().copy().hash ^ board.geometry.zobrist['X'][3 * 7])
+
+    def test_mirror_hash(self):
+        board = Board()
+        board.drop(1, 'X')
+        board.drop(1, 'O')
+        board.drop(4, 'X')
+        mirror = Board()
+        mirror.drop(7, 'X')
+        mirror.drop(7, 'O')
+        mirror.drop(4, 'X')
+        self.assertEqual(board.mirror_hash, mirror.hash)
+        self.assertEqual(board.hash, mirror.mirror_hash)
+        self.assertNotEqual(board.hash, mirror.hash)
+        board.clear()
+        self.assertEqual(board.hash, Board().hash)
+
+    def test_has_won_no_wrap(self):
+        board = Board()
+        # Three at the top of column 0 and two at the bottom of column 1 are not a line
+        for row in range(3):
+            board.set(row, 0, 'X')
+        for row in range(4, 6):
+            board.set(row, 1, 'X')
+        self.assertEqual(board.has_won('X'), False)
+
+    def test_has_won_random_games(self):
+        rng = random.Random(5)
+        for _ in range(300):
+            board = Board()
+            tile = 'X'
+            while True:
+                columns = [col for col in range(9) if board.can_drop(col)]
+                if not columns:
+                    break
+                board.drop(rng.choice(columns), tile)
+                self.assertEqual(board.has_won('X'), self.scan(board, 'X'))
+                self.assertEqual(board.has_won('O'), self.scan(board, 'O'))
+                if board.has_won(tile):
+                    break
+                tile = 'O' if tile == 'X' else 'X'
+
+    def test_wins_at_random_games(self):
+        rng = random.Random(2)
+        for _ in range(300):
+            board = Board()
+            tile = 'X'
+            while not board.is_full():
+                column = rng.choice([col for col in range(9) if board.can_drop(col)])
+                row = board.drop(column, tile)
+                won = board.wins_at(row, column, tile)
+                self.assertEqual(won, board.has_won(tile))
+                if won:
+                    break
+                tile = 'O' if tile == 'X' else 'X'
+
+    def test_is_full(self):
+        board = Board()
+        for col in range(9):
+            for row in range(6):
+                self.assertEqual(board.is_full(), False)
+                board.drop(col, 'X' if (row + col // 2) % 2 else 'O')
+        self.assertEqual(board.is_full(), True)
+
+    def test_geometry_cached(self):
+        self.assertIs(Board().geometry, Board(6, 9, 5).geometry)
+        self.assertIs(get_geometry(10, 15, 6), Board(10, 15, 6).geometry)
+        self.assertIsNot(Board().geometry, Board(10, 15, 6).geometry)
+
+    def test_geometry_lines(self):
+        geometry = get_geometry(6, 9, 5)
+        # 30 horizontal, 18 vertical and 10 for each diagonal
+        self.assertEqual(len(geometry.lines), 30 + 18 + 10 + 10)
+        self.assertEqual(len(geometry.cell_lines[0][0]), 3)
+
+    def test_geometry_invalid(self):
+        self.assertRaises(ValueError, Board, 6, 9, 10)
+        self.assertRaises(ValueError, Board, 0, 9, 5)
+        self.assertRaises(ValueError, Board, 6, 9, 1)
+
+    def test_large_board_random_games(self):
+        rng = random.Random(7)
+        for _ in range(50):
+            board = Board(10, 15, 6)
+            tile = 'X'
+            while not board.is_full():
+                column = rng.choice([col for col in range(15) if board.can_drop(col)])
+                row = board.drop(column, tile)
+                won = board.wins_at(row, column, tile)
+                self.assertEqual(won, board.has_won(tile))
+                self.assertEqual(won, self.scan(board, tile))
+                if won:
+                    break
+                tile = 'O' if tile == 'X' else 'X'
+
+    """-------------HELPER FUNCTIONS-------------------------"""
+
+    @staticmethod
+    def scan(board, tile):
+        cells = board.to_list()
+        for row in range(board.height):
+            for col in range(board.width):
+                for d_row, d_col in ((0, 1), (1, 0), (-1, 1), (1, 1)):
+                    line = [(row + d_row * i, col + d_col * i) for i in range(board.connect)]
+                    if all(0 <= r < board.height and 0 <= c < board.width and cells[r][c] == tile for r, c in line):
+                        return True
+        return False
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
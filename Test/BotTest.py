@@ -0,0 +1,36 @@
+import unittest
+from Bot import Bot
+
+
+class BotTest(unittest.TestCase):
+
+    def test_init(self):
+        bot = Bot(name='Robot', time_limit=0.5, games=3)
+        self.assertEqual(bot.name, 'Robot')
+        self.assertEqual(bot.time_limit, 0.5)
+        self.assertEqual(bot.games, 3)
+        bot.sock.close()
+
+    def test_choose_move(self):
+        bot = Bot(time_limit=0.5)
+        bot.tile = 'O'
+        for col in range(4):
+            bot.board.drop(col, 'O')
+            bot.board.drop(col, 'X')
+        self.assertEqual(bot.choose_move(), 4)
+        self.assertEqual(bot.board.heights, [2, 2, 2, 2, 0, 0, 0, 0, 0])
+        bot.sock.close()
+
+    def test_try_again(self):
+        bot = Bot(games=2)
+        self.assertEqual(bot.try_again(), False)
+        self.assertEqual(bot.try_again("Would you like to play again? (y/n)"), True)
+        self.assertEqual(bot.try_again("Would you like to play again? (y/n)"), False)
+        bot.sock.close()
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
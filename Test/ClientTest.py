@@ -13,7 +13,7 @@ class ClientTest(unittest.TestCase):
         self.assertEqual(client.host, host)
         self.assertEqual(client.port, port)
         self.assertEqual(client.game_over, True)
-        self.assertEqual(client.board, [[None] * 9 for _ in range(6)])
+        self.assertEqual(client.board.to_list(), [[None] * 9 for _ in range(6)])
         self.assertEqual(client.name, None)
         self.assertEqual(client.move, None)
         self.assertEqual(client.stop, False)
@@ -27,6 +27,17 @@ class ClientTest(unittest.TestCase):
         self.assertEqual(client.move, True)
         client.sock.close()
 
+    def test_process_HELLO_geometry(self):
+        client = Client()
+        client.board.drop(3, 'X')
+        msg = json.dumps({'type':'HELLO', 'wait':False, 'move':True, 'height':10, 'width':15, 'connect':6})
+        client.process(msg)
+        self.assertEqual((client.board.height, client.board.width, client.board.connect), (10, 15, 6))
+        self.assertEqual(client.board.get(9, 3), None)
+        self.assertEqual(client.check_move(14), True)
+        self.assertEqual(client.check_move(15), False)
+        client.sock.close()
+
     def test_process_MOVE(self):
         client = Client()
         row = 5
@@ -34,8 +45,9 @@ class ClientTest(unittest.TestCase):
         tile = 'X'
         msg = json.dumps({'type':'MOVE', 'row':row, 'col':col, 'tile':tile, 'move':True})
         client.process(msg)
-        self.assertEqual(client.board[row][col], tile)
+        self.assertEqual(client.board.get(row, col), tile)
         self.assertEqual(client.move, True)
+        self.assertEqual(client.tile, 'O')
         client.sock.close()
 
     def test_process_OVER1(self):
@@ -70,10 +82,57 @@ class ClientTest(unittest.TestCase):
         msg = json.dumps({'type':'OVER', 'name':winner, 'final':final, 'quit':quit,
                           'row':row, 'col':col, 'tile':tile})
         client.process(msg)
-        self.assertEqual(client.board[row][col], tile)
+        self.assertEqual(client.board.get(row, col), tile)
+        self.assertEqual(client.game_over, True)
+        client.sock.close()
+
+    def test_process_WATCH(self):
+        client = Client(spectate=True)
+        msg = json.dumps({'type':'WATCH', 'room':3, 'players':['James', 'Anna'], 'height':10, 'width':15,
+                          'connect':6, 'moves':[4, 4, 7]})
+        client.process(msg)
+        self.assertEqual(client.board.width, 15)
+        self.assertEqual(client.board.get(9, 4), 'X')
+        self.assertEqual(client.board.get(8, 4), 'O')
+        self.assertEqual(client.board.get(9, 7), 'X')
+        self.assertEqual(client.move, False)
+        msg = json.dumps({'type':'WATCH', 'room':3, 'players':['James', 'Anna'], 'height':6, 'width':9,
+                          'connect':5, 'moves':[4, 4, 7], 'first':'O'})
+        client.process(msg)
+        self.assertEqual(client.board.get(5, 4), 'O')
+        self.assertEqual(client.board.get(4, 4), 'X')
+        self.assertEqual(client.board.get(5, 7), 'O')
+        client.sock.close()
+
+    def test_process_OVER_draw(self):
+        client = Client()
+        msg = json.dumps({'type':'OVER', 'name':"", 'final':False, 'quit':False,
+                          'row':0, 'col':8, 'tile':'O', 'draw':True})
+        client.process(msg)
+        self.assertEqual(client.board.get(0, 8), 'O')
         self.assertEqual(client.game_over, True)
         client.sock.close()
 
+    def test_process_ERROR(self):
+        client = Client()
+        client.move = False
+        client.process(json.dumps({'type':'ERROR', 'code':'full', 'message':"Column 4 is full..."}))
+        self.assertEqual(client.move, True)
+        client.move = False
+        client.process(json.dumps({'type':'ERROR', 'code':'turn', 'message':"It is not your turn..."}))
+        self.assertEqual(client.move, False)
+        client.sock.close()
+
+    def test_process_PING(self):
+        client = Client()
+        sent = []
+        client.send = sent.append
+        client.receive = lambda: sent.append('receive')
+        client.process(json.dumps({'type':'PING'}))
+        # The client answers, then carries on waiting for whatever it was waiting for
+        self.assertEqual(sent, [{'type':'PONG'}, 'receive'])
+        client.sock.close()
+
     def test_process_fail(self):
         client = Client()
         msg = "string"
@@ -155,6 +214,7 @@ class ClientTest(unittest.TestCase):
         self.assertEqual(msg['type'], 'HELLO')
         self.assertEqual(msg['name'], 'James')
         self.assertEqual(msg['replay'], True)
+        self.assertEqual(msg['spectate'], False)
         client.sock.close()
         server.quit()
 
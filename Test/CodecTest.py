@@ -0,0 +1,68 @@
+import unittest
+import Codec
+
+
+class CodecTest(unittest.TestCase):
+
+    MSGS = [
+        {'type':'HELLO', 'wait':True, 'move':False, 'replay':False, 'spectate':False, 'height':6, 'width':9,
+         'connect':5, 'name':''},
+        {'type':'HELLO', 'wait':False, 'move':False, 'replay':True, 'spectate':False, 'height':None, 'width':None,
+         'connect':None, 'name':'James'},
+        {'type':'HELLO', 'wait':False, 'move':False, 'replay':True, 'spectate':True, 'height':None, 'width':None,
+         'connect':None, 'name':'Anna'},
+        {'type':'MOVE', 'move':True, 'row':1, 'col':5, 'tile':'O'},
+        {'type':'MOVE', 'move':False, 'row':None, 'col':3, 'tile':None},
+        {'type':'OVER', 'quit':False, 'final':False, 'draw':False, 'row':3, 'col':2, 'tile':'X', 'name':'James'},
+        {'type':'OVER', 'quit':True, 'final':True, 'draw':False, 'row':None, 'col':None, 'tile':None, 'name':''},
+        {'type':'OVER', 'quit':False, 'final':False, 'draw':True, 'row':0, 'col':8, 'tile':'O', 'name':''},
+    ]
+
+    def test_json_round_trip(self):
+        for msg in self.MSGS:
+            self.assertEqual(Codec.decode(Codec.JSON.encode(msg)), msg)
+
+    def test_binary_round_trip(self):
+        for msg in self.MSGS:
+            self.assertEqual(Codec.decode(Codec.BINARY.encode(msg)), msg)
+
+    def test_binary_move_size(self):
+        self.assertEqual(len(Codec.BINARY.encode(self.MSGS[3])), 4)
+        self.assertEqual(len(Codec.BINARY.encode({'type':'MOVE', 'col':3})), 4)
+
+    def test_binary_other_type(self):
+        msg = {'type':'HELLO', 'codec':'binary'}
+        self.assertEqual(Codec.BINARY.encode({'type':'PING'}), Codec.JSON.encode({'type':'PING'}))
+        self.assertEqual(Codec.decode(Codec.JSON.encode(msg)), msg)
+
+    def test_set_flag(self):
+        for codec in (Codec.JSON, Codec.BINARY):
+            for msg in self.MSGS:
+                for key in ('move', 'final', 'draw'):
+                    if msg.get(key) is False:
+                        expected = dict(msg, **{key:True})
+                        self.assertEqual(Codec.decode(codec.set_flag(codec.encode(msg), key)), expected)
+            self.assertRaises(ValueError, codec.set_flag, codec.encode(self.MSGS[3]), 'quit')
+
+    def test_decode_str(self):
+        self.assertEqual(Codec.decode('{"type": "MOVE", "col": 3}'), {'type':'MOVE', 'col':3})
+
+    def test_decode_fail(self):
+        self.assertRaises(ValueError, Codec.decode, b'')
+        self.assertRaises(ValueError, Codec.decode, "string")
+        self.assertRaises(ValueError, Codec.decode, b'\x02\x00')
+        self.assertRaises(ValueError, Codec.decode, b'{"type"')
+
+    def test_negotiate(self):
+        self.assertIs(Codec.negotiate(None), Codec.JSON)
+        self.assertIs(Codec.negotiate([]), Codec.JSON)
+        self.assertIs(Codec.negotiate(['json']), Codec.JSON)
+        self.assertIs(Codec.negotiate(['json', 'binary']), Codec.BINARY)
+        self.assertIs(Codec.negotiate(['other']), Codec.JSON)
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import socket
+import unittest
+import Framing
+
+
+class MockSocket(object):
+
+    def __init__(self, most):
+        self.most = most
+        self.sent = b''
+        self.writes = 0
+
+    def sendmsg(self, buffers):
+        data = b''.join(buffers)[:self.most]
+        self.sent += data
+        self.writes += 1
+        return len(data)
+
+
+class FramingTest(unittest.TestCase):
+
+    def test_pack(self):
+        self.assertEqual(Framing.pack(b'{}'), b'\x00\x02{}')
+
+    def test_pack_too_large(self):
+        self.assertRaises(ValueError, Framing.pack, b'x' * (Framing.MAX_SIZE + 1))
+
+    def test_next_frame_split(self):
+        reader = Framing.FrameReader(None)
+        frame = Framing.pack(b'{"type": "MOVE", "col": 3}')
+        for i in range(len(frame) - 1):
+            reader.feed(frame[i:i+1])
+            self.assertEqual(reader.next_frame(), None)
+        reader.feed(frame[-1:])
+        self.assertEqual(reader.next_frame(), b'{"type": "MOVE", "col": 3}')
+        self.assertEqual(reader.buffer, bytearray())
+
+    def test_next_frame_coalesced(self):
+        reader = Framing.FrameReader(None)
+        reader.feed(Framing.pack(b'one') + Framing.pack(b'two') + Framing.pack(b'three')[:3])
+        self.assertEqual(reader.next_frame(), b'one')
+        self.assertEqual(reader.next_frame(), b'two')
+        self.assertEqual(reader.next_frame(), None)
+
+    def test_read(self):
+        sock1, sock2 = socket.socketpair()
+        msgs = [{'type':'HELLO', 'wait':False, 'move':True}, {'type':'MOVE', 'col':4}]
+        sock1.sendall(b''.join(Framing.pack(json.dumps(msg).encode()) for msg in msgs))
+        sock1.close()
+        reader = Framing.FrameReader(sock2)
+        self.assertEqual(json.loads(reader.read().decode()), msgs[0])
+        self.assertEqual(json.loads(reader.read().decode()), msgs[1])
+        self.assertEqual(reader.read(), b'')
+        sock2.close()
+
+    def test_send_frames(self):
+        sock1, sock2 = socket.socketpair()
+        frames = [Framing.pack(b'one'), Framing.pack(b'two'), Framing.pack(b'three')]
+        Framing.send_frames(sock1, frames)
+        Framing.send_frames(sock1, frames[:1])
+        sock1.close()
+        reader = Framing.FrameReader(sock2)
+        self.assertEqual([reader.read() for _ in range(5)], [b'one', b'two', b'three', b'one', b''])
+        sock2.close()
+
+    def test_send_frames_partial(self):
+        sock = MockSocket(2)
+        Framing.send_frames(sock, [Framing.pack(b'one'), Framing.pack(b'two')])
+        self.assertEqual(sock.sent, Framing.pack(b'one') + Framing.pack(b'two'))
+        self.assertEqual(sock.writes, 5)
+
+    def test_read_frame(self):
+        async def read_all():
+            reader = asyncio.StreamReader()
+            reader.feed_data(Framing.pack(b'one') + Framing.pack(b'two'))
+            reader.feed_eof()
+            return [await Framing.read_frame(reader) for _ in range(3)]
+        self.assertEqual(asyncio.run(read_all()), [b'one', b'two', b''])
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
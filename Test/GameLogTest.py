@@ -0,0 +1,200 @@
+import os
+import tempfile
+import unittest
+import Codec
+import GameLog
+from AsyncServer import AsyncServer, Room
+from GameLog import GameLog as Log, GameRecord
+from Server import Server
+from Supervisor import Supervisor
+
+
+class MockWriter(object):
+
+    def __init__(self):
+        self.data = b''
+
+    def write(self, data):
+        self.data += data
+
+
+class GameLogTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_pack_moves(self):
+        self.assertEqual(GameLog.pack_moves([1, 2, 15]), b'\x12\xf0')
+        self.assertEqual(GameLog.unpack_moves(b'\x12\xf0', 3), [1, 2, 15])
+        self.assertEqual(GameLog.unpack_moves(GameLog.pack_moves([]), 0), [])
+
+    def test_record_round_trip(self):
+        records = [GameRecord(("James", "Anna"), [4, 4, 3, 8, 2], 'X', timestamp=1.5),
+                   GameRecord(("Zoë", ""), [0], 'O', quit=True, height=10, width=15, connect=6),
+                   GameRecord(("a", "b"), [], None),
+                   GameRecord(("a", "b"), [0, 1, 0], 'O', first='O')]
+        for record in records:
+            data = record.pack()
+            self.assertEqual(GameRecord.unpack(data), (record, len(data)))
+        self.assertEqual(len(records[0].pack()), 2 + GameLog.RECORD.size + 9 + 3)
+
+    def test_record_too_wide(self):
+        self.assertRaises(ValueError, GameRecord(("a", "b"), [16], 'X', width=17).pack)
+
+    def test_check_name(self):
+        self.assertEqual(GameLog.check_name("James"), "James")
+        self.assertEqual(GameLog.check_name("a" * 300), "a" * 255)
+        # Characters are never split in two
+        self.assertEqual(GameLog.check_name("\u00e9" * 200), "\u00e9" * 127)
+        self.assertEqual(GameLog.check_name(5), "5")
+
+    def test_too_wide_refused(self):
+        log = Log(self.path)
+        first = [MockWriter(), None, None, "James", Codec.JSON]
+        second = [MockWriter(), None, None, "Anna", Codec.JSON]
+        try:
+            self.assertRaises(ValueError, Room, 1, first, second, width=17, log=log)
+            self.assertRaises(ValueError, AsyncServer, port=0, width=17, log=log)
+            self.assertRaises(ValueError, Server, port=0, width=17, log=log)
+            self.assertRaises(ValueError, Supervisor, port=0, width=17, log=self.path)
+            # Without a log any width can be played
+            Room(1, first, second, width=17)
+        finally:
+            log.close()
+
+    def test_tiles(self):
+        self.assertEqual(GameRecord(("a", "b"), [1, 2, 3], 'X').tiles(), ['X', 'O', 'X'])
+        self.assertEqual(GameRecord(("a", "b"), [1, 2, 3], 'O', first='O').tiles(), ['O', 'X', 'O'])
+
+    def test_append_records(self):
+        log = Log(self.path, batch=3)
+        written = [GameRecord(("a", "b"), [i % 9] * (i % 7), 'X' if i % 2 else 'O') for i in range(10)]
+        for record in written:
+            log.append(record)
+        log.flush()
+        self.assertEqual(log.written, 10)
+        self.assertEqual(list(GameLog.records(self.path)), written)
+        log.close()
+        # Opening the log again appends to the end
+        log = Log(self.path)
+        log.append(written[0])
+        log.close()
+        self.assertEqual(list(GameLog.records(self.path)), written + written[:1])
+
+    def test_create(self):
+        GameLog.create(self.path)
+        GameLog.create(self.path)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), GameLog.MAGIC)
+        log = Log(self.path)
+        log.append(GameRecord(("a", "b"), [1], None))
+        log.close()
+        size = os.path.getsize(self.path)
+        GameLog.create(self.path)
+        self.assertEqual(os.path.getsize(self.path), size)
+        # Workers share the log the supervisor created, so none of them writes the header
+        os.remove(self.path)
+        supervisor = Supervisor(port=0, log=self.path)
+        supervisor.sock.close()
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), GameLog.MAGIC)
+
+    def test_records_empty(self):
+        Log(self.path).close()
+        self.assertEqual(list(GameLog.records(self.path)), [])
+
+    def test_records_cut_short(self):
+        log = Log(self.path)
+        log.append(GameRecord(("a", "b"), [1, 2], 'X'))
+        log.append(GameRecord(("a", "b"), [3, 4], 'O'))
+        log.close()
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        self.assertEqual([record.moves for record in GameLog.records(self.path)], [[1, 2]])
+
+    def test_records_not_log(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a game log')
+        self.assertRaises(ValueError, list, GameLog.records(self.path))
+
+    def test_game_logged(self):
+        log = Log(self.path)
+        first = [MockWriter(), None, None, "James", Codec.JSON]
+        second = [MockWriter(), None, None, "Anna", Codec.JSON]
+        room = Room(1, first, second, log=log)
+        room.start()
+        for player, col in [(0, 1), (1, 1), (0, 2), (1, 2), (0, 3), (1, 3), (0, 4), (1, 4), (0, 5)]:
+            room.process(Codec.JSON.encode({'type':'MOVE', 'col':col}), player)
+        room = Room(2, first, second, log=log)
+        room.start()
+        room.process(Codec.JSON.encode({'type':'MOVE', 'col':4}), 0)
+        room.forfeit(first)
+        log.close()
+        records = list(GameLog.records(self.path))
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0].players, ("James", "Anna"))
+        self.assertEqual(records[0].moves, [1, 1, 2, 2, 3, 3, 4, 4, 5])
+        self.assertEqual((records[0].winner, records[0].quit), ('X', False))
+        self.assertEqual((records[1].moves, records[1].winner, records[1].quit), ([4], 'O', True))
+
+    def test_quit_between_games(self):
+        log = Log(self.path)
+        first = [MockWriter(), None, None, "James", Codec.JSON]
+        second = [MockWriter(), None, None, "Anna", Codec.JSON]
+        room = Room(1, first, second, log=log)
+        room.start()
+        for player, col in [(0, 1), (1, 1), (0, 2), (1, 2), (0, 3), (1, 3), (0, 4), (1, 4), (0, 5)]:
+            room.process(Codec.JSON.encode({'type':'MOVE', 'col':col}), player)
+        room.process(Codec.JSON.encode({'type':'HELLO', 'name':"James", 'replay':True}), 0)
+        sent = second[0].data
+        for _ in range(2):
+            room.process(Codec.JSON.encode({'type':'OVER', 'quit':True}), 1)
+        log.close()
+        # No game was being played, so nothing is logged and no one is told anyone quit
+        self.assertEqual(len(list(GameLog.records(self.path))), 1)
+        self.assertEqual(second[0].data, sent)
+
+    def test_replay_logged(self):
+        log = Log(self.path)
+        first = [MockWriter(), None, None, "James", Codec.JSON]
+        second = [MockWriter(), None, None, "Anna", Codec.JSON]
+        room = Room(1, first, second, log=log)
+        room.start()
+        for player, col in [(0, 1), (1, 1), (0, 2), (1, 2), (0, 3), (1, 3), (0, 4), (1, 4), (0, 5)]:
+            room.process(Codec.JSON.encode({'type':'MOVE', 'col':col}), player)
+        # 'X' is the second to ask to play again, so 'O' moves first
+        room.process(Codec.JSON.encode({'type':'HELLO', 'name':"Anna", 'replay':True}), 1)
+        room.process(Codec.JSON.encode({'type':'HELLO', 'name':"James", 'replay':True}), 0)
+        for player, col in [(1, 0), (0, 1), (1, 0), (0, 1), (1, 0), (0, 1), (1, 0), (0, 1), (1, 0)]:
+            room.process(Codec.JSON.encode({'type':'MOVE', 'col':col}), player)
+        log.close()
+        records = list(GameLog.records(self.path))
+        self.assertEqual([record.first for record in records], ['X', 'O'])
+        self.assertEqual(records[1].moves, [0, 1, 0, 1, 0, 1, 0, 1, 0])
+        self.assertEqual(records[1].winner, 'O')
+        self.assertEqual(records[1].tiles()[::2], ['O'] * 5)
+
+    def test_long_name_logged(self):
+        log = Log(self.path)
+        first = [MockWriter(), None, None, "J" * 300, Codec.JSON]
+        second = [MockWriter(), None, None, "Anna", Codec.JSON]
+        room = Room(1, first, second, log=log)
+        room.start()
+        for player, col in [(0, 1), (1, 1), (0, 2), (1, 2), (0, 3), (1, 3), (0, 4), (1, 4), (0, 5)]:
+            room.process(Codec.JSON.encode({'type':'MOVE', 'col':col}), player)
+        log.close()
+        self.assertIn(b'"OVER"', second[0].data)
+        self.assertEqual(list(GameLog.records(self.path))[0].players, ("J" * 255, "Anna"))
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import Codec
+import Framing
+from Board import Board
+
+
+class LoadStats(object):
+
+    def __init__(self):
+        """
+        Results shared by every connection of a load run.
+        """
+        self.started = 0
+        self.connected = 0
+        self.finished = 0
+        self.games = 0
+        self.draws = 0
+        self.quits = 0
+        self.messages = 0
+        self.move_latencies = []
+        self.pair_latencies = []
+        self.errors = {}
+
+    def error(self, kind):
+        """
+        Count an error of the given kind.
+
+        :param kind: string, e.g. 'timeout' or 'refused'
+        """
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    @staticmethod
+    def percentiles(times):
+        """
+        :param times: [float], seconds
+        :return: {}, count and p50, p90, p99 and max in milliseconds (or None if there are no times)
+        """
+        if not times:
+            return {'count':0, 'p50_ms':None, 'p90_ms':None, 'p99_ms':None, 'max_ms':None, 'mean_ms':None}
+        times = sorted(times)
+        pick = lambda fraction: times[min(len(times) - 1, int(len(times) * fraction))] * 1000
+        return {'count':len(times), 'p50_ms':pick(0.5), 'p90_ms':pick(0.9), 'p99_ms':pick(0.99),
+                'max_ms':times[-1] * 1000, 'mean_ms':statistics.mean(times) * 1000}
+
+    def summary(self, seconds):
+        """
+        :param seconds: float, length of the run
+        :return: {}
+        """
+        return {'seconds':seconds, 'started':self.started, 'connected':self.connected, 'finished':self.finished,
+                'games':self.games, 'draws':self.draws, 'quits':self.quits, 'messages':self.messages,
+                'games_per_second':self.games / seconds if seconds else 0.0,
+                'messages_per_second':self.messages / seconds if seconds else 0.0,
+                'move_latency':self.percentiles(self.move_latencies),
+                'pair_latency':self.percentiles(self.pair_latencies), 'errors':dict(self.errors)}
+
+
+class LoadClient(object):
+
+    def __init__(self, number, stats, host='127.0.0.1', port=80, games=1, columns=None, codec='binary', seed=None,
+                 timeout=10.0):
+        """
+        One connection of a load run, playing games like a Client but with asyncio and without a user.
+
+        :param number:  int, number of the connection, used in its name
+        :param stats:   LoadStats, where results are recorded
+        :param host:    string, IP address
+        :param port:    int, port number
+        :param games:   int, number of games to finish before leaving
+        :param columns: [int], columns to play in turn, skipping full ones (or None to play randomly)
+        :param codec:   string, codec to ask the server for
+        :param seed:    int, seed for the random columns
+        :param timeout: float, seconds to wait for each message before giving up
+        """
+        self.name = "load%i" % number
+        self.stats = stats
+        self.host = host
+        self.port = port
+        self.games = games
+        self.columns = columns
+        self.codec_name = codec
+        self.codec = Codec.JSON
+        self.random = random.Random(seed)
+        self.timeout = timeout
+        self.board = Board()
+        self.played = 0
+        self.turn = 0
+        self.writer = None
+        self.sent_move = None
+        self.sent_hello = None
+
+    async def run(self):
+        """
+        Connect, play the given number of games and leave, recording any errors.
+        """
+        self.stats.started += 1
+        try:
+            reader, self.writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                         self.timeout)
+        except asyncio.TimeoutError:
+            self.stats.error('connect timeout')
+            return
+        except OSError:
+            self.stats.error('refused')
+            return
+        self.stats.connected += 1
+        try:
+            self.send({'type':'HELLO', 'name':self.name, 'replay':False, 'codecs':[self.codec_name]})
+            self.sent_hello = time.perf_counter()
+            while True:
+                msg = await asyncio.wait_for(Framing.read_frame(reader), self.timeout)
+                if not msg:
+                    self.stats.error('disconnected')
+                    break
+                self.stats.messages += 1
+                if not self.process(Codec.decode(msg)):
+                    self.stats.finished += 1
+                    break
+                await self.writer.drain()
+        except asyncio.TimeoutError:
+            self.stats.error('timeout')
+        except ValueError:
+            self.stats.error('bad message')
+        except ConnectionError:
+            self.stats.error('disconnected')
+        finally:
+            self.writer.close()
+
+    def process(self, msg):
+        """
+        Processes a message from the server, replying to it if needed.
+
+        :param msg: {}, decoded message
+        :return: boolean, False once the client is done
+        """
+        now = time.perf_counter()
+        if msg['type'] == 'HELLO':
+            if 'codec' in msg:
+                self.codec = Codec.CODECS.get(msg['codec'], Codec.JSON)
+            elif not msg['wait']:
+                if msg.get('height'):
+                    self.board = Board(msg['height'], msg['width'], msg['connect'])
+                else:
+                    self.board.clear()
+                if self.sent_hello is not None:
+                    self.stats.pair_latencies += [now - self.sent_hello]
+                    self.sent_hello = None
+                if msg['move']:
+                    self.send_move()
+        elif msg['type'] == 'MOVE':
+            self.record_move(now)
+            self.board.set(msg['row'], msg['col'], msg['tile'])
+            if msg['move']:
+                self.send_move()
+        elif msg['type'] == 'OVER':
+            self.record_move(now)
+            if msg['final']:
+                return False
+            if msg['quit']:
+                self.stats.quits += 1
+            elif msg.get('draw'):
+                self.stats.draws += 1
+            self.stats.games += 1
+            self.played += 1
+            if self.played >= self.games:
+                self.send({'type':'OVER', 'name':self.name, 'quit':False})
+                return False
+            self.send({'type':'HELLO', 'name':self.name, 'replay':True})
+            self.sent_hello = now
+        elif msg['type'] == 'ERROR':
+            self.stats.error("refused: %s" % msg['code'])
+            # A refused move is tried again, which only happens if the server and client disagree about the board
+            if msg['code'] in ('column', 'full'):
+                self.send_move()
+        elif msg['type'] == 'PING':
+            self.send({'type':'PONG'})
+        return True
+
+    def record_move(self, now):
+        """
+        The first message after a move is the servers reply to it, so record how long it took.
+
+        :param now: float, time the message was received
+        """
+        if self.sent_move is not None:
+            self.stats.move_latencies += [now - self.sent_move]
+            self.sent_move = None
+
+    def choose_move(self):
+        """
+        :return: int, the next scripted column that is not full, or a random one
+        """
+        if self.columns:
+            for _ in range(len(self.columns)):
+                col = self.columns[self.turn % len(self.columns)]
+                self.turn += 1
+                if 0 <= col < self.board.width and self.board.can_drop(col):
+                    return col
+        return self.random.choice([col for col in range(self.board.width) if self.board.can_drop(col)])
+
+    def send_move(self):
+        """
+        Send a move and remember when it was sent.
+        """
+        self.send({'type':'MOVE', 'col':self.choose_move()})
+        self.sent_move = time.perf_counter()
+
+    def send(self, msg):
+        """
+        Encode msg with the agreed codec and frame it before writing it to the server.
+
+        :param msg: {}
+        """
+        self.writer.write(Framing.pack(self.codec.encode(msg)))
+
+
+async def run_load(host='127.0.0.1', port=80, clients=100, rate=50.0, ramp=0.0, games=1, columns=None,
+                   codec='binary', seed=0, timeout=10.0):
+    """
+    Open connections at a rising rate until the given number are open, and wait for them all to finish.
+
+    :param host:    string, IP address
+    :param port:    int, port number
+    :param clients: int, number of connections
+    :param rate:    float, connections opened per second at the start
+    :param ramp:    float, how much the rate goes up each second
+    :param games:   int, games each connection finishes before leaving
+    :param columns: [int], columns to play in turn (or None to play randomly)
+    :param codec:   string, codec to ask the server for
+    :param seed:    int, seed for the random columns
+    :param timeout: float, seconds to wait for each message before giving up
+    :return: {}, summary of the run (see LoadStats.summary)
+    """
+    stats = LoadStats()
+    began = time.perf_counter()
+    tasks = []
+    for number in range(clients):
+        client = LoadClient(number, stats, host, port, games, columns, codec, seed + number, timeout)
+        tasks += [asyncio.ensure_future(client.run())]
+        current = rate + ramp * (time.perf_counter() - began)
+        if current > 0:
+            await asyncio.sleep(1.0 / current)
+    await asyncio.gather(*tasks)
+    return stats.summary(time.perf_counter() - began)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play many Connect-5 games at once against a running server.")
+    parser.add_argument('host', nargs='?', default='127.0.0.1', help="IP address of the server")
+    parser.add_argument('port', nargs='?', type=int, default=80, help="port number of the server")
+    parser.add_argument('--clients', type=int, default=100, help="number of connections")
+    parser.add_argument('--rate', type=float, default=50.0, help="connections opened per second at the start")
+    parser.add_argument('--ramp', type=float, default=0.0, help="how much the connection rate goes up each second")
+    parser.add_argument('--games', type=int, default=1, help="games each connection plays")
+    parser.add_argument('--columns', default=None, help="columns to play in turn, e.g. '4,3,5' (default random)")
+    parser.add_argument('--codec', choices=sorted(Codec.CODECS), default='binary', help="codec to ask for")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random columns")
+    parser.add_argument('--timeout', type=float, default=10.0, help="seconds to wait for each message")
+    parser.add_argument('--output', default=None, help="file to write the JSON results to (default stdout)")
+    args = parser.parse_args()
+    columns = [int(col) - 1 for col in args.columns.split(',')] if args.columns else None
+    summary = asyncio.run(run_load(args.host, args.port, args.clients, args.rate, args.ramp, args.games, columns,
+                                   args.codec, args.seed, args.timeout))
+    if args.output is None:
+        print(json.dumps(summary, indent=2))
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+import unittest
+from AsyncServer import AsyncServer
+from Server import Server
+from Test.LoadGenerator import LoadClient, LoadStats, run_load
+
+
+class LoadGeneratorTest(unittest.TestCase):
+
+    def test_percentiles(self):
+        result = LoadStats.percentiles([0.001 * i for i in range(100)])
+        self.assertEqual(result['count'], 100)
+        self.assertAlmostEqual(result['p50_ms'], 50)
+        self.assertAlmostEqual(result['p99_ms'], 99)
+        self.assertEqual(LoadStats.percentiles([])['p50_ms'], None)
+
+    def test_choose_move(self):
+        client = LoadClient(0, LoadStats(), columns=[4, 3])
+        for _ in range(6):
+            client.board.drop(4, 'X')
+        self.assertEqual([client.choose_move() for _ in range(2)], [3, 3])
+
+    def test_process(self):
+        stats = LoadStats()
+        client = LoadClient(0, stats, games=2, columns=[4])
+        sent = []
+        client.send = sent.append
+        self.assertEqual(client.process({'type':'HELLO', 'codec':'binary'}), True)
+        self.assertEqual(client.process({'type':'HELLO', 'wait':False, 'move':True, 'height':6, 'width':9,
+                                          'connect':5}), True)
+        self.assertEqual(sent[-1], {'type':'MOVE', 'col':4})
+        self.assertEqual(client.process({'type':'MOVE', 'move':False, 'row':5, 'col':4, 'tile':'X'}), True)
+        self.assertEqual(len(stats.move_latencies), 1)
+        self.assertEqual(client.process({'type':'OVER', 'name':'', 'quit':False, 'final':False, 'row':0, 'col':8,
+                                         'tile':'O', 'draw':True}), True)
+        self.assertEqual(sent[-1], {'type':'HELLO', 'name':'load0', 'replay':True})
+        self.assertEqual(client.process({'type':'OVER', 'name':'', 'quit':True, 'final':False}), False)
+        self.assertEqual(sent[-1], {'type':'OVER', 'name':'load0', 'quit':False})
+        self.assertEqual((stats.games, stats.draws, stats.quits), (2, 1, 1))
+
+    def test_async_server(self):
+        server = AsyncServer(port=0)
+        threading.Thread(target=server.start, daemon=True).start()
+        server.started.wait()
+        summary = asyncio.run(run_load(port=server.port, clients=10, rate=200.0, games=2, timeout=5.0))
+        server.stop()
+        self.assertEqual(summary['finished'], 10)
+        self.assertEqual(summary['games'], 20)
+        self.assertEqual(summary['errors'], {})
+        self.assertEqual(summary['pair_latency']['count'], 20)
+        self.assertGreater(summary['move_latency']['count'], 0)
+
+    def test_threaded_server(self):
+        server = Server(port=0)
+        threading.Thread(target=server.start, daemon=True).start()
+        while not server.port:
+            time.sleep(0.01)
+        # The threaded server only hosts one game, so the third player never hears back
+        summary = asyncio.run(run_load(port=server.port, clients=3, rate=200.0, games=1, timeout=1.0))
+        server.sock.close()
+        self.assertEqual(summary['finished'], 2)
+        self.assertEqual(summary['errors'], {'timeout': 1})
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import unittest
+from Lobby import Lobby
+
+
+class LobbyTest(unittest.TestCase):
+
+    def test_match(self):
+        lobby = Lobby()
+        players = [['player%i' % i] for i in range(5)]
+        for data in players:
+            lobby.add(data)
+        self.assertEqual(lobby.depth(), 5)
+        pairs = lobby.match()
+        self.assertEqual(pairs, [(players[0], players[1]), (players[2], players[3])])
+        self.assertEqual(lobby.depth(), 1)
+        self.assertEqual(lobby.match(), [])
+
+    def test_remove(self):
+        lobby = Lobby()
+        first = ['James']
+        second = ['Anna']
+        lobby.add(first)
+        lobby.add(second)
+        self.assertEqual(lobby.remove(first), True)
+        self.assertEqual(lobby.remove(first), False)
+        self.assertEqual(lobby.depth(), 1)
+        self.assertEqual(lobby.match(), [])
+
+    def test_stats(self):
+        lobby = Lobby()
+        self.assertEqual(lobby.stats(), {'depth':0, 'matched':0, 'average_wait':0.0, 'max_wait':0.0})
+        lobby.add(['James'])
+        lobby.add(['Anna'])
+        lobby.match()
+        stats = lobby.stats()
+        self.assertEqual(stats['matched'], 2)
+        self.assertGreaterEqual(stats['max_wait'], stats['average_wait'])
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
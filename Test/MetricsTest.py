@@ -0,0 +1,99 @@
+import unittest
+import urllib.request
+import Codec
+import Metrics
+from AsyncServer import Room
+from Test.AsyncServerTest import MockWriter
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = list(Metrics.REGISTRY)
+
+    def tearDown(self):
+        Metrics.REGISTRY[:] = self.registry
+
+    def test_counter(self):
+        counter = Metrics.Counter('test_total', "Test counter.", ['type'])
+        counter.inc('MOVE')
+        counter.inc('MOVE', amount=2)
+        counter.inc('HELLO')
+        self.assertEqual(counter.get('MOVE'), 3)
+        self.assertEqual(counter.render(), ['# HELP test_total Test counter.', '# TYPE test_total counter',
+                                            'test_total{type="HELLO"} 1', 'test_total{type="MOVE"} 3'])
+
+    def test_gauge(self):
+        gauge = Metrics.Gauge('test_gauge', "Test gauge.")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        self.assertEqual(gauge.render()[2:], ['test_gauge 1'])
+        gauge.set(0.5)
+        self.assertEqual(gauge.render()[2:], ['test_gauge 0.5'])
+
+    def test_histogram(self):
+        histogram = Metrics.Histogram('test_seconds', "Test histogram.", (0.1, 1))
+        for amount in (0.05, 0.1, 0.5, 2):
+            histogram.observe(amount)
+        self.assertEqual(histogram.get(), (4, 2.65))
+        self.assertEqual(histogram.render()[2:], ['test_seconds_bucket{le="0.1"} 2', 'test_seconds_bucket{le="1"} 3',
+                                                  'test_seconds_bucket{le="+Inf"} 4', 'test_seconds_sum 2.65',
+                                                  'test_seconds_count 4'])
+
+    def test_escape(self):
+        counter = Metrics.Counter('test_total', "Test counter.", ['type'])
+        counter.inc('x"} 1\n# evil\\')
+        self.assertEqual(counter.render()[2:], ['test_total{type="x\\"} 1\\n# evil\\\\"} 1'])
+
+    def test_serve(self):
+        server = Metrics.serve(0)
+        url = "http://%s:%i/metrics" % server.server_address
+        text = urllib.request.urlopen(url).read().decode()
+        self.assertIn("# TYPE connect5_games_started_total counter\n", text)
+        self.assertIn("# TYPE connect5_process_seconds histogram\n", text)
+        server.shutdown()
+        server.server_close()
+
+    def test_game(self):
+        started = Metrics.GAMES_STARTED.get()
+        won = Metrics.GAMES_FINISHED.get('win')
+        active = Metrics.ACTIVE_GAMES.get()
+        moves = Metrics.MESSAGES.get('MOVE')
+        malformed = Metrics.MALFORMED.get()
+        timed = Metrics.PROCESS_SECONDS.get('MOVE')[0]
+        first = [MockWriter(0), None, None, "James", Codec.JSON]
+        second = [MockWriter(0), None, None, "Anna", Codec.JSON]
+        room = Room(1, first, second)
+        room.start()
+        self.assertEqual(Metrics.ACTIVE_GAMES.get(), active + 1)
+        for player, col in [(0, 1), (1, 1), (0, 2), (1, 2), (0, 3), (1, 3), (0, 4), (1, 4), (0, 5)]:
+            room.process(Codec.JSON.encode({'type':'MOVE', 'col':col}), player)
+        room.process(b'not a message', 0)
+        self.assertEqual(Metrics.GAMES_STARTED.get(), started + 1)
+        self.assertEqual(Metrics.GAMES_FINISHED.get('win'), won + 1)
+        self.assertEqual(Metrics.ACTIVE_GAMES.get(), active)
+        self.assertEqual(Metrics.MESSAGES.get('MOVE'), moves + 9)
+        self.assertEqual(Metrics.MALFORMED.get(), malformed + 1)
+        self.assertEqual(Metrics.PROCESS_SECONDS.get('MOVE')[0], timed + 9)
+        # A game only finishes once
+        room.forfeit(first)
+        self.assertEqual(Metrics.ACTIVE_GAMES.get(), active)
+
+    def test_unknown_types(self):
+        invalid = Metrics.MESSAGES.get('invalid')
+        first = [MockWriter(0), None, None, "James", Codec.JSON]
+        second = [MockWriter(0), None, None, "Anna", Codec.JSON]
+        room = Room(1, first, second)
+        room.start()
+        for kind in ('CHAT', ['MOVE'], {'a':1}, 3):
+            self.assertEqual(room.process(Codec.JSON.encode({'type':kind}), 0), 'invalid')
+        self.assertEqual(Metrics.MESSAGES.get('invalid'), invalid + 4)
+        self.assertEqual(Metrics.MESSAGES.get('CHAT'), 0)
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
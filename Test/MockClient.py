@@ -1,6 +1,8 @@
 import socket
-import json
 import queue
+import Codec
+import Framing
+from Board import Board
 
 
 class MockClient(object):
@@ -10,7 +12,7 @@ class MockClient(object):
         """
         Initialises clients attributes.
         If a socket, host or port is not given then a new socket will be created, host will be local and port will be 80.
-        Game board is represented as a 6x9 matrix (list of lists).
+        Game board is represented as a 6x9 bitboard (see Board).
 
         :param sock: socket.socket, or None
         :param host: string, IP address
@@ -19,10 +21,11 @@ class MockClient(object):
         height = 6
         width = 9
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.reader = Framing.FrameReader(self.sock)
         self.host = host
         self.port = port
         self.game_over = True
-        self.board = [[None] * width for _ in range(height)]
+        self.board = Board(height, width)
         self.name = None
         self.move = None
         self.stop = False
@@ -49,5 +52,5 @@ class MockClient(object):
 
     def receive_messages(self, amount):
         for i in range(amount):
-            msg = json.loads(self.sock.recv(1024).decode())
+            msg = Codec.decode(self.reader.read())
             self.msg_queue.put(msg)
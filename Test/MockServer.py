@@ -1,7 +1,9 @@
 import socket
-import json
 import threading
 import queue
+import Codec
+import Framing
+from Board import Board
 
 
 class MockServer(object):
@@ -10,7 +12,7 @@ class MockServer(object):
         """
         Initialises servers attributes.
         If a socket, host or port is not given then a new socket will be created, host will be local and port will be 80.
-        Game board is represented as a 6x9 matrix (list of lists).
+        Game board is represented as a 6x9 bitboard (see Board).
 
         :param sock:
         :param host:
@@ -24,7 +26,7 @@ class MockServer(object):
         self.players = []
         self.game_over = True
         self.replay = False
-        self.board = [[None] * width for _ in range(height)]
+        self.board = Board(height, width)
         """---------------------"""
         self.msg_queue = queue.Queue()
 
@@ -52,8 +54,9 @@ class MockServer(object):
     def receive_messages(self, amount):
         clientsocket, address = self.sock.accept()
         self.players += [[clientsocket, address]]
+        reader = Framing.FrameReader(clientsocket)
         for i in range(amount):
-            msg = json.loads(clientsocket.recv(1024).decode())
+            msg = Codec.decode(reader.read())
             self.msg_queue.put(msg)
 
     def connect_to_client(self):
@@ -62,9 +65,9 @@ class MockServer(object):
 
     def send_message(self, msg, player1=True):
         if player1:
-            self.players[0][0].send(json.dumps(msg).encode())
+            self.players[0][0].sendall(Framing.pack(Codec.JSON.encode(msg)))
         else:
-            self.players[1][0].send(json.dumps(msg).encode())
+            self.players[1][0].sendall(Framing.pack(Codec.JSON.encode(msg)))
 
     def quit(self):
         for i in range(len(self.players)):
@@ -0,0 +1,143 @@
+import os
+import pstats
+import signal
+import socket
+import tempfile
+import time
+import unittest
+import Codec
+import Framing
+from AsyncServer import Room
+from Game import Game
+from Profiler import Profiler, format_trace
+from Test.AsyncServerTest import MockWriter
+
+
+class MockGame(Game):
+
+    def process(self, msg, player):
+        self.send(msg, player)
+        return 'MOVE'
+
+    def send(self, msg, player):
+        time.sleep(0.01)
+        self.encode(msg, player)
+
+    def encode(self, msg, player):
+        time.sleep(0.02)
+        return msg
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def room(self, profiler):
+        first = [MockWriter(0), None, None, "James", Codec.JSON]
+        second = [MockWriter(0), None, None, "Anna", Codec.JSON]
+        room = Room(1, first, second)
+        profiler.attach(room)
+        room.start()
+        return room
+
+    def test_nested_phases(self):
+        profiler = Profiler(interval=None)
+        game = MockGame()
+        profiler.attach(game)
+        self.assertEqual(game.process(b'', 0), 'MOVE')
+        phases = profiler.breakdown()['phases']
+        self.assertEqual(profiler.breakdown()['messages'], 1)
+        # Time spent encoding is not counted as sending as well
+        self.assertGreaterEqual(phases['encode']['total'], 0.02)
+        self.assertGreaterEqual(phases['send']['total'], 0.01)
+        self.assertLess(phases['send']['total'], 0.02)
+        self.assertLess(phases['other']['total'], 0.01)
+
+    def test_room(self):
+        profiler = Profiler(interval=None)
+        room = self.room(profiler)
+        for player, col in [(0, 1), (1, 1), (0, 2), (1, 2), (0, 3), (1, 3), (0, 4), (1, 4), (0, 5)]:
+            self.assertEqual(room.process(Codec.JSON.encode({'type':'MOVE', 'col':col}), player), 'MOVE')
+        phases = profiler.breakdown(reset=True)['phases']
+        self.assertEqual(phases['decode']['count'], 9)
+        self.assertEqual(phases['board']['count'], 9)
+        self.assertEqual(phases['log']['count'], 1)
+        self.assertEqual(phases['other']['count'], 9)
+        self.assertEqual(profiler.breakdown()['phases'], {})
+
+    def test_slow(self):
+        profiler = Profiler(interval=None, slow=0.0)
+        room = self.room(profiler)
+        msg = Codec.JSON.encode({'type':'MOVE', 'col':4})
+        with self.assertLogs('Profiler', 'WARNING') as logs:
+            room.process(msg, 0)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Slow MOVE message from player 0", logs.output[0])
+        self.assertIn("decode", logs.output[0])
+        self.assertIn("check", logs.output[0])
+        self.assertIn(repr(msg), logs.output[0])
+
+    def test_report(self):
+        profiler = Profiler(interval=0.0)
+        room = self.room(profiler)
+        with self.assertLogs('Profiler', 'INFO') as logs:
+            room.process(Codec.JSON.encode({'type':'MOVE', 'col':4}), 0)
+        self.assertIn("1 messages", logs.output[0])
+        self.assertIn("board", logs.output[0])
+        self.assertEqual(profiler.breakdown()['messages'], 0)
+
+    def test_capture(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'server.prof')
+            profiler = Profiler(interval=None, path=path)
+            room = self.room(profiler)
+            profiler.toggle_capture()
+            room.process(Codec.JSON.encode({'type':'MOVE', 'col':4}), 0)
+            profiler.toggle_capture()
+            self.assertEqual(profiler.captured, 1)
+            functions = [name for filename, line, name in pstats.Stats(path).stats]
+            self.assertIn('update_board', functions)
+
+    @unittest.skipUnless(hasattr(signal, 'SIGUSR1'), "no SIGUSR1 on Windows")
+    def test_capture_signal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'server.prof')
+            profiler = Profiler(interval=None, path=path)
+            room = self.room(profiler)
+            handler = signal.getsignal(signal.SIGUSR1)
+            try:
+                self.assertEqual(profiler.install(), True)
+                os.kill(os.getpid(), signal.SIGUSR1)
+                # Nothing is started in the handler, only by the next message
+                self.assertEqual(profiler.capture, None)
+                room.process(Codec.JSON.encode({'type':'MOVE', 'col':4}), 0)
+                self.assertEqual(profiler.captured, 1)
+                # A signal arriving while a message is being captured does not wait for it
+                with profiler.capture_lock:
+                    os.kill(os.getpid(), signal.SIGUSR1)
+                self.assertEqual(os.path.exists(path), False)
+                room.process(Codec.JSON.encode({'type':'MOVE', 'col':4}), 1)
+                self.assertEqual(profiler.capture, None)
+                self.assertEqual(os.path.exists(path), True)
+            finally:
+                signal.signal(signal.SIGUSR1, handler)
+
+    def test_read(self):
+        profiler = Profiler(interval=None)
+        sock, other = socket.socketpair()
+        reader = Framing.FrameReader(sock)
+        other.sendall(Framing.pack(b'first') + Framing.pack(b'second'))
+        self.assertEqual(profiler.read(reader), b'first')
+        self.assertEqual(profiler.read(reader), b'second')
+        self.assertEqual([phase for phase, seconds in profiler.local.pending], ['recv'])
+        self.assertEqual(profiler.breakdown()['phases']['recv']['count'], 2)
+        sock.close()
+        other.close()
+
+    def test_format_trace(self):
+        self.assertEqual(format_trace([('recv', 0.001), ('decode', 0.0000125)]), "recv 1.000ms > decode 0.013ms")
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
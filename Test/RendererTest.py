@@ -0,0 +1,62 @@
+import io
+import unittest
+from Board import Board
+from Renderer import BoardRenderer, CLEAR, RESTORE, SAVE, move_to
+
+
+class RendererTest(unittest.TestCase):
+
+    def test_render_all(self):
+        renderer = BoardRenderer(io.StringIO())
+        board = Board()
+        board.drop(4, 'X')
+        output = renderer.render(board)
+        self.assertTrue(output.startswith(CLEAR))
+        self.assertIn(move_to(7, 1) + "[ ][ ][ ][ ][X][ ][ ][ ][ ]", output)
+        self.assertTrue(output.endswith(move_to(renderer.prompt_row(), 1)))
+
+    def test_render_changes(self):
+        renderer = BoardRenderer(io.StringIO())
+        board = Board()
+        renderer.render(board)
+        self.assertEqual(renderer.render(board), "")
+        board.drop(3, 'X')
+        board.drop(3, 'O')
+        self.assertEqual(renderer.render(board), SAVE + move_to(6, 11) + "O" + move_to(7, 11) + "X" + RESTORE)
+        board.clear()
+        self.assertEqual(renderer.render(board), SAVE + move_to(6, 11) + " " + move_to(7, 11) + " " + RESTORE)
+
+    def test_render_resize(self):
+        renderer = BoardRenderer(io.StringIO())
+        renderer.render(Board())
+        output = renderer.render(Board(10, 15, 6))
+        self.assertTrue(output.startswith(CLEAR))
+        self.assertEqual(renderer.prompt_row(), 10 + 3 + BoardRenderer.STATUS_LINES + 1)
+
+    def test_draw(self):
+        out = io.StringIO()
+        renderer = BoardRenderer(out)
+        board = Board()
+        renderer.draw(board)
+        full = renderer.written
+        board.drop(0, 'X')
+        renderer.draw(board)
+        renderer.draw(board)
+        # A move costs a handful of bytes compared to the whole board
+        self.assertLess(renderer.written - full, 20)
+        self.assertEqual(len(out.getvalue()), renderer.written)
+
+    def test_show(self):
+        renderer = BoardRenderer(io.StringIO())
+        renderer.render(Board())
+        for number in range(5):
+            renderer.show("message %i" % number)
+        self.assertEqual(renderer.status, ["message 2", "message 3", "message 4"])
+        self.assertIn("message 4", renderer.out.getvalue())
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
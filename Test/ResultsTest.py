@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+import Codec
+import Results
+from AsyncServer import Room
+from GameLog import GameRecord
+from Results import ResultsStore
+
+
+class MockWriter(object):
+
+    def __init__(self):
+        self.data = b''
+
+    def write(self, data):
+        self.data += data
+
+
+class ResultsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.db")
+        self.store = ResultsStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_expected(self):
+        self.assertAlmostEqual(Results.expected(1500, 1500), 0.5)
+        self.assertAlmostEqual(Results.expected(1900, 1500), 10 / 11)
+        self.assertAlmostEqual(Results.expected(1500, 1900) + Results.expected(1900, 1500), 1.0)
+
+    def test_elo(self):
+        self.assertAlmostEqual(Results.elo(1500, 1500, 1.0), 1516.0)
+        self.assertAlmostEqual(Results.elo(1500, 1500, 0.5), 1500.0)
+        self.assertAlmostEqual(Results.elo(1500, 1500, 0.0, k=16), 1492.0)
+        self.assertAlmostEqual(Results.elo(1900, 1500, 1.0), 1900 + 32 / 11)
+
+    def test_store_game(self):
+        self.store.append(GameRecord(("James", "Anna"), [1, 1, 2], 'X', timestamp=1.0))
+        self.store.flush()
+        self.assertEqual(self.store.written, 1)
+        self.assertEqual(self.store.player("James"), ("James", 1516.0, 1, 1, 0, 0))
+        self.assertEqual(self.store.player("Anna"), ("Anna", 1484.0, 1, 0, 1, 0))
+        self.assertEqual(self.store.history("James"), [(1.0, "Anna", 1.0, 1516.0, 16.0)])
+        self.assertEqual(self.store.history("Anna"), [(1.0, "James", 0.0, 1484.0, -16.0)])
+        self.assertIsNone(self.store.player("Zoë"))
+
+    def test_draw_and_quit(self):
+        self.store.append(GameRecord(("James", "Anna"), [1] * 54, None))
+        self.store.append(GameRecord(("Anna", "James"), [4], 'O', quit=True))
+        self.store.flush()
+        self.assertEqual(self.store.player("James")[2:], (2, 1, 0, 1))
+        self.assertEqual(self.store.player("Anna")[2:], (2, 0, 1, 1))
+        self.assertEqual([score for _, _, score, _, _ in self.store.history("James")], [1.0, 0.5])
+
+    def test_not_rated(self):
+        self.store.append(GameRecord(("James", ""), [1], 'X'))
+        self.store.append(GameRecord(("James", "James"), [1], 'X'))
+        self.store.flush()
+        self.assertEqual(self.store.written, 2)
+        self.assertEqual(self.store.query("SELECT COUNT(*) FROM games"), [(2,)])
+        self.assertIsNone(self.store.player("James"))
+        self.assertEqual(self.store.leaderboard(), [])
+
+    def test_leaderboard(self):
+        for winner, loser in [("a", "b"), ("a", "c"), ("b", "c"), ("a", "d")]:
+            self.store.append(GameRecord((winner, loser), [1], 'X'))
+        self.store.flush()
+        board = self.store.leaderboard()
+        self.assertEqual([row[0] for row in board], ["a", "b", "d", "c"])
+        self.assertEqual([row[0] for row in self.store.leaderboard(2)], ["a", "b"])
+        self.assertEqual(sorted(board, key=lambda row: -row[1]), board)
+        self.assertEqual([opponent for _, opponent, _, _, _ in self.store.history("a", 2)], ["d", "c"])
+
+    def test_reopen(self):
+        self.store.append(GameRecord(("James", "Anna"), [1], 'X'))
+        self.store.close()
+        self.store = ResultsStore(self.path)
+        self.store.append(GameRecord(("James", "Anna"), [1], 'X'))
+        self.store.flush()
+        self.assertEqual(self.store.player("James")[2], 2)
+        self.assertGreater(self.store.player("James")[1], 1516.0)
+
+    def test_queries_use_indexes(self):
+        # Neither query may read a whole table or sort its rows
+        for sql, parameters in ((Results.LEADERBOARD, (10,)), (Results.HISTORY, ("James", 20))):
+            plan = " ".join(row[-1] for row in self.store.query("EXPLAIN QUERY PLAN " + sql, parameters))
+            self.assertNotIn("TEMP B-TREE", plan)
+            self.assertNotRegex(plan, r"SCAN (players|results)\b(?! USING)")
+
+    def test_game_rated(self):
+        first = [MockWriter(), None, None, "James", Codec.JSON]
+        second = [MockWriter(), None, None, "Anna", Codec.JSON]
+        room = Room(1, first, second, results=self.store)
+        room.start()
+        for player, col in [(0, 1), (1, 1), (0, 2), (1, 2), (0, 3), (1, 3), (0, 4), (1, 4), (0, 5)]:
+            room.process(Codec.JSON.encode({'type':'MOVE', 'col':col}), player)
+        room = Room(2, first, second, results=self.store)
+        room.start()
+        room.process(Codec.JSON.encode({'type':'MOVE', 'col':4}), 0)
+        room.forfeit(first)
+        self.store.flush()
+        self.assertEqual(self.store.player("James")[2:], (2, 1, 1, 0))
+        self.assertEqual([score for _, _, score, _, _ in self.store.history("Anna")], [1.0, 0.0])
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
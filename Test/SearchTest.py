@@ -0,0 +1,96 @@
+import time
+import unittest
+from Board import Board
+from Search import Search, WIN
+from TranspositionTable import TranspositionTable
+
+
+class SearchTest(unittest.TestCase):
+
+    def test_order(self):
+        search = Search(Board())
+        self.assertEqual(search.order[0], 4)
+        self.assertEqual(sorted(search.order[1:3]), [3, 5])
+        self.assertEqual(sorted(search.order[-2:]), [0, 8])
+
+    def test_takes_win(self):
+        board = Board()
+        for col in range(4):
+            board.drop(col, 'X')
+            board.drop(col, 'O')
+        self.assertEqual(Search(board, time_limit=1.0).best_move('X'), 4)
+
+    def test_blocks_win(self):
+        board = Board()
+        for col in (1, 2, 3, 4):
+            board.drop(col, 'O')
+        board.drop(1, 'X')
+        board.drop(2, 'X')
+        board.drop(8, 'X')
+        # O has four in a row on the bottom with both ends open, X can only block one
+        self.assertIn(Search(board, time_limit=1.0).best_move('X'), (0, 5))
+
+    def test_board_unchanged(self):
+        board = Board()
+        for col in (4, 4, 3, 5, 2):
+            board.drop(col, 'X' if col % 2 else 'O')
+        masks = dict(board.masks)
+        heights = list(board.heights)
+        Search(board, time_limit=0.2).best_move('O')
+        self.assertEqual(board.masks, masks)
+        self.assertEqual(board.heights, heights)
+
+    def test_time_limit(self):
+        search = Search(Board(), time_limit=0.2)
+        start = time.monotonic()
+        self.assertIn(search.best_move('X'), range(9))
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertGreater(search.depth, 0)
+
+    def test_max_depth(self):
+        search = Search(Board(), time_limit=10.0, max_depth=2)
+        search.best_move('X')
+        self.assertEqual(search.depth, 2)
+
+    def test_full_board(self):
+        board = Board()
+        for col in range(9):
+            for row in range(6):
+                board.drop(col, 'X' if (row + col // 2) % 2 else 'O')
+        self.assertEqual(Search(board).best_move('X'), None)
+
+    def test_table(self):
+        board = Board()
+        for col in (4, 4, 3, 5, 2):
+            board.drop(col, 'X' if col % 2 else 'O')
+        plain = Search(board, time_limit=10.0)
+        plain.deadline = time.monotonic() + 10.0
+        table = TranspositionTable(1 << 16)
+        search = Search(board, time_limit=10.0, table=table)
+        search.deadline = time.monotonic() + 10.0
+        self.assertEqual(search.root('O', 4, search.order)[0], plain.root('O', 4, plain.order)[0])
+        self.assertLess(search.nodes, plain.nodes)
+        self.assertGreater(table.stats()['hits'], 0)
+
+    def test_table_takes_win(self):
+        board = Board()
+        for col in range(4):
+            board.drop(col, 'X')
+            board.drop(col, 'O')
+        self.assertEqual(Search(board, table=TranspositionTable(1 << 16)).best_move('X'), 4)
+
+    def test_evaluate(self):
+        board = Board()
+        search = Search(board)
+        self.assertEqual(search.evaluate('X'), 0)
+        board.drop(4, 'X')
+        self.assertGreater(search.evaluate('X'), 0)
+        self.assertEqual(search.evaluate('X'), -search.evaluate('O'))
+        self.assertLess(search.evaluate('X'), WIN)
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import unittest
+import SelfPlay
+from SelfPlay import SelfPlayGame, RandomPolicy, SearchPolicy
+
+
+class FixedPolicy(object):
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.played = 0
+
+    def reset(self, seed):
+        pass
+
+    def choose(self, board, tile):
+        self.played += 1
+        return self.columns[(self.played - 1) % len(self.columns)]
+
+
+class SelfPlayTest(unittest.TestCase):
+
+    def test_play_win(self):
+        game = SelfPlayGame(FixedPolicy([0, 1, 2, 3, 4]), FixedPolicy([8]))
+        self.assertEqual(game.play(), (0, 9))
+        self.assertEqual(game.check_for_winner('X'), True)
+
+    def test_play_full_column(self):
+        game = SelfPlayGame(FixedPolicy([0]), FixedPolicy([0]))
+        # The first player picks column 0 for the seventh time when it is full
+        self.assertEqual(game.play(), (1, 6))
+
+    def test_play_draw(self):
+        # One row of alternating tiles fills the board without three in a row
+        game = SelfPlayGame(FixedPolicy([0, 2]), FixedPolicy([1, 3]), height=1, width=4, connect=3)
+        winner, moves = game.play()
+        self.assertEqual(winner, None)
+        self.assertEqual(moves, 4)
+
+    def test_play_clears_board(self):
+        game = SelfPlayGame(RandomPolicy(1), RandomPolicy(2))
+        game.play()
+        winner, moves = game.play()
+        self.assertEqual(sum(game.board.heights), moves)
+        self.assertEqual(len(game.moves), moves)
+
+    def test_random_policy(self):
+        game = SelfPlayGame(RandomPolicy(), RandomPolicy())
+        for col in range(8):
+            for _ in range(6):
+                game.board.drop(col, 'X')
+        self.assertEqual(RandomPolicy(3).choose(game.board, 'O'), 8)
+
+    def test_search_policy(self):
+        policy = SearchPolicy(time_limit=1.0, max_depth=2, table_size=1 << 16)
+        game = SelfPlayGame(policy, RandomPolicy(5))
+        for col in range(4):
+            game.board.drop(col, 'X')
+        self.assertEqual(policy.choose(game.board, 'X'), 4)
+        self.assertEqual(sum(game.board.heights), 4)
+
+    def test_run(self):
+        totals = SelfPlay.run(RandomPolicy(), RandomPolicy(), 50, processes=1, batch=20, seed=7)
+        self.assertEqual(totals['games'], 50)
+        self.assertEqual(totals['first_wins'] + totals['second_wins'] + totals['draws'], 50)
+        self.assertEqual(totals['average_length'], totals['moves'] / 50)
+        self.assertEqual(totals['first_win_rate'], totals['first_wins'] / 50)
+        self.assertGreater(totals['games_per_second'], 0)
+        # The same seed plays the same games, however many processes are used
+        again = SelfPlay.run(RandomPolicy(), RandomPolicy(), 50, processes=2, batch=20, seed=7)
+        self.assertEqual(again['moves'], totals['moves'])
+        self.assertEqual(again['first_wins'], totals['first_wins'])
+
+    def test_run_bot(self):
+        totals = SelfPlay.run(SearchPolicy(max_depth=2, table_size=0), RandomPolicy(), 4, processes=1)
+        self.assertEqual(totals['first_wins'], 4)
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 import threading
 import time
 import unittest
+import Codec
+import Framing
+import Metrics
 from Server import Server
 from Test.MockClient import MockClient
 
@@ -16,7 +19,13 @@ class ServerTest(unittest.TestCase):
         self.assertEqual(server.players, [])
         self.assertEqual(server.game_over, True)
         self.assertEqual(server.replay, False)
-        self.assertEqual(server.board, [[None] * 9 for _ in range(6)])
+        self.assertEqual(server.board.to_list(), [[None] * 9 for _ in range(6)])
+        server.sock.close()
+
+    def test_init_geometry(self):
+        server = Server(height=10, width=15, connect=6)
+        self.assertEqual(server.board.to_list(), [[None] * 15 for _ in range(10)])
+        self.assertEqual(server.board.connect, 6)
         server.sock.close()
 
     def test_update_board(self):
@@ -25,7 +34,7 @@ class ServerTest(unittest.TestCase):
         col = 8
         row = server.update_board(col, 0)
         self.assertEqual(row, 5)
-        self.assertEqual(server.board[5][col], 'X')
+        self.assertEqual(server.board.get(5, col), 'X')
         server.sock.close()
 
     def test_remove_player(self):
@@ -45,47 +54,71 @@ class ServerTest(unittest.TestCase):
     def test_check_for_winner_horizontal(self):
         server = Server()
         tile = 'X'
-        server.board[3][4] = tile
-        server.board[3][5] = tile
-        server.board[3][6] = tile
-        server.board[3][7] = tile
-        server.board[3][8] = tile
+        server.board.set(3, 4, tile)
+        server.board.set(3, 5, tile)
+        server.board.set(3, 6, tile)
+        server.board.set(3, 7, tile)
+        server.board.set(3, 8, tile)
         self.assertEqual(server.check_for_winner(tile), True)
         server.sock.close()
 
     def test_check_for_winner_vertical(self):
         server = Server()
         tile = 'X'
-        server.board[5][8] = tile
-        server.board[4][8] = tile
-        server.board[3][8] = tile
-        server.board[2][8] = tile
-        server.board[1][8] = tile
+        server.board.set(5, 8, tile)
+        server.board.set(4, 8, tile)
+        server.board.set(3, 8, tile)
+        server.board.set(2, 8, tile)
+        server.board.set(1, 8, tile)
         self.assertEqual(server.check_for_winner(tile), True)
         server.sock.close()
 
     def test_check_for_winner_falling_diagonal(self):
         server = Server()
         tile = 'X'
-        server.board[1][4] = tile
-        server.board[2][5] = tile
-        server.board[3][6] = tile
-        server.board[4][7] = tile
-        server.board[5][8] = tile
+        server.board.set(1, 4, tile)
+        server.board.set(2, 5, tile)
+        server.board.set(3, 6, tile)
+        server.board.set(4, 7, tile)
+        server.board.set(5, 8, tile)
         self.assertEqual(server.check_for_winner(tile), True)
         server.sock.close()
 
     def test_check_for_winner_rising_diagonal(self):
         server = Server()
         tile = 'X'
-        server.board[0][8] = tile
-        server.board[1][7] = tile
-        server.board[2][6] = tile
-        server.board[3][5] = tile
-        server.board[4][4] = tile
+        server.board.set(0, 8, tile)
+        server.board.set(1, 7, tile)
+        server.board.set(2, 6, tile)
+        server.board.set(3, 5, tile)
+        server.board.set(4, 4, tile)
         self.assertEqual(server.check_for_winner(tile), True)
         server.sock.close()
 
+    def test_check_for_winner_at(self):
+        server = Server()
+        server.players = [[None, None, 'X']]
+        for col in range(4):
+            row = server.update_board(col, 0)
+            self.assertEqual(server.check_for_winner_at(row, col, 'X'), False)
+        row = server.update_board(4, 0)
+        self.assertEqual(server.check_for_winner_at(row, 4, 'X'), True)
+        self.assertEqual(server.check_for_winner_at(row, 4, 'X'), server.check_for_winner('X'))
+        self.assertEqual(server.check_for_winner_at(None, 4, 'X'), False)
+        server.sock.close()
+
+    def test_check_for_draw(self):
+        server = Server()
+        server.players = [[None, None, 'X'], [None, None, 'O']]
+        for col in range(9):
+            for row in range(6):
+                self.assertEqual(server.check_for_draw(), False)
+                server.update_board(col, (row + col // 2) % 2)
+        self.assertEqual(server.check_for_winner('X'), False)
+        self.assertEqual(server.check_for_winner('O'), False)
+        self.assertEqual(server.check_for_draw(), True)
+        server.sock.close()
+
     def test_connect(self):
         server = Server()
         self.assertEqual(server.connect(), True)
@@ -113,6 +146,7 @@ class ServerTest(unittest.TestCase):
         self.assertEqual(msg['type'], 'HELLO')
         self.assertEqual(msg['wait'], True)
         self.assertEqual(msg['move'], False)
+        self.assertEqual((msg['height'], msg['width'], msg['connect']), (6, 9, 5))
         client.sock.close()
         server.players[0][0].close()
         server.sock.close()
@@ -163,7 +197,57 @@ class ServerTest(unittest.TestCase):
         server.players[0][0].close()
         server.sock.close()
 
+    def test_ping(self):
+        server, clients = self.start_game()
+        clients[1].sock.sendall(Framing.pack(Codec.JSON.encode({'type':'PING'})))
+        self.assertEqual(self.answer_pings(clients[1]), {'type':'PONG'})
+        for client in clients:
+            client.sock.close()
+        server.sock.close()
+
+    def test_reap(self):
+        reaped = Metrics.REAPED.get()
+        server, clients = self.start_game(heartbeat=0.05, idle_timeout=0.2)
+        # Only the second player answers, so the first is dropped and loses
+        msg = self.answer_pings(clients[1])
+        self.assertEqual((msg['type'], msg['name'], msg['quit'], msg['final']), ('OVER', 'Anna', True, False))
+        self.assertEqual(Metrics.REAPED.get(), reaped + 1)
+        # The second player can not play again without them
+        clients[1].sock.sendall(Framing.pack(Codec.JSON.encode({'type':'HELLO', 'name':'Anna', 'replay':True})))
+        msg = self.answer_pings(clients[1])
+        self.assertEqual((msg['type'], msg['final']), ('OVER', True))
+        while server.players:
+            time.sleep(0.01)
+        for client in clients:
+            client.sock.close()
+        server.sock.close()
+
     """-------------HELPER FUNCTIONS-------------------------"""
+
+    def start_game(self, **kwargs):
+        server = Server(port=0, **kwargs)
+        self.start_thread(server.start, [])
+        while not server.port:
+            time.sleep(0.01)
+        clients = []
+        for name in ('James', 'Anna'):
+            client = MockClient(port=server.port)
+            client.connect()
+            client.sock.sendall(Framing.pack(Codec.JSON.encode({'type':'HELLO', 'name':name, 'replay':False})))
+            clients += [client]
+            while len(server.players) < len(clients) or len(server.players[-1]) < 4:
+                time.sleep(0.01)
+        return server, clients
+
+    def answer_pings(self, client):
+        client.receive_messages(1)
+        msg = client.msg_queue.get()
+        while msg['type'] in ('PING', 'HELLO'):
+            if msg['type'] == 'PING':
+                client.sock.sendall(Framing.pack(Codec.JSON.encode({'type':'PONG'})))
+            client.receive_messages(1)
+            msg = client.msg_queue.get()
+        return msg
         
     def start_thread(self, func, args=None):
         thread = threading.Thread(target=func, args=args)
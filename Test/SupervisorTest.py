@@ -0,0 +1,71 @@
+import asyncio
+import os
+import signal
+import socket
+import threading
+import time
+import unittest
+from Supervisor import Supervisor, is_open
+from Test.LoadGenerator import run_load
+
+
+class SupervisorTest(unittest.TestCase):
+
+    def start_supervisor(self, workers=2):
+        supervisor = Supervisor(port=0, workers=workers)
+        threading.Thread(target=supervisor.start, daemon=True).start()
+        supervisor.started.wait()
+        self.addCleanup(supervisor.stop)
+        return supervisor
+
+    def test_play(self):
+        supervisor = self.start_supervisor()
+        self.assertEqual(len(set(process.pid for process in supervisor.workers)), 2)
+        summary = asyncio.run(run_load(port=supervisor.port, clients=10, rate=200.0, games=2, timeout=5.0))
+        self.assertEqual(summary['errors'], {})
+        self.assertEqual(summary['finished'], 10)
+        self.assertEqual(summary['games'], 20)
+        self.assertEqual(supervisor.turn, 5)
+
+    def test_restart(self):
+        supervisor = self.start_supervisor()
+        crashed = supervisor.workers[0]
+        os.kill(crashed.pid, signal.SIGKILL)
+        deadline = time.monotonic() + 5
+        while supervisor.restarts == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(supervisor.restarts, 1)
+        self.assertIsNot(supervisor.workers[0], crashed)
+        self.assertEqual(supervisor.workers[0].is_alive(), True)
+        summary = asyncio.run(run_load(port=supervisor.port, clients=4, rate=200.0, games=1, timeout=5.0))
+        self.assertEqual(summary['errors'], {})
+        self.assertEqual(summary['games'], 4)
+
+    def test_first_player_leaves(self):
+        supervisor = self.start_supervisor(workers=1)
+        sock = socket.create_connection(('127.0.0.1', supervisor.port))
+        while supervisor.waiting is None:
+            time.sleep(0.01)
+        sock.close()
+        # The next two players are paired with each other rather than with the player who left
+        summary = asyncio.run(run_load(port=supervisor.port, clients=2, rate=200.0, games=1, timeout=5.0))
+        self.assertEqual(summary['errors'], {})
+        self.assertEqual(summary['games'], 2)
+
+    def test_is_open(self):
+        first, second = socket.socketpair()
+        self.assertEqual(is_open(first), True)
+        second.sendall(b'x')
+        self.assertEqual(is_open(first), True)
+        second.close()
+        self.assertEqual(is_open(first), True)
+        first.recv(1)
+        self.assertEqual(is_open(first), False)
+        first.close()
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
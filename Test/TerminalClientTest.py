@@ -0,0 +1,103 @@
+import io
+import os
+import socket
+import threading
+import time
+import unittest
+import Codec
+import Framing
+from TerminalClient import TerminalClient
+
+
+class TerminalClientTest(unittest.TestCase):
+
+    def setUp(self):
+        read, self.typing = os.pipe()
+        self.stdin = os.fdopen(read)
+        self.out = io.StringIO()
+        self.client = TerminalClient(stdin=self.stdin, out=self.out)
+        self.client.name = "James"
+        self.client.sock.close()
+        self.client.sock, self.server = socket.socketpair()
+        self.client.reader = Framing.FrameReader(self.client.sock)
+        self.server.settimeout(5)
+        self.reader = Framing.FrameReader(self.server)
+        self.thread = threading.Thread(target=self.client.run, daemon=True)
+
+    def tearDown(self):
+        self.thread.join(5)
+        self.client.sock.close()
+        self.server.close()
+        self.stdin.close()
+        if self.typing is not None:
+            os.close(self.typing)
+
+    def send(self, msg):
+        self.server.sendall(Framing.pack(Codec.JSON.encode(msg)))
+
+    def type(self, line):
+        os.write(self.typing, line.encode() + b'\n')
+
+    def wait_for(self, question):
+        deadline = time.monotonic() + 5
+        while self.client.question != question and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.assertEqual(self.client.question, question)
+
+    def receive(self):
+        return Codec.decode(self.reader.read())
+
+    def test_opponent_quits_while_typing(self):
+        self.thread.start()
+        self.send({'type':'HELLO', 'wait':False, 'move':True, 'height':6, 'width':9, 'connect':5})
+        # The opponent quits while the user has still to enter their move
+        self.send({'type':'OVER', 'name':"James", 'quit':True, 'final':False})
+        self.wait_for('again')
+        self.type("n")
+        self.assertEqual(self.receive(), {'type':'OVER', 'name':"James", 'quit':False})
+        self.thread.join(5)
+        self.assertEqual(self.client.stop, True)
+        self.assertIn("Your opponent has quit!", self.client.renderer.status)
+
+    def test_move(self):
+        self.thread.start()
+        self.send({'type':'HELLO', 'wait':False, 'move':True, 'height':6, 'width':9, 'connect':5})
+        self.wait_for('move')
+        self.type("x")
+        self.type("10")
+        self.type("4")
+        self.assertEqual(self.receive(), {'type':'MOVE', 'col':3})
+        self.send({'type':'MOVE', 'move':False, 'row':5, 'col':3, 'tile':'X'})
+        self.send({'type':'MOVE', 'move':True, 'row':4, 'col':3, 'tile':'O'})
+        self.wait_for('move')
+        self.type("0")
+        self.type("y")
+        self.assertEqual(self.receive(), {'type':'OVER', 'quit':True})
+        self.send({'type':'OVER', 'name':"Anna", 'quit':True, 'final':False})
+        self.wait_for('again')
+        self.type("y")
+        self.assertEqual(self.receive()['replay'], True)
+        self.server.close()
+        self.thread.join(5)
+        self.assertEqual(self.client.stop, True)
+        self.assertEqual(self.client.board.get(4, 3), 'O')
+        self.assertIn("Please enter a number...", self.out.getvalue())
+        self.assertIn("Enter a number between 0-9...", self.out.getvalue())
+        self.assertEqual(self.client.renderer.status[-1], "Lost connection to the server...")
+
+    def test_input_closed(self):
+        self.thread.start()
+        self.send({'type':'HELLO', 'wait':False, 'move':False, 'height':6, 'width':9, 'connect':5})
+        self.type("4")
+        os.close(self.typing)
+        self.typing = None
+        self.assertEqual(self.receive(), {'type':'OVER', 'quit':True})
+        self.thread.join(5)
+        self.assertIn("It's not your turn yet...", self.out.getvalue())
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import unittest
+from TokenBucket import TokenBucket
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def test_burst(self):
+        bucket = TokenBucket(1.0, 3, Clock())
+        self.assertEqual([bucket.allow() for _ in range(5)], [True, True, True, False, False])
+        self.assertEqual((bucket.refused, bucket.streak), (2, 2))
+
+    def test_refill(self):
+        clock = Clock()
+        bucket = TokenBucket(2.0, 4, clock)
+        for _ in range(4):
+            bucket.allow()
+        self.assertEqual(bucket.allow(), False)
+        clock.now += 0.5
+        self.assertEqual(bucket.allow(), True)
+        self.assertEqual(bucket.streak, 0)
+        self.assertEqual(bucket.allow(), False)
+        # The bucket never holds more than the burst
+        clock.now += 60
+        self.assertEqual([bucket.allow() for _ in range(5)], [True, True, True, True, False])
+
+    def test_cost(self):
+        bucket = TokenBucket(1.0, 3, Clock())
+        self.assertEqual(bucket.allow(2), True)
+        self.assertEqual(bucket.allow(2), False)
+        self.assertEqual(bucket.allow(1), True)
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import unittest
+import Tournament
+from SelfPlay import RandomPolicy, SearchPolicy
+from Tournament import Tournament as Event
+
+
+class FixedPolicy(object):
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.played = 0
+
+    def reset(self, seed):
+        self.played = 0
+
+    def choose(self, board, tile):
+        self.played += 1
+        return self.columns[(self.played - 1) % len(self.columns)]
+
+
+class BrokenPolicy(object):
+
+    def reset(self, seed):
+        pass
+
+    def choose(self, board, tile):
+        raise AssertionError("No games should be played")
+
+
+class TournamentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "tournament.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_make_entrant(self):
+        name, policy = Tournament.make_entrant('bot:depth=3,time=0.5,table=1')
+        self.assertEqual(name, 'bot:depth=3,time=0.5,table=1')
+        self.assertIsInstance(policy, SearchPolicy)
+        self.assertEqual((policy.max_depth, policy.time_limit, policy.table_size), (3, 0.5, 1024 * 1024))
+        self.assertIsInstance(Tournament.make_entrant('random')[1], RandomPolicy)
+        self.assertRaises(ValueError, Tournament.make_entrant, 'human')
+        self.assertRaises(ValueError, Tournament.make_entrant, 'bot:speed=2')
+        self.assertRaises(ValueError, Tournament.make_entrant, 'random:depth=2')
+
+    def test_confidence_interval(self):
+        self.assertEqual(Tournament.confidence_interval(0, 0, 0), (0.0, 1.0))
+        low, high = Tournament.confidence_interval(50, 0, 50)
+        self.assertAlmostEqual((low + high) / 2, 0.5)
+        self.assertAlmostEqual(high - low, 0.192, places=3)
+        low, high = Tournament.confidence_interval(10, 0, 0)
+        self.assertEqual(high, 1.0)
+        self.assertLess(low, 1.0)
+        # Draws count as half a win
+        self.assertEqual(Tournament.confidence_interval(0, 20, 0), Tournament.confidence_interval(10, 0, 10))
+
+    def test_names(self):
+        self.assertRaises(ValueError, Event, [('a', RandomPolicy()), ('a', RandomPolicy())])
+        self.assertRaises(ValueError, Event, [('a', RandomPolicy())])
+
+    def test_round_robin(self):
+        # Between 'a' and 'b', whoever moves first makes a line first
+        entrants = [('a', FixedPolicy([0, 1, 2, 3, 4])), ('b', FixedPolicy([8])), ('c', RandomPolicy())]
+        tournament = Event(entrants, games=5, processes=1, batch=2)
+        self.assertEqual(tournament.pairings(0), [('a', 'b'), ('a', 'c'), ('b', 'c')])
+        self.assertEqual(len(tournament.tasks(0)), 3 * 2 * 3)
+        tournament.run()
+        table = tournament.crosstable()
+        self.assertEqual(table['a']['b'], [5, 0, 5])
+        self.assertEqual(table['b']['a'], [5, 0, 5])
+        self.assertNotIn('a', table['a'])
+        standings = tournament.standings()
+        self.assertEqual(sum(row[1] + row[2] + row[3] for row in standings), 3 * 2 * 5 * 2)
+        self.assertEqual([row[4] for row in standings], sorted([row[4] for row in standings], reverse=True))
+        lines = tournament.report()
+        self.assertEqual(len(lines), 4)
+        self.assertIn('95% interval', lines[0])
+
+    def test_same_games_any_processes(self):
+        entrants = [('a', RandomPolicy()), ('b', RandomPolicy())]
+        first = Event(entrants, games=6, processes=1, batch=4, seed=3)
+        first.run()
+        second = Event(entrants, games=6, processes=2, batch=4, seed=3)
+        second.run()
+        self.assertEqual(first.results, second.results)
+
+    def test_swiss(self):
+        entrants = [(str(index), RandomPolicy()) for index in range(5)]
+        tournament = Event(entrants, games=2, swiss=True, processes=1)
+        self.assertEqual(tournament.rounds, 3)
+        tournament.run()
+        sat_out = set()
+        met = set()
+        for round in range(tournament.rounds):
+            pairs = tournament.pairings(round)
+            self.assertEqual(len(pairs), 2)
+            players = [name for pair in pairs for name in pair]
+            self.assertEqual(len(set(players)), 4)
+            # Nobody sits out twice, and nobody meets the same opponent twice while others are left to play
+            resting = set(tournament.names) - set(players)
+            self.assertFalse(resting & sat_out)
+            sat_out |= resting
+            for pair in pairs:
+                self.assertNotIn(frozenset(pair), met)
+                met.add(frozenset(pair))
+        self.assertEqual(sum(row[1] + row[2] + row[3] for row in tournament.standings()), 3 * 2 * 2 * 2 * 2)
+
+    def test_checkpoint(self):
+        entrants = [('a', RandomPolicy()), ('b', RandomPolicy()), ('c', SearchPolicy(max_depth=1, table_size=0))]
+        tournament = Event(entrants, games=3, swiss=True, rounds=2, processes=1, checkpoint=self.path)
+        tournament.run()
+        self.assertTrue(os.path.exists(self.path))
+        # Resuming a finished tournament plays nothing
+        broken = [(name, BrokenPolicy()) for name, _ in entrants]
+        resumed = Event(broken, games=3, swiss=True, rounds=2, processes=1, checkpoint=self.path)
+        resumed.run()
+        self.assertEqual(resumed.results, tournament.results)
+        self.assertEqual(resumed.standings(), tournament.standings())
+        # Resuming part way through only plays the missing batches
+        key = max(tournament.results)
+        del resumed.results[key]
+        resumed.save()
+        again = Event(entrants, games=3, swiss=True, rounds=2, processes=1, checkpoint=self.path)
+        self.assertEqual(len(again.results), len(tournament.results) - 1)
+        again.run()
+        self.assertEqual(again.results, tournament.results)
+        self.assertRaises(ValueError, Event, entrants, games=4, swiss=True, rounds=2, checkpoint=self.path)
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import unittest
+from Board import Board
+from TranspositionTable import TranspositionTable, EXACT, LOWER, UPPER, SLOT_SIZE
+
+
+class TranspositionTableTest(unittest.TestCase):
+
+    def test_init(self):
+        table = TranspositionTable(1000)
+        self.assertEqual(table.slots, 32)
+        self.assertEqual(table.stats()['bytes'], 32 * SLOT_SIZE)
+        self.assertEqual(len(table.keys), 32)
+
+    def test_store_probe(self):
+        table = TranspositionTable(1 << 12)
+        board = Board()
+        board.drop(2, 'X')
+        self.assertEqual(table.probe(board, 'O'), None)
+        table.store(board, 'O', -1234, UPPER, 5, 3)
+        self.assertEqual(table.probe(board, 'O'), (-1234, UPPER, 5, 3))
+        self.assertEqual(table.probe(board, 'X'), None)
+        table.store(board, 'X', 99, LOWER, 2, -1)
+        self.assertEqual(table.probe(board, 'X'), (99, LOWER, 2, -1))
+
+    def test_mirror(self):
+        table = TranspositionTable(1 << 12)
+        board = Board()
+        board.drop(1, 'X')
+        board.drop(2, 'O')
+        table.store(board, 'X', 10, EXACT, 4, 0)
+        mirror = Board()
+        mirror.drop(7, 'X')
+        mirror.drop(6, 'O')
+        self.assertEqual(table.probe(mirror, 'X'), (10, EXACT, 4, 8))
+        self.assertEqual(table.stats()['filled'], 1)
+
+    def test_replacement(self):
+        table = TranspositionTable(2 * SLOT_SIZE)
+        # Find two different positions that share the table's first slot
+        same = []
+        for col in range(9):
+            for height in range(1, 4):
+                board = Board()
+                for _ in range(height):
+                    board.drop(col, 'X')
+                key = table.key(board, 'O')[0]
+                if key & 1 == 0 and key not in [table.key(other, 'O')[0] for other in same]:
+                    same += [board]
+        first, second = same[:2]
+        table.store(first, 'O', 1, EXACT, 6, 0)
+        # A shallower result from the same search does not replace a deeper one
+        table.store(second, 'O', 2, EXACT, 3, 0)
+        self.assertEqual(table.probe(first, 'O')[0], 1)
+        self.assertEqual(table.probe(second, 'O'), None)
+        # But it does replace one from an earlier search
+        table.new_search()
+        table.store(second, 'O', 2, EXACT, 3, 0)
+        self.assertEqual(table.probe(first, 'O'), None)
+        self.assertEqual(table.probe(second, 'O')[0], 2)
+        self.assertEqual(table.stats()['replaced'], 1)
+
+    def test_stats(self):
+        table = TranspositionTable(1 << 12)
+        board = Board()
+        table.probe(board, 'X')
+        table.store(board, 'X', 0, EXACT, 1, 4)
+        table.probe(board, 'X')
+        stats = table.stats()
+        self.assertEqual(stats['probes'], 2)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+        self.assertEqual(stats['filled'], 1)
+        self.assertEqual(stats['occupancy'], 1 / 256)
+        table.clear()
+        self.assertEqual(table.stats()['filled'], 0)
+        self.assertEqual(table.probe(board, 'X'), None)
+
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
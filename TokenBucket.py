@@ -0,0 +1,41 @@
+import time
+
+
+class TokenBucket(object):
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        """
+        Rate limiter that allows bursts. The bucket holds up to burst tokens and refills at rate tokens a second;
+        each message takes a token, and a message that finds the bucket empty is refused.
+        The bucket is only refilled when it is used, so an idle one costs nothing.
+
+        :param rate:    float, tokens added each second
+        :param burst:   int, most tokens the bucket holds, and so the most messages allowed at once
+        :param clock:   function, returns the time in seconds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.refused = 0
+        # Number of times in a row a message has been refused
+        self.streak = 0
+
+    def allow(self, cost=1):
+        """
+        Take tokens from the bucket if there are enough.
+
+        :param cost:    int, tokens needed
+        :return: boolean, True if allowed, False if the bucket is too empty
+        """
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            self.streak = 0
+            return True
+        self.refused += 1
+        self.streak += 1
+        return False
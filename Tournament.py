@@ -0,0 +1,315 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+import SelfPlay
+
+# Options a policy can be given on the command line, e.g. 'bot:depth=4,time=0.5', and the argument each sets
+OPTIONS = {
+    'time': ('time_limit', float),
+    'depth': ('max_depth', int),
+    'table': ('table_size', lambda megabytes: int(float(megabytes) * 1024 * 1024)),
+}
+
+
+def make_entrant(spec):
+    """
+    :param spec: string, a policy name from SelfPlay.POLICIES, optionally followed by ':' and options separated by
+                 ',', e.g. 'random' or 'bot:depth=4,time=0.5'
+    :return: (string, policy), the spec as the entrants name, and the policy
+    """
+    kind, _, options = spec.partition(':')
+    if kind not in SelfPlay.POLICIES:
+        raise ValueError("Unknown policy %r, expected one of: %s" % (kind, ", ".join(sorted(SelfPlay.POLICIES))))
+    kwargs = {}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        if key not in OPTIONS:
+            raise ValueError("Unknown option %r in %r, expected one of: %s" % (key, spec, ", ".join(sorted(OPTIONS))))
+        name, convert = OPTIONS[key]
+        kwargs[name] = convert(value)
+    try:
+        return spec, SelfPlay.POLICIES[kind](**kwargs)
+    except TypeError:
+        raise ValueError("%r does not take the options given in %r" % (kind, spec))
+
+
+def confidence_interval(wins, draws, losses, z=1.96):
+    """
+    Wilson score interval for the share of points scored, counting a draw as half a win.
+
+    :param wins:    int
+    :param draws:   int
+    :param losses:  int
+    :param z:       float, standard deviations either side (1.96 for 95%)
+    :return: (float, float), lowest and highest likely score, 0 to 1 (or 0 and 1 if no games were played)
+    """
+    games = wins + draws + losses
+    if not games:
+        return 0.0, 1.0
+    score = (wins + 0.5 * draws) / games
+    scale = 1 + z * z / games
+    centre = (score + z * z / (2 * games)) / scale
+    margin = z * math.sqrt(score * (1 - score) / games + z * z / (4 * games * games)) / scale
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def play_task(item):
+    """
+    Play one batch of a tournament, in this process.
+
+    :param item: ((int, string, string, int), task), key of the batch and the task for SelfPlay.play_games
+    :return: ((int, string, string, int), {}), the key and results of the games
+    """
+    key, task = item
+    return key, SelfPlay.play_games(task)
+
+
+class Tournament(object):
+
+    def __init__(self, entrants, games=10, swiss=False, rounds=None, processes=None, batch=10, seed=0,
+                 checkpoint=None, height=6, width=9, connect=5):
+        """
+        Ranks policies by playing them against each other with the same rules as the servers (see SelfPlayGame).
+        Round robin plays every pair of entrants in one round. Swiss plays several rounds, pairing entrants with
+        similar scores that have not met yet, so fewer games are needed to rank many entrants. Each pairing plays
+        the given number of games with each entrant moving first.
+        Games are played in batches across a pool of processes. With a checkpoint file, every finished batch is
+        saved to it, and a tournament started again with the same settings only plays the batches that are missing.
+
+        :param entrants:    [(string, policy)], unique names and their policies
+        :param games:       int, games each pairing plays with each entrant moving first
+        :param swiss:       boolean, True for Swiss pairings, otherwise round robin
+        :param rounds:      int, number of Swiss rounds (or None for enough to find a clear winner)
+        :param processes:   int, number of processes (or None for one per CPU, or 1 to play in this process)
+        :param batch:       int, number of games each process plays at a time
+        :param seed:        int, seed for the random policies and Swiss pairings, so tournaments can be repeated
+        :param checkpoint:  string, JSON file to save finished batches to and resume from (or None)
+        :param height:      int, number of rows
+        :param width:       int, number of columns
+        :param connect:     int, number of tiles in a row needed to win
+        """
+        names = [name for name, _ in entrants]
+        if len(set(names)) != len(names):
+            raise ValueError("Entrants must have different names...")
+        if len(entrants) < 2:
+            raise ValueError("A tournament needs at least two entrants...")
+        self.names = names
+        self.policies = dict(entrants)
+        self.games = games
+        self.swiss = swiss
+        if not swiss:
+            rounds = 1
+        elif rounds is None:
+            rounds = max(1, math.ceil(math.log2(len(entrants))))
+        self.rounds = rounds
+        self.processes = processes
+        self.batch = batch
+        self.seed = seed
+        self.checkpoint = checkpoint
+        self.geometry = (height, width, connect)
+        # Results of each finished batch, by (round, first, second, first game of the batch)
+        self.results = {}
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self.load()
+
+    def settings(self):
+        """
+        :return: {}, everything that decides which games are played, saved with the checkpoint
+        """
+        return {'entrants':self.names, 'games':self.games, 'swiss':self.swiss, 'rounds':self.rounds,
+                'batch':self.batch, 'seed':self.seed, 'geometry':list(self.geometry)}
+
+    def load(self):
+        """
+        Read the finished batches from the checkpoint file.
+        """
+        with open(self.checkpoint) as f:
+            saved = json.load(f)
+        if saved['settings'] != self.settings():
+            raise ValueError("Checkpoint %s was made with different settings..." % self.checkpoint)
+        for round, first, second, start, results in saved['results']:
+            self.results[(round, first, second, start)] = results
+
+    def save(self):
+        """
+        Write every finished batch to the checkpoint file, replacing it in one step so it is never left half written.
+        """
+        results = [list(key) + [value] for key, value in sorted(self.results.items())]
+        temporary = self.checkpoint + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump({'settings':self.settings(), 'results':results}, f)
+        os.replace(temporary, self.checkpoint)
+
+    def pairings(self, round):
+        """
+        Round robin pairs everyone. Swiss pairs the best entrant with the next best they have not met, and so on,
+        using the results of the earlier rounds; with an odd number of entrants the lowest without a bye sits out.
+
+        :param round: int
+        :return: [(string, string)], entrants to play each other this round
+        """
+        if not self.swiss:
+            return [(first, second) for index, first in enumerate(self.names) for second in self.names[index + 1:]]
+        earlier = [key for key in self.results if key[0] < round]
+        met = {(first, second) for _, first, second, _ in earlier}
+        met |= {(second, first) for first, second in met}
+        # Entrants with the same score are ordered differently each round, but the same way every run
+        order = list(self.names)
+        random.Random(self.seed + round).shuffle(order)
+        scores = self.scores(round)
+        order.sort(key=lambda name: -score_of(scores[name]))
+        if len(order) % 2:
+            # Earlier rounds are finished before a round is paired, so anyone missing from one sat out
+            rounds = {name: set() for name in self.names}
+            for earlier_round, first, second, _ in earlier:
+                rounds[first].add(earlier_round)
+                rounds[second].add(earlier_round)
+            resting = [name for name in reversed(order) if len(rounds[name]) == round] or list(reversed(order))
+            order.remove(resting[0])
+        pairs = []
+        while order:
+            first = order.pop(0)
+            others = [name for name in order if (first, name) not in met] or order
+            pairs += [(first, others[0])]
+            order.remove(others[0])
+        return pairs
+
+    def tasks(self, round):
+        """
+        :param round: int
+        :return: [((int, string, string, int), task)], every batch of the round, by key, both ways round
+        """
+        tasks = []
+        for pair, (first, second) in enumerate(self.pairings(round)):
+            for side, (one, two) in enumerate(((first, second), (second, first))):
+                for start in range(0, self.games, self.batch):
+                    count = min(self.batch, self.games - start)
+                    # Every batch has its own seeds, which do not depend on the order batches are played in
+                    seed = self.seed + (((round * 1000 + pair) * 2 + side) * self.games + start) * 2
+                    tasks += [((round, one, two, start),
+                               (self.policies[one], self.policies[two], count, seed, self.geometry))]
+        return tasks
+
+    def run(self):
+        """
+        Play every batch that has not been played yet, round by round, saving each as it finishes.
+
+        :return: float, seconds taken
+        """
+        began = time.monotonic()
+        pool = None if self.processes == 1 else multiprocessing.Pool(self.processes)
+        try:
+            for round in range(self.rounds):
+                pending = [item for item in self.tasks(round) if item[0] not in self.results]
+                if not pending:
+                    continue
+                batches = map(play_task, pending) if pool is None else pool.imap_unordered(play_task, pending)
+                for key, results in batches:
+                    self.results[key] = results
+                    if self.checkpoint is not None:
+                        self.save()
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return time.monotonic() - began
+
+    def scores(self, rounds=None):
+        """
+        :param rounds: int, number of rounds to count (or None for all of them)
+        :return: {string: [int, int, int]}, wins, draws and losses of each entrant
+        """
+        return {name: [sum(row) for row in zip(*opponents.values())] if opponents else [0, 0, 0]
+                for name, opponents in self.crosstable(rounds).items()}
+
+    def crosstable(self, rounds=None):
+        """
+        :param rounds: int, number of rounds to count (or None for all of them)
+        :return: {string: {string: [int, int, int]}}, wins, draws and losses of each entrant against each opponent
+        """
+        table = {name: {} for name in self.names}
+        for (round, first, second, _), results in self.results.items():
+            if rounds is not None and round >= rounds:
+                continue
+            wins, losses, draws = results['first_wins'], results['second_wins'], results['draws']
+            for name, opponent, record in ((first, second, (wins, draws, losses)),
+                                           (second, first, (losses, draws, wins))):
+                totals = table[name].setdefault(opponent, [0, 0, 0])
+                for index, count in enumerate(record):
+                    totals[index] += count
+        return table
+
+    def standings(self):
+        """
+        :return: [(string, int, int, int, float, float, float)], name, wins, draws, losses, score and the lowest and
+                 highest likely score, best score first
+        """
+        rows = []
+        for name, (wins, draws, losses) in self.scores().items():
+            low, high = confidence_interval(wins, draws, losses)
+            rows += [(name, wins, draws, losses, score_of((wins, draws, losses)), low, high)]
+        rows.sort(key=lambda row: -row[4])
+        return rows
+
+    def report(self):
+        """
+        :return: [string], the crosstable with each entrants score against each opponent, and their overall score
+        """
+        standings = self.standings()
+        table = self.crosstable()
+        width = max(len(name) for name in self.names)
+        heading = "%3s  %-*s " % ('#', width, 'name') + "".join("%6i" % rank for rank in range(1, len(standings) + 1))
+        lines = [heading + "  %6s %4s %4s %4s %6s  %s" % ('games', 'W', 'D', 'L', 'score', '95% interval')]
+        for rank, (name, wins, draws, losses, score, low, high) in enumerate(standings, 1):
+            cells = ""
+            for opponent, _, _, _, _, _, _ in standings:
+                record = table[name].get(opponent)
+                cells += "%6s" % ('-' if record is None else "%.0f%%" % (score_of(record) * 100))
+            lines += ["%3i  %-*s " % (rank, width, name) + cells + "  %6i %4i %4i %4i %5.1f%%  %.1f%% - %.1f%%" % (
+                wins + draws + losses, wins, draws, losses, score * 100, low * 100, high * 100)]
+        return lines
+
+
+def score_of(record):
+    """
+    :param record: (int, int, int), wins, draws and losses
+    :return: float, share of points scored, counting a draw as half a win (or 0.5 if no games were played)
+    """
+    wins, draws, losses = record
+    games = wins + draws + losses
+    return (wins + 0.5 * draws) / games if games else 0.5
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank computer players by playing a tournament between them.")
+    parser.add_argument('entrants', nargs='+',
+                        help="policies to enter, e.g. 'random' or 'bot:depth=4,time=0.5' (options: %s)" %
+                             ", ".join(sorted(OPTIONS)))
+    parser.add_argument('--games', type=int, default=10, help="games each pairing plays with each moving first")
+    parser.add_argument('--swiss', action='store_true', help="play Swiss rounds instead of a round robin")
+    parser.add_argument('--rounds', type=int, default=None, help="number of Swiss rounds")
+    parser.add_argument('--processes', type=int, default=None, help="number of processes (default one per CPU)")
+    parser.add_argument('--batch', type=int, default=10, help="number of games each process plays at a time")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random players and Swiss pairings")
+    parser.add_argument('--checkpoint', default=None, help="file to save progress to, and resume from if it exists")
+    parser.add_argument('--height', type=int, default=6, help="number of rows on the board")
+    parser.add_argument('--width', type=int, default=9, help="number of columns on the board")
+    parser.add_argument('--connect', type=int, default=5, help="number of tiles in a row needed to win")
+    args = parser.parse_args()
+    try:
+        entrants = [make_entrant(spec) for spec in args.entrants]
+        # Entering the same policy twice gives each a number, so they can be told apart
+        entrants = [("%s#%i" % (name, index + 1) if args.entrants.count(name) > 1 else name, policy)
+                    for index, (name, policy) in enumerate(entrants)]
+        tournament = Tournament(entrants, args.games, args.swiss, args.rounds, args.processes, args.batch,
+                                args.seed, args.checkpoint, args.height, args.width, args.connect)
+    except ValueError as exc:
+        parser.error(str(exc))
+    seconds = tournament.run()
+    print("Played %i games in %.2f seconds" % (sum(r['games'] for r in tournament.results.values()), seconds))
+    for line in tournament.report():
+        print(line)
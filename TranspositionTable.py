@@ -0,0 +1,127 @@
+from array import array
+
+# Kinds of score stored in an entry
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Bytes used by each slot: one 64-bit key and one 64-bit packed entry
+SLOT_SIZE = 16
+
+
+class TranspositionTable(object):
+
+    def __init__(self, size=16 * 1024 * 1024):
+        """
+        Fixed size table of search results, keyed by the Zobrist hash of the board.
+        A position and its mirror image are stored in the same entry under the smaller of the two hashes, with the
+        best move mirrored as well, which halves the number of entries an opening fills.
+        Each hash has one slot, and a new result replaces the old one if it was searched at least as deep or the old
+        one is from an earlier search.
+
+        :param size: int, memory budget in bytes, rounded down to a power of two slots
+        """
+        slots = 1
+        while slots * 2 * SLOT_SIZE <= size:
+            slots *= 2
+        self.slots = slots
+        self.keys = array('Q', [0]) * slots
+        self.entries = array('q', [0]) * slots
+        self.generation = 1
+        self.filled = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replaced = 0
+
+    def new_search(self):
+        """
+        Mark the entries already stored as old, so they are the first to be replaced.
+        """
+        self.generation = self.generation % 255 + 1
+
+    @staticmethod
+    def key(board, tile):
+        """
+        Get the key for the board with the given tile to move.
+
+        :param board:   Board
+        :param tile:    string, tile to play
+        :return: (int, boolean), the key and True if it is the key of the mirror image
+        """
+        side = board.geometry.side if tile == 'O' else 0
+        own = board.hash ^ side
+        mirror = board.mirror_hash ^ side
+        if mirror < own:
+            return mirror, True
+        return own, False
+
+    def probe(self, board, tile):
+        """
+        Look up the board with the given tile to move.
+
+        :param board:   Board
+        :param tile:    string, tile to play
+        :return: (int, int, int, int), the score, kind of score, depth and best column (or None if not stored)
+        """
+        self.probes += 1
+        key, mirrored = self.key(board, tile)
+        slot = key & (self.slots - 1)
+        if self.keys[slot] != key:
+            return None
+        self.hits += 1
+        entry = self.entries[slot]
+        move = (entry & 0xff) - 1
+        if mirrored and move >= 0:
+            move = board.width - 1 - move
+        return entry >> 32, (entry >> 8) & 0xff, (entry >> 16) & 0xff, move
+
+    def store(self, board, tile, score, kind, depth, move):
+        """
+        Store the result of searching the board with the given tile to move.
+
+        :param board:   Board
+        :param tile:    string, tile to play
+        :param score:   int, score found
+        :param kind:    int, EXACT, LOWER or UPPER
+        :param depth:   int, number of moves searched ahead
+        :param move:    int, best column found (or -1 if none)
+        """
+        key, mirrored = self.key(board, tile)
+        if mirrored and move >= 0:
+            move = board.width - 1 - move
+        slot = key & (self.slots - 1)
+        old = self.keys[slot]
+        if old and old != key:
+            entry = self.entries[slot]
+            if (entry >> 24) & 0xff == self.generation and (entry >> 16) & 0xff > depth:
+                return
+            self.replaced += 1
+        elif not old:
+            self.filled += 1
+        self.keys[slot] = key
+        self.entries[slot] = (score << 32) | (self.generation << 24) | (min(depth, 255) << 16) | (kind << 8) | (move + 1)
+        self.stores += 1
+
+    def clear(self):
+        """
+        Remove every entry and reset the statistics.
+        """
+        self.keys = array('Q', [0]) * self.slots
+        self.entries = array('q', [0]) * self.slots
+        self.filled = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replaced = 0
+
+    def stats(self):
+        """
+        Get the hit rate and occupancy statistics.
+
+        :return: {}
+        """
+        hit_rate = self.hits / self.probes if self.probes else 0.0
+        return {'slots':self.slots, 'bytes':self.slots * SLOT_SIZE, 'filled':self.filled,
+                'occupancy':self.filled / self.slots, 'probes':self.probes, 'hits':self.hits, 'hit_rate':hit_rate,
+                'stores':self.stores, 'replaced':self.replaced}